@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import json
+import sys
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from pricing import BenchmarkResult, measure, parse_args, print_results
+
+from genai_prices import Usage
+from genai_prices.data_snapshot import get_snapshot
+from genai_prices.types import Provider, UsageExtractor
+
+USAGES_PATH = Path(__file__).parents[2] / 'tests' / 'dataset' / 'usages.json'
+
+EMPTY_USAGE = Usage()
+
+ExtractionCase = tuple[dict[str, Any], Provider, UsageExtractor]
+
+
+def load_cases() -> list[ExtractionCase]:
+    """Every response body in the dataset with each extractor usage was extracted with."""
+    extractors = {
+        (provider.id, extractor.api_flavor): (provider, extractor)
+        for provider in get_snapshot().providers
+        for extractor in provider.extractors or []
+    }
+    cases: list[ExtractionCase] = []
+    for result in json.loads(USAGES_PATH.read_text()):
+        for extracted in result['extracted']:
+            for item in extracted['extractors']:
+                cases.append((result['body'], *extractors[item['provider_id'], item['api_flavor']]))
+    return cases
+
+
+def extraction_operations(cases: list[ExtractionCase]) -> dict[str, Callable[[], int]]:
+    def extract() -> int:
+        return sum(extractor.extract(body)[1] != EMPTY_USAGE for body, _, extractor in cases)
+
+    def provider() -> int:
+        return sum(
+            provider.extract_usage(body, api_flavor=extractor.api_flavor)[1] != EMPTY_USAGE
+            for body, provider, extractor in cases
+        )
+
+    raw_cases = [(json.dumps(body).encode(), extractor) for body, _, extractor in cases]
+
+    def loads() -> int:
+        return sum(extractor.extract(json.loads(raw))[1] != EMPTY_USAGE for raw, extractor in raw_cases)
+
+    def from_bytes() -> int:
+        return sum(extractor.extract_from_bytes(raw)[1] != EMPTY_USAGE for raw, extractor in raw_cases)
+
+    return {'extract': extract, 'provider': provider, 'loads': loads, 'bytes': from_bytes}
+
+
+def run_benchmarks(*, iterations: int, samples: int, warmup_iterations: int) -> list[BenchmarkResult]:
+    cases = load_cases()
+    results: list[BenchmarkResult] = []
+    expected: int | None = None
+    for path_name, operation in extraction_operations(cases).items():
+        extracted = operation()
+        assert expected is None or extracted == expected, f'usages-json {path_name} extracted {extracted}'
+        expected = extracted
+        results.append(
+            measure(
+                f'usages-json-{len(cases)}-bodies',
+                path_name,
+                operation,
+                iterations=max(1, iterations // 10_000),
+                samples=samples,
+                warmup_iterations=max(1, warmup_iterations // 10_000),
+            )
+        )
+    return results
+
+
+def main() -> None:
+    args = parse_args('Benchmark Python usage extraction.')
+    results = run_benchmarks(
+        iterations=args.iterations,
+        samples=args.samples,
+        warmup_iterations=args.warmup_iterations,
+    )
+    print_results(args, results)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
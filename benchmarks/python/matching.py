@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import sys
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+
+from pricing import BenchmarkResult, measure, parse_args, print_results
+
+from genai_prices._match import MatchPredicate, compile_match_logic
+from genai_prices.data import providers
+from genai_prices.data_snapshot import DataSnapshot
+from genai_prices.types import MatchLogic, ModelInfo, Provider
+
+
+@dataclass(frozen=True)
+class MatchingCase:
+    name: str
+    provider_id: str
+    model_ref: str
+    expected: str | None
+
+
+CASES = (
+    MatchingCase('openai-early-hit', 'openai', 'gpt-4o-2024-08-06', 'gpt-4o'),
+    MatchingCase('openrouter-late-hit', 'openrouter', 'z-ai/glm-4.6', 'z-ai/glm-4.6'),
+    MatchingCase('openrouter-miss', 'openrouter', 'my-org/fine-tuned-model-v7', None),
+)
+
+
+def tree_walk(models: Sequence[ModelInfo], model_ref: str) -> ModelInfo | None:
+    return next((model for model in models if model.match.is_match(model_ref)), None)
+
+
+def compiled_scan(models: Sequence[tuple[MatchPredicate, ModelInfo]], model_ref: str) -> ModelInfo | None:
+    return next((model for is_match, model in models if is_match(model_ref)), None)
+
+
+def model_match_operations(case: MatchingCase) -> dict[str, Callable[[], ModelInfo | None]]:
+    provider = next(provider for provider in providers if provider.id == case.provider_id)
+    compiled = [(compile_match_logic(model.match), model) for model in provider.models]
+    index = provider.model_index()
+    return {
+        'tree': lambda: tree_walk(provider.models, case.model_ref),
+        'compiled': lambda: compiled_scan(compiled, case.model_ref),
+        'index': lambda: index.find(case.model_ref),
+    }
+
+
+def fallback_operations(provider_id: str, model_ref: str) -> dict[str, Callable[[], ModelInfo | None]]:
+    provider = next(provider for provider in providers if provider.id == provider_id)
+
+    def linear() -> ModelInfo | None:
+        if model := tree_walk(provider.models, model_ref):
+            return model
+        for fallback_id in provider.fallback_model_providers or []:
+            fallback = next((p for p in providers if p.id == fallback_id), None)
+            if fallback and (model := tree_walk(fallback.models, model_ref)):
+                return model
+        return None
+
+    return {
+        'tree': linear,
+        'index': lambda: provider.find_model(model_ref, all_providers=providers),
+    }
+
+
+BATCH_PAIRS = [
+    (provider_id, model_ref)
+    for provider_id, model_ref in (
+        ('openai', 'gpt-4o'),
+        ('openai', 'gpt-4.1-mini'),
+        ('anthropic', 'claude-sonnet-4-20250514'),
+        ('google-vertex', 'gemini-2.5-flash'),
+        ('azure', 'gpt-4o-mini'),
+        ('openai', 'unknown-model'),
+        (None, 'claude-3-5-haiku-latest'),
+        ('litellm', 'openai/gpt-4o'),
+    )
+] * 125
+
+
+def batch_operations() -> dict[str, Callable[[], int]]:
+    snapshot = DataSnapshot(providers=providers, from_auto_update=False)
+
+    def per_row() -> int:
+        resolved = 0
+        for provider_id, model_ref in BATCH_PAIRS:
+            try:
+                snapshot.find_provider_model(model_ref, None, provider_id, None)
+            except LookupError:
+                continue
+            resolved += 1
+        return resolved
+
+    def batch() -> int:
+        return sum(handle >= 0 for handle in snapshot.resolve_many(BATCH_PAIRS).handles)
+
+    return {'per-row': per_row, 'batch': batch}
+
+
+ADVERSARIAL_MODEL_REFS = (
+    'a' * 65_536,
+    'gpt-4o' + '-' * 65_536,
+    'claude-' * 10_000,
+    '/'.join(['openrouter'] * 5_000),
+)
+
+
+def adversarial_operations() -> dict[str, Callable[[], int]]:
+    # caches are disabled so every call does the full lookup
+    unbounded = DataSnapshot(
+        providers=providers, from_auto_update=False, lookup_cache_size=0, negative_lookup_cache_size=0
+    )
+    bounded = DataSnapshot(
+        providers=providers,
+        from_auto_update=False,
+        lookup_cache_size=0,
+        negative_lookup_cache_size=0,
+        max_model_ref_length=256,
+    )
+
+    def lookup_all(snapshot: DataSnapshot) -> int:
+        misses = 0
+        for model_ref in ADVERSARIAL_MODEL_REFS:
+            for provider_id in (None, 'openrouter'):
+                try:
+                    snapshot.find_provider_model(model_ref, None, provider_id, None)
+                except LookupError:
+                    misses += 1
+        return misses
+
+    return {'unbounded': lambda: lookup_all(unbounded), 'bounded': lambda: lookup_all(bounded)}
+
+
+def provider_match_operations(model_ref: str) -> dict[str, Callable[[], Provider | None]]:
+    clauses: list[tuple[MatchLogic, Provider]] = [
+        (provider.model_match, provider) for provider in providers if provider.model_match is not None
+    ]
+    compiled = [(compile_match_logic(clause), provider) for clause, provider in clauses]
+    return {
+        'tree': lambda: next((provider for clause, provider in clauses if clause.is_match(model_ref)), None),
+        'compiled': lambda: next((provider for is_match, provider in compiled if is_match(model_ref)), None),
+    }
+
+
+def run_benchmarks(*, iterations: int, samples: int, warmup_iterations: int) -> list[BenchmarkResult]:
+    results: list[BenchmarkResult] = []
+    for case in CASES:
+        for path_name, operation in model_match_operations(case).items():
+            model = operation()
+            assert (model.id if model else None) == case.expected, f'{case.name} {path_name} found {model}'
+            results.append(
+                measure(
+                    case.name,
+                    path_name,
+                    operation,
+                    iterations=iterations,
+                    samples=samples,
+                    warmup_iterations=warmup_iterations,
+                )
+            )
+
+    for path_name, operation in fallback_operations('azure', 'gpt-4o-mini').items():
+        model = operation()
+        assert model is not None and model.id == 'gpt-4o-mini', f'azure-fallback-hit {path_name} found {model}'
+        results.append(
+            measure(
+                'azure-fallback-hit',
+                path_name,
+                operation,
+                iterations=iterations,
+                samples=samples,
+                warmup_iterations=warmup_iterations,
+            )
+        )
+
+    for path_name, operation in batch_operations().items():
+        assert operation() == len(BATCH_PAIRS) * 7 // 8, f'resolve-1000-rows {path_name}'
+        results.append(
+            measure(
+                'resolve-1000-rows',
+                path_name,
+                operation,
+                iterations=max(1, iterations // 100),
+                samples=samples,
+                warmup_iterations=max(1, warmup_iterations // 100),
+            )
+        )
+
+    for path_name, operation in adversarial_operations().items():
+        assert operation() == len(ADVERSARIAL_MODEL_REFS) * 2, f'adversarial-refs {path_name}'
+        results.append(
+            measure(
+                'adversarial-refs',
+                path_name,
+                operation,
+                iterations=max(1, iterations // 1000),
+                samples=samples,
+                warmup_iterations=max(1, warmup_iterations // 1000),
+            )
+        )
+
+    for path_name, operation in provider_match_operations('mistral-large-latest').items():
+        provider = operation()
+        assert provider is not None and provider.id == 'mistral', f'provider-model-match {path_name} found {provider}'
+        results.append(
+            measure(
+                'provider-model-match',
+                path_name,
+                operation,
+                iterations=iterations,
+                samples=samples,
+                warmup_iterations=warmup_iterations,
+            )
+        )
+    return results
+
+
+def main() -> None:
+    args = parse_args('Benchmark Python model and provider matching.')
+    results = run_benchmarks(
+        iterations=args.iterations,
+        samples=args.samples,
+        warmup_iterations=args.warmup_iterations,
+    )
+    print_results(args, results)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
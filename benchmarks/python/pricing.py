@@ -10,7 +10,7 @@ from datetime import datetime, timezone
 from decimal import Decimal
 from time import perf_counter_ns
 
-from genai_prices import Usage, calc_price
+from genai_prices import Usage, calc_price, calc_total
 from genai_prices.data_snapshot import DataSnapshot, get_snapshot, set_custom_snapshot
 from genai_prices.types import CalcPrice, ClauseEquals, ModelInfo, ModelPrice, PriceCalculation, Provider
 
@@ -128,6 +128,9 @@ def assert_expected_results(case: BenchmarkCase) -> None:
     direct = direct_result(case.model_price.calc_price(case.usage))
     assert direct == case.expected, f'{case.name} direct result {direct!r} != {case.expected!r}'
 
+    compiled = direct_result(case.model_price.calc_price_with(case.usage, compiled=True))
+    assert compiled == case.expected, f'{case.name} compiled result {compiled!r} != {case.expected!r}'
+
     public = public_result(
         calc_price(
             case.usage,
@@ -138,6 +141,15 @@ def assert_expected_results(case: BenchmarkCase) -> None:
     )
     assert public == case.expected, f'{case.name} public result {public!r} != {case.expected!r}'
 
+    total = calc_total(
+        case.usage,
+        case.model_ref,
+        provider_id='benchmark',
+        genai_request_timestamp=BENCHMARK_TIMESTAMP,
+        breakdown=True,
+    )
+    assert total == case.expected, f'{case.name} total result {total!r} != {case.expected!r}'
+
 
 def run_iterations(operation: Callable[[], object], iterations: int) -> None:
     for _ in range(iterations):
@@ -191,6 +203,29 @@ def run_benchmarks(*, iterations: int, samples: int, warmup_iterations: int) ->
                     warmup_iterations=warmup_iterations,
                 )
             )
+            results.append(
+                measure(
+                    case.name,
+                    'compiled',
+                    lambda case=case: case.model_price.calc_price_with(case.usage, compiled=True),
+                    iterations=iterations,
+                    samples=samples,
+                    warmup_iterations=warmup_iterations,
+                )
+            )
+            for numeric in ('fixed', 'float'):
+                results.append(
+                    measure(
+                        case.name,
+                        numeric,
+                        lambda case=case, numeric=numeric: case.model_price.calc_price_with(
+                            case.usage, numeric=numeric
+                        ),
+                        iterations=iterations,
+                        samples=samples,
+                        warmup_iterations=warmup_iterations,
+                    )
+                )
             results.append(
                 measure(
                     case.name,
@@ -206,6 +241,21 @@ def run_benchmarks(*, iterations: int, samples: int, warmup_iterations: int) ->
                     warmup_iterations=warmup_iterations,
                 )
             )
+            results.append(
+                measure(
+                    case.name,
+                    'total',
+                    lambda case=case: calc_total(
+                        case.usage,
+                        case.model_ref,
+                        provider_id='benchmark',
+                        genai_request_timestamp=BENCHMARK_TIMESTAMP,
+                    ),
+                    iterations=iterations,
+                    samples=samples,
+                    warmup_iterations=warmup_iterations,
+                )
+            )
         return results
     finally:
         set_custom_snapshot(None)
@@ -218,32 +268,35 @@ def positive_int(value: str) -> int:
     return parsed
 
 
-def parse_args() -> argparse.Namespace:
-    parser = argparse.ArgumentParser(description='Benchmark Python pricing calculation overhead.')
+def parse_args(description: str = 'Benchmark Python pricing calculation overhead.') -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=description)
     parser.add_argument('--iterations', type=positive_int, default=DEFAULT_ITERATIONS)
     parser.add_argument('--samples', type=positive_int, default=DEFAULT_SAMPLES)
     parser.add_argument('--warmup-iterations', type=positive_int, default=DEFAULT_WARMUP_ITERATIONS)
     return parser.parse_args()
 
 
-def main() -> None:
-    args = parse_args()
-    results = run_benchmarks(
-        iterations=args.iterations,
-        samples=args.samples,
-        warmup_iterations=args.warmup_iterations,
-    )
-
+def print_results(args: argparse.Namespace, results: Sequence[BenchmarkResult]) -> None:
     implementation = platform.python_implementation()
     print(f'Python {platform.python_version()} ({implementation})')
     print(f'iterations={args.iterations} samples={args.samples} warmup_iterations={args.warmup_iterations}')
-    print('case                                      path      median ns/op      min ns/op      max ns/op')
+    print('case                                      path       median ns/op      min ns/op      max ns/op')
     for result in results:
         print(
-            f'{result.case_name:<41} {result.path_name:<7} '
+            f'{result.case_name:<41} {result.path_name:<8} '
             f'{result.median_ns_per_op:>13.1f} {result.min_ns_per_op:>14.1f} {result.max_ns_per_op:>14.1f}'
         )
 
 
+def main() -> None:
+    args = parse_args()
+    results = run_benchmarks(
+        iterations=args.iterations,
+        samples=args.samples,
+        warmup_iterations=args.warmup_iterations,
+    )
+    print_results(args, results)
+
+
 if __name__ == '__main__':
     sys.exit(main())
@@ -69,6 +69,10 @@ export const data: Provider[] = [
             required: true,
           },
         ],
+        streaming: {
+          merge: 'replace',
+          response_paths: ['message'],
+        },
       },
       {
         api_flavor: 'chat',
@@ -2517,6 +2521,9 @@ export const data: Provider[] = [
             required: true,
           },
         ],
+        streaming: {
+          merge: 'replace',
+        },
       },
       {
         api_flavor: 'responses',
@@ -2544,6 +2551,10 @@ export const data: Provider[] = [
             required: true,
           },
         ],
+        streaming: {
+          merge: 'replace',
+          response_paths: ['response'],
+        },
       },
       {
         api_flavor: 'embeddings',
@@ -2593,6 +2604,10 @@ export const data: Provider[] = [
             required: true,
           },
         ],
+        streaming: {
+          merge: 'replace',
+          response_paths: ['message'],
+        },
       },
     ],
     fallback_model_providers: ['openai', 'anthropic'],
@@ -4646,6 +4661,9 @@ export const data: Provider[] = [
             required: false,
           },
         ],
+        streaming: {
+          merge: 'replace',
+        },
       },
       {
         api_flavor: 'anthropic',
@@ -4683,6 +4701,10 @@ export const data: Provider[] = [
             required: true,
           },
         ],
+        streaming: {
+          merge: 'replace',
+          response_paths: ['message'],
+        },
       },
       {
         api_flavor: 'chat',
@@ -4720,6 +4742,9 @@ export const data: Provider[] = [
             required: true,
           },
         ],
+        streaming: {
+          merge: 'replace',
+        },
       },
     ],
     fallback_model_providers: ['anthropic'],
@@ -11916,6 +11941,9 @@ export const data: Provider[] = [
             required: true,
           },
         ],
+        streaming: {
+          merge: 'replace',
+        },
       },
       {
         api_flavor: 'responses',
@@ -11948,6 +11976,10 @@ export const data: Provider[] = [
             required: true,
           },
         ],
+        streaming: {
+          merge: 'replace',
+          response_paths: ['response'],
+        },
       },
       {
         api_flavor: 'realtime',
@@ -12010,6 +12042,9 @@ export const data: Provider[] = [
             required: false,
           },
         ],
+        streaming: {
+          merge: 'sum',
+        },
       },
       {
         api_flavor: 'images',
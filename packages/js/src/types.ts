@@ -77,6 +77,12 @@ export interface UsageExtractor {
   mappings: UsageExtractorMapping[]
   model_path: ExtractPath
   root: ExtractPath
+  streaming?: UsageExtractorStreaming
+}
+
+export interface UsageExtractorStreaming {
+  merge: 'replace' | 'sum'
+  response_paths?: ExtractPath[]
 }
 
 export interface ModelInfo {
@@ -1,15 +1,24 @@
 from __future__ import annotations as _annotations
 
 from datetime import datetime
+from decimal import Decimal
 from importlib.metadata import version as _metadata_version
-from typing import Any, overload
+from typing import Any, Literal, overload
 
 from . import data_snapshot, types
 from .types import Usage
 from .update_prices import UpdatePrices, wait_prices_updated_async, wait_prices_updated_sync
 
 __version__ = _metadata_version('genai_prices')
-__all__ = 'Usage', 'calc_price', 'UpdatePrices', 'wait_prices_updated_sync', 'wait_prices_updated_async', '__version__'
+__all__ = (
+    'Usage',
+    'calc_price',
+    'calc_total',
+    'UpdatePrices',
+    'wait_prices_updated_sync',
+    'wait_prices_updated_async',
+    '__version__',
+)
 
 
 @overload
@@ -19,6 +28,7 @@ def calc_price(
     *,
     provider_id: types.ProviderID | str | None = None,
     genai_request_timestamp: datetime | None = None,
+    numeric: types.NumericBackend | None = None,
 ) -> types.PriceCalculation: ...
 
 
@@ -29,6 +39,7 @@ def calc_price(
     *,
     provider_api_url: str | None = None,
     genai_request_timestamp: datetime | None = None,
+    numeric: types.NumericBackend | None = None,
 ) -> types.PriceCalculation: ...
 
 
@@ -39,6 +50,7 @@ def calc_price(
     provider_id: types.ProviderID | str | None = None,
     provider_api_url: str | None = None,
     genai_request_timestamp: datetime | None = None,
+    numeric: types.NumericBackend | None = None,
 ) -> types.PriceCalculation:
     """Calculate the price of an LLM API call.
 
@@ -51,11 +63,76 @@ def calc_price(
         provider_id: The ID of the provider to calculate the price for.
         provider_api_url: The API URL of the provider to calculate the price for.
         genai_request_timestamp: The timestamp of the request to the GenAI service, use `None` to use the current time.
+        numeric: The arithmetic used to calculate the price, `None` to use the snapshot's `numeric_backend`, which
+            defaults to `'decimal'`. See `types.NumericBackend` for the error bounds of each.
 
     Returns:
         The price calculation details.
     """
-    return data_snapshot.get_snapshot().calc(usage, model_ref, provider_id, provider_api_url, genai_request_timestamp)
+    return data_snapshot.get_snapshot().calc(
+        usage, model_ref, provider_id, provider_api_url, genai_request_timestamp, numeric
+    )
+
+
+@overload
+def calc_total(
+    usage: types.AbstractUsage,
+    model_ref: str,
+    *,
+    provider_id: types.ProviderID | str | None = None,
+    provider_api_url: str | None = None,
+    genai_request_timestamp: datetime | None = None,
+    numeric: types.NumericBackend | None = None,
+    breakdown: Literal[False] = False,
+) -> Decimal: ...
+
+
+@overload
+def calc_total(
+    usage: types.AbstractUsage,
+    model_ref: str,
+    *,
+    provider_id: types.ProviderID | str | None = None,
+    provider_api_url: str | None = None,
+    genai_request_timestamp: datetime | None = None,
+    numeric: types.NumericBackend | None = None,
+    breakdown: Literal[True],
+) -> tuple[Decimal, Decimal, Decimal]: ...
+
+
+def calc_total(
+    usage: types.AbstractUsage,
+    model_ref: str,
+    *,
+    provider_id: types.ProviderID | str | None = None,
+    provider_api_url: str | None = None,
+    genai_request_timestamp: datetime | None = None,
+    numeric: types.NumericBackend | None = None,
+    breakdown: bool = False,
+) -> Decimal | tuple[Decimal, Decimal, Decimal]:
+    """Calculate the total price of an LLM API call, without the details `calc_price` returns.
+
+    Models are found and prices calculated exactly as by `calc_price`, but only the prices are returned, for
+    metering where the model, provider and prices used aren't needed.
+
+    Args:
+        usage: The usage to calculate the price for.
+        model_ref: A reference to the model used, this method will try to match this to a specific model.
+        provider_id: The ID of the provider to calculate the price for.
+        provider_api_url: The API URL of the provider to calculate the price for.
+        genai_request_timestamp: The timestamp of the request to the GenAI service, use `None` to use the current time.
+        numeric: The arithmetic used to calculate the price, see `calc_price`.
+        breakdown: Whether to return the input, output and total price rather than just the total price.
+
+    Returns:
+        The total price in USD, or if `breakdown` is true, a tuple of the input, output and total price.
+    """
+    price = data_snapshot.get_snapshot().calc_total(
+        usage, model_ref, provider_id, provider_api_url, genai_request_timestamp, numeric
+    )
+    if breakdown:
+        return price['input_price'], price['output_price'], price['total_price']
+    return price['total_price']
 
 
 @overload
@@ -92,3 +169,74 @@ def extract_usage(
         The extracted usage information, model ref and provider used.
     """
     return data_snapshot.get_snapshot().extract_usage(response_data, provider_id, provider_api_url, api_flavor)
+
+
+@overload
+def extract_usage_from_bytes(
+    body: bytes | bytearray, *, provider_id: types.ProviderID | str, api_flavor: str = 'default'
+) -> types.ExtractedUsage: ...
+
+
+@overload
+def extract_usage_from_bytes(
+    body: bytes | bytearray, *, provider_api_url: str, api_flavor: str = 'default'
+) -> types.ExtractedUsage: ...
+
+
+def extract_usage_from_bytes(
+    body: bytes | bytearray,
+    *,
+    provider_id: types.ProviderID | str | None = None,
+    provider_api_url: str | None = None,
+    api_flavor: str = 'default',
+) -> types.ExtractedUsage:
+    """Extract usage information from a raw JSON response body, e.g. as held by a proxy.
+
+    This gives the same result as `extract_usage(json.loads(body), ...)`, but only the model name and usage are
+    decoded, the rest of the body, e.g. long completions or images, is skipped over without being decoded.
+
+    One of `provider_id` or `provider_api_url` is required.
+
+    Args:
+        body: The JSON response body, encoded as UTF-8.
+        provider_id: The ID of the provider to extract usage information for.
+        provider_api_url: The API URL of the provider to extract usage information for.
+        api_flavor: The API flavor of the provider to extract usage information for.
+
+    Returns:
+        The extracted usage information, model ref and provider used.
+    """
+    return data_snapshot.get_snapshot().extract_usage_from_bytes(body, provider_id, provider_api_url, api_flavor)
+
+
+@overload
+def streaming_usage_extractor(
+    *, provider_id: types.ProviderID | str, api_flavor: str = 'default'
+) -> types.StreamingUsageExtractor: ...
+
+
+@overload
+def streaming_usage_extractor(
+    *, provider_api_url: str, api_flavor: str = 'default'
+) -> types.StreamingUsageExtractor: ...
+
+
+def streaming_usage_extractor(
+    *,
+    provider_id: types.ProviderID | str | None = None,
+    provider_api_url: str | None = None,
+    api_flavor: str = 'default',
+) -> types.StreamingUsageExtractor:
+    """Create an extractor for the usage of a streamed response, which is given the stream's chunks one at a time.
+
+    One of `provider_id` or `provider_api_url` is required.
+
+    Args:
+        provider_id: The ID of the provider to extract usage information for.
+        provider_api_url: The API URL of the provider to extract usage information for.
+        api_flavor: The API flavor of the provider to extract usage information for.
+
+    Returns:
+        The extractor, call `feed` with each chunk of the stream, then `finish` to get the extracted usage.
+    """
+    return data_snapshot.get_snapshot().streaming_usage_extractor(provider_id, provider_api_url, api_flavor)
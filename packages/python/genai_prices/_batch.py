@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, Any, Literal, NoReturn
+
+from typing_extensions import TypedDict
+
+try:
+    import numpy as np
+    import numpy.typing as npt
+except ModuleNotFoundError as exc:  # pragma: no cover
+    if exc.name == 'numpy':
+        raise ImportError('Batch pricing requires numpy, install it with: pip install "genai-prices[numpy]"') from exc
+    raise
+
+if TYPE_CHECKING:
+    from .types import PricePlan
+
+__all__ = 'BatchPrices', 'RowError', 'calc_price_batch'
+
+_FLOAT_TOLERANCE = 1e-12
+
+
+class RowError(ValueError):
+    """Error pricing one row of a batch, `row` is its index."""
+
+    def __init__(self, row: int, reason: str) -> None:
+        super().__init__(f'Row {row}: {reason}')
+        self.row = row
+        self.reason = reason
+
+
+class BatchPrices(TypedDict):
+    """Prices of each row of a batch, integer nano-dollars with the `'fixed'` numeric backend, USD floats otherwise."""
+
+    input_price: npt.NDArray[Any]
+    output_price: npt.NDArray[Any]
+    total_price: npt.NDArray[Any]
+
+
+def calc_price_batch(
+    plan: PricePlan, columns: Mapping[str, npt.ArrayLike], numeric: Literal['fixed', 'float']
+) -> BatchPrices:
+    """Calculate the price of each row of `columns` with `plan`, see `ModelPrice.calc_price_batch`."""
+    if numeric not in ('fixed', 'float'):
+        raise ValueError(f"Unknown numeric backend {numeric!r} for batch pricing, expected 'fixed' or 'float'")
+    dtype = np.int64 if numeric == 'fixed' else np.float64
+    arrays, length = _usage_arrays(plan, columns, numeric)
+
+    needed_keys = [] if plan.leaf_plan is None else [unit.usage_key for unit in plan.leaf_plan.units]
+    if plan.has_tiers and 'input_tokens' not in needed_keys:
+        needed_keys.append('input_tokens')
+    for usage_key in needed_keys:
+        if usage_key not in arrays:
+            _check_missing_value(plan, arrays, usage_key)
+
+    zeros = np.zeros(length, dtype=dtype)
+    leaf_values: list[npt.NDArray[Any]] = []
+    if plan.leaf_plan is not None:
+        negative = np.zeros(length, dtype=bool)
+        for unit, descendants in zip(plan.leaf_plan.units, plan.leaf_plan.descendants):
+            value = arrays.get(unit.usage_key, zeros).astype(dtype)
+            leaf_value = value
+            for index in descendants:
+                leaf_value = leaf_value - leaf_values[index]
+            if descendants and numeric == 'float':
+                # values are subtracted exactly by the scalar path, here rounding may leave a tiny negative remainder
+                negative |= leaf_value < value * -_FLOAT_TOLERANCE
+                leaf_value = np.maximum(leaf_value, 0)
+            else:
+                negative |= leaf_value < 0
+            leaf_values.append(leaf_value)
+        if negative.any():
+            _raise_row_error(plan, arrays, int(np.argmax(negative)))
+    leaf_indexes = {} if plan.leaf_plan is None else {unit.usage_key: i for i, unit in enumerate(plan.leaf_plan.units)}
+    total_input_tokens = arrays.get('input_tokens', zeros) if plan.has_tiers else zeros
+
+    input_price = np.zeros(length, dtype=dtype)
+    output_price = np.zeros(length, dtype=dtype)
+    total_price = np.zeros(length, dtype=dtype)
+    prices = plan.fixed_prices() if numeric == 'fixed' else plan.float_prices()
+    for usage_key, base, tiers, per, direction in prices:
+        if tiers:
+            # the highest tier whose start is below the total input tokens applies, as in `calc_unit_price`
+            starts = np.array([start for start, _ in reversed(tiers)])
+            tier_prices = np.array([base, *(tier_price for _, tier_price in reversed(tiers))], dtype=dtype)
+            price: Any = tier_prices[np.searchsorted(starts, total_input_tokens, side='left')]
+        else:
+            price = base
+
+        count = np.ones(length, dtype=dtype) if usage_key == 'requests' else leaf_values[leaf_indexes[usage_key]]
+        if numeric == 'fixed':
+            # rounded to the nearest nano-dollar like the scalar backend, split so `price * count` can't overflow
+            whole, remainder = np.divmod(price, per)
+            unit_price = whole * count + (2 * remainder * count + per) // (2 * per)
+        else:
+            unit_price = price * count / per
+
+        total_price = total_price + unit_price
+        if direction == 'input':
+            input_price = input_price + unit_price
+        elif direction == 'output':
+            output_price = output_price + unit_price
+
+    return {'input_price': input_price, 'output_price': output_price, 'total_price': total_price}
+
+
+def _usage_arrays(
+    plan: PricePlan, columns: Mapping[str, npt.ArrayLike], numeric: Literal['fixed', 'float']
+) -> tuple[dict[str, npt.NDArray[Any]], int]:
+    arrays: dict[str, npt.NDArray[Any]] = {}
+    length: int | None = None
+    for usage_key, column in columns.items():
+        if usage_key not in plan.registry.units or usage_key == 'requests':
+            raise ValueError(f'Unknown usage key {usage_key!r}')
+        array = np.asarray(column)
+        if array.ndim != 1:
+            raise ValueError(f'Usage column {usage_key!r} must be one-dimensional')
+        if length is None:
+            length = len(array)
+        elif len(array) != length:
+            raise ValueError(f'Usage column {usage_key!r} has {len(array)} rows, expected {length}')
+
+        kind = array.dtype.kind
+        if numeric == 'fixed' and kind not in 'iu':
+            raise TypeError(f'Usage column {usage_key!r} must have an integer dtype for fixed-point batch pricing')
+        elif kind not in 'iuf':
+            raise TypeError(f'Usage column {usage_key!r} must have an integer or float dtype')
+        arrays[usage_key] = array
+
+    invalid = np.zeros(length or 0, dtype=bool)
+    for array in arrays.values():
+        if array.dtype.kind == 'f':
+            invalid |= ~np.isfinite(array)
+        if array.dtype.kind != 'u':
+            invalid |= array < 0
+    if invalid.any():
+        _raise_row_error(plan, arrays, int(np.argmax(invalid)))
+    return arrays, length or 0
+
+
+def _check_missing_value(plan: PricePlan, arrays: Mapping[str, npt.NDArray[Any]], usage_key: str) -> None:
+    """Check a usage key without a column can be taken as 0, as `Usage` would infer it for each row.
+
+    Inference only depends on which related values are positive, so each distinct pattern is checked once.
+    """
+    from .types import Usage
+
+    unit = plan.registry.units[usage_key]
+    related = [
+        key for key in arrays if unit.is_compatible_with(other := plan.registry.units[key]) and other is not unit
+    ]
+    if not related:
+        return
+
+    patterns = np.stack([arrays[key] > 0 for key in related], axis=1)
+    for pattern in np.unique(patterns, axis=0):
+        if pattern.any():
+            usage = Usage(**{key: 1 for key, positive in zip(related, pattern) if positive})
+            try:
+                getattr(usage, usage_key)
+            except ValueError:
+                _raise_row_error(plan, arrays, int(np.argmax((patterns == pattern).all(axis=1))))
+
+
+def _raise_row_error(plan: PricePlan, arrays: Mapping[str, npt.NDArray[Any]], row: int) -> NoReturn:
+    from .types import Usage
+
+    try:
+        plan.calc_price(Usage(**{key: array[row].item() for key, array in arrays.items()}))
+    except ValueError as e:
+        raise RowError(row, str(e)) from e
+    raise RowError(row, 'invalid usage')  # pragma: no cover
@@ -12,6 +12,7 @@ from pydantic import AliasChoices, Field
 from pydantic.fields import FieldInfo
 
 from . import Usage, __version__, calc_price, update_prices
+from .suggestions import suggest_models
 from .types import (
     ModelPrice,
     PriceCalculation,
@@ -737,28 +738,13 @@ def _render_calc_error(
 
 
 def _suggest_models(model_ref: str, provider_id: str | None, providers: list[Provider]) -> list[str]:
-    if provider_id:
-        provider = next((p for p in providers if p.id == provider_id), None)
-        if provider is None:
-            return []
-        candidates = [model.id for model in provider.models]
-        matches = _suggest_values_case_insensitive(model_ref, candidates)
-        return [f'{provider.id}:{model_id}' for model_id in matches]
-
-    candidates = [f'{provider.id}:{model.id}' for provider in providers for model in provider.models]
-    return _suggest_values_case_insensitive(model_ref, candidates)
+    return suggest_models(model_ref, provider_id=provider_id, providers=providers)
 
 
 def _suggest_values(value: str, candidates: list[str]) -> list[str]:
     return difflib.get_close_matches(value, candidates, n=5, cutoff=0.6)
 
 
-def _suggest_values_case_insensitive(value: str, candidates: list[str]) -> list[str]:
-    lowered_candidates = [(candidate.lower(), candidate) for candidate in candidates]
-    matches = _suggest_values(value.lower(), [lowered for lowered, _ in lowered_candidates])
-    return [candidate for match in matches for lowered, candidate in lowered_candidates if lowered == match]
-
-
 def _format_provider_suggestions(suggestions: list[str]) -> Text:
     parts = Text()
     for index, suggestion in enumerate(suggestions):
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from decimal import Decimal
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .types import CalcPrice, PricePlan, Usage
+
+__all__ = ('compile_price_plan',)
+
+PriceFunction = Callable[['Usage'], 'CalcPrice']
+_Shape = tuple[object, ...]
+
+_factories: dict[_Shape, Callable[..., PriceFunction]] = {}
+
+
+def compile_price_plan(plan: PricePlan) -> PriceFunction:
+    """Return a function calculating the price of usage with `plan`, equivalent to `plan.calc_price`.
+
+    Like the `__init__` methods of dataclasses, the function's source is generated, with the priced usage keys, their
+    `per` and tier thresholds inlined, and compiled once for all prices with the same shape, only the price values
+    are bound per plan.
+
+    The generated function only handles integer usage values which decompose without error, for anything else,
+    including usage it fails to read, it calls `plan.calc_price`, so results, warnings and errors are always the same.
+    """
+    from .types import TieredPrices
+
+    shape = _plan_shape(plan)
+    factory = _factories.get(shape)
+    if factory is None:
+        factory = _factories[shape] = _compile_factory(shape)
+
+    args: list[Any] = [plan.calc_price]
+    for _, price, _, _ in plan.prices:
+        if isinstance(price, TieredPrices):
+            args.append(price.base)
+            args.extend(tier.price for tier in price.tiers)
+        else:
+            args.append(price)
+    return factory(*args)
+
+
+def _plan_shape(plan: PricePlan) -> _Shape:
+    from .types import TieredPrices
+
+    prices = tuple(
+        (
+            usage_key,
+            per,
+            direction,
+            tuple(tier.start for tier in price.tiers) if isinstance(price, TieredPrices) else None,
+        )
+        for usage_key, price, per, direction in plan.prices
+    )
+    leaf_plan = plan.leaf_plan
+    leaves = (
+        () if leaf_plan is None else tuple(zip((unit.usage_key for unit in leaf_plan.units), leaf_plan.descendants))
+    )
+    return prices, leaves
+
+
+def _compile_factory(shape: _Shape) -> Callable[..., PriceFunction]:
+    prices: tuple[tuple[str, int, str | None, tuple[int, ...] | None], ...]
+    leaves: tuple[tuple[str, tuple[int, ...]], ...]
+    prices, leaves = shape  # pyright: ignore[reportAssignmentType]
+
+    params = ['fallback']
+    body: list[str] = []
+
+    # read and decompose usage, leaving anything but integers and valid usage to the generic calculation
+    for index, (usage_key, _) in enumerate(leaves):
+        body.append(f'c{index} = getattr(usage, {usage_key!r}, None)')
+        body.append(f'if c{index} is None: c{index} = 0')
+    if leaves:
+        body.append(f'if {" or ".join(f"c{index}.__class__ is not int" for index in range(len(leaves)))}:')
+        body.append('    return fallback(usage)')
+    for index, (_, descendants) in enumerate(leaves):
+        body.append(f'l{index} = c{index}{"".join(f" - l{descendant}" for descendant in descendants)}')
+    if leaves:
+        body.append(f'if {" or ".join(f"l{index} < 0" for index in range(len(leaves)))}:')
+        body.append('    return fallback(usage)')
+
+    if any(tier_starts is not None for _, _, _, tier_starts in prices):
+        body.append('total_input_tokens = usage.input_tokens')
+
+    leaf_indexes = {usage_key: index for index, (usage_key, _) in enumerate(leaves)}
+    input_terms = ['ZERO']
+    output_terms = ['ZERO']
+    total_terms = ['ZERO']
+    for index, (usage_key, per, direction, tier_starts) in enumerate(prices):
+        count = '1' if usage_key == 'requests' else f'l{leaf_indexes[usage_key]}'
+        price = f'p{index}'
+        params.append(price)
+        if tier_starts:
+            tier_prices = [f'p{index}_{tier}' for tier in range(len(tier_starts))]
+            params.extend(tier_prices)
+            keyword = 'if'
+            # the highest tier whose start is exceeded applies
+            for start, tier_price in reversed(list(zip(tier_starts, tier_prices))):
+                body.append(f'{keyword} total_input_tokens > {start!r}: r{index} = {tier_price}')
+                keyword = 'elif'
+            body.append(f'else: r{index} = {price}')
+            price = f'r{index}'
+        body.append(f'u{index} = {price} * {count} / {per!r}')
+        total_terms.append(f'u{index}')
+        if direction == 'input':
+            input_terms.append(f'u{index}')
+        elif direction == 'output':
+            output_terms.append(f'u{index}')
+
+    body.append(
+        f"return {{'input_price': {' + '.join(input_terms)}, 'output_price': {' + '.join(output_terms)}, "
+        f"'total_price': {' + '.join(total_terms)}}}"
+    )
+
+    source = '\n'.join(
+        [
+            f'def factory({", ".join(params)}):',
+            '    def calc_price(usage):',
+            '        try:',
+            *(f'            {line}' for line in body),
+            # invalid usage may fail while it's read in a different order, the generic calculation reports the error
+            '        except Exception:',
+            '            return fallback(usage)',
+            '    return calc_price',
+        ]
+    )
+    namespace: dict[str, Any] = {'ZERO': Decimal(0), 'Decimal': Decimal}
+    exec(compile(source, f'<genai_prices price function {len(_factories)}>', 'exec'), namespace)
+    return namespace['factory']
@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import json
+import re
+from collections.abc import Mapping, Sequence
+from typing import TYPE_CHECKING, Any, TypeAlias
+
+if TYPE_CHECKING:
+    from genai_prices.types import ArrayMatch, ExtractPath
+
+__all__ = 'PathPlan', 'Missing', 'extraction_error', 'JsonSelection', 'json_selection', 'select_json'
+
+
+class Missing:
+    """Why the value at a path couldn't be found, the error message is only built if it's needed."""
+
+    __slots__ = 'depth', 'reason', 'data'
+
+    def __init__(self, depth: int, reason: str, data: Any) -> None:
+        self.depth = depth
+        """Number of steps of the path up to and including the step which failed."""
+        self.reason = reason
+        """One of `'dict'`, `'missing'`, `'sequence'` or `'item'`."""
+        self.data = data
+        """The data the step was applied to."""
+
+
+class PathPlan:
+    """Finds the values at several paths in the same data, following each shared prefix of the paths once.
+
+    The steps of all paths form a tree of nodes, `resolve` evaluates the nodes in order, so a node's parent has
+    always been evaluated before it. Failures are recorded as `Missing` rather than raised, since whether they're an
+    error depends on the path.
+    """
+
+    __slots__ = 'paths', 'path_nodes', '_nodes'
+
+    def __init__(self, paths: Sequence[ExtractPath]) -> None:
+        self.paths: list[tuple[str | ArrayMatch, ...]] = [
+            (path,) if isinstance(path, str) else tuple(path) for path in paths
+        ]
+        # each node is the index of its parent node, -1 for the data itself, its step and its depth
+        self._nodes: list[tuple[int, str | ArrayMatch, int]] = []
+        children: dict[int, list[tuple[str | ArrayMatch, int]]] = {}
+        self.path_nodes: list[int] = []
+        """The index of the last node of each path."""
+        for path in self.paths:
+            parent = -1
+            for depth, step in enumerate(path, start=1):
+                siblings = children.setdefault(parent, [])
+                node = next((index for sibling, index in siblings if sibling == step), None)
+                if node is None:
+                    node = len(self._nodes)
+                    self._nodes.append((parent, step, depth))
+                    siblings.append((step, node))
+                parent = node
+            self.path_nodes.append(parent)
+
+    def resolve(self, data: Any) -> list[Any]:
+        """Find the value of every node in `data`, `Missing` where it can't be found."""
+        resolved: list[Any] = []
+        for parent, step, depth in self._nodes:
+            container = data if parent < 0 else resolved[parent]
+            if type(container) is Missing:
+                resolved.append(container)
+            elif isinstance(step, str):
+                # checking for plain JSON types first avoids slower abstract base class checks
+                if type(container) is dict or isinstance(container, Mapping):
+                    try:
+                        resolved.append(container[step])
+                    except KeyError:
+                        resolved.append(Missing(depth, 'missing', container))
+                else:
+                    resolved.append(Missing(depth, 'dict', container))
+            elif type(container) is not list and not isinstance(container, Sequence):
+                resolved.append(Missing(depth, 'sequence', container))
+            elif item := step.extract(container):  # pyright: ignore[reportUnknownArgumentType]
+                resolved.append(item)
+            else:
+                resolved.append(Missing(depth, 'item', container))
+        return resolved
+
+
+def extraction_error(
+    path: Sequence[str | ArrayMatch],
+    data_path: Sequence[str | ArrayMatch],
+    value: Any,
+    expected: str,
+) -> ValueError:
+    """Build the error for a required `path` whose value is `value`, either `Missing` or not of the `expected` type."""
+    if type(value) is not Missing:
+        return ValueError(f'Expected `{_dot_path(data_path, path)}` value to be a {expected}, got {_type_name(value)}')
+
+    depth = value.depth
+    if value.reason == 'dict':
+        # the mapping containing the last step of the path is named by its own path, otherwise by the next step
+        error_path = path[: depth - 1] if depth == len(path) else path[:depth]
+        return ValueError(
+            f'Expected `{_dot_path(data_path, error_path)}` value to be a dict, got {_type_name(value.data)}'
+        )
+    elif value.reason == 'missing':
+        return ValueError(f'Missing value at `{_dot_path(data_path, path[:depth])}`')
+    elif value.reason == 'sequence':
+        return ValueError(
+            f'Expected `{_dot_path(data_path, path[:depth])}` value to be a sequence, got {_type_name(value.data)}'
+        )
+    else:
+        return ValueError(f'Unable to find item at `{_dot_path(data_path, path[:depth])}`')
+
+
+def _dot_path(data_path: Sequence[str | ArrayMatch], error_path: Sequence[str | ArrayMatch]) -> str:
+    return '.'.join([str(p) for p in data_path] + [str(p) for p in error_path])
+
+
+def _type_name(v: Any) -> str:
+    return 'None' if v is None else type(v).__name__
+
+
+JsonSelection: TypeAlias = 'dict[str, JsonSelection | None]'
+"""The members of a JSON object to decode, `None` means decode the whole value."""
+
+
+def json_selection(paths: Sequence[ExtractPath]) -> JsonSelection | None:
+    """Build the selection of the members needed to follow `paths`, `None` if the whole document is needed.
+
+    Paths are followed through object members, from an `ArrayMatch` step on the whole value is needed.
+    """
+    selection: JsonSelection = {}
+    for path in paths:
+        steps = (path,) if isinstance(path, str) else tuple(path)
+        if not steps or not isinstance(steps[0], str):
+            return None
+        node = selection
+        for step, next_step in zip(steps, (*steps[1:], None)):
+            assert isinstance(step, str)
+            child = node.get(step, {})
+            if child is None:
+                break
+            elif not isinstance(next_step, str):
+                node[step] = None
+                break
+            node[step] = child
+            node = child
+    return selection
+
+
+def select_json(body: bytes | bytearray, selection: JsonSelection | None) -> Any:
+    """Decode the members of the JSON document `body` chosen by `selection`, skipping everything else.
+
+    Skipped values are scanned for their end without being decoded, so time and memory depend mostly on the size of
+    the selected values. Skipped values are not fully validated.
+    """
+    if selection is None or json.detect_encoding(body[:4]) != 'utf-8':
+        return json.loads(body)
+    try:
+        value, _ = _select(body, _skip_whitespace(body, 0), selection)
+    except IndexError:
+        raise ValueError('Invalid JSON: unexpected end of document') from None
+    return value
+
+
+_QUOTE, _BACKSLASH, _COLON, _COMMA = b'"\\:,'
+_OPEN_OBJECT, _CLOSE_OBJECT, _OPEN_ARRAY, _CLOSE_ARRAY = b'{}[]'
+# anything but brackets and strings, and short strings without escapes, which are skipped in one step, longer
+# strings are found with `bytes.find`, which is much faster, the length of a match is limited to bound its memory
+_PLAIN = re.compile(rb'(?:[^"{}\[\]]|"[^"\\]{0,256}")*')
+_PLAIN_CHUNK = 65_536
+# a quote which doesn't directly follow a backslash, found much faster than by checking each quote in turn
+_UNESCAPED_QUOTE = re.compile(rb'"(?<!\\")')
+_WHITESPACE = re.compile(rb'[ \t\n\r]*')
+_SCALAR_END = re.compile(rb'[ \t\n\r,}\]]')
+
+
+def _select(body: bytes | bytearray, pos: int, selection: JsonSelection | None) -> tuple[Any, int]:
+    if selection is None or body[pos] != _OPEN_OBJECT:
+        end = _skip_value(body, pos)
+        return json.loads(body[pos:end]), end
+
+    members: dict[str, Any] = {}
+    pos = _skip_whitespace(body, pos + 1)
+    if body[pos] == _CLOSE_OBJECT:
+        return members, pos + 1
+    while True:
+        if body[pos] != _QUOTE:
+            raise _invalid_json('expected a member name', pos)
+        end = _skip_string(body, pos)
+        raw_key = body[pos + 1 : end - 1]
+        key: str = json.loads(body[pos:end]) if _BACKSLASH in raw_key else raw_key.decode()
+        pos = _skip_whitespace(body, end)
+        if body[pos] != _COLON:
+            raise _invalid_json("expected ':'", pos)
+        pos = _skip_whitespace(body, pos + 1)
+        if key in selection:
+            members[key], pos = _select(body, pos, selection[key])
+        else:
+            pos = _skip_value(body, pos)
+        pos = _skip_whitespace(body, pos)
+        if body[pos] == _COMMA:
+            pos = _skip_whitespace(body, pos + 1)
+        elif body[pos] == _CLOSE_OBJECT:
+            return members, pos + 1
+        else:
+            raise _invalid_json("expected ',' or '}'", pos)
+
+
+def _skip_value(body: bytes | bytearray, pos: int) -> int:
+    """Return the position after the value starting at `pos`."""
+    char = body[pos]
+    if char == _QUOTE:
+        return _skip_string(body, pos)
+    elif char != _OPEN_OBJECT and char != _OPEN_ARRAY:
+        match = _SCALAR_END.search(body, pos)
+        return len(body) if match is None else match.start()
+
+    # count brackets, skipping over everything else, brackets inside strings don't count
+    depth = 0
+    match_plain = _PLAIN.match
+    while True:
+        pos = match_plain(body, pos, pos + _PLAIN_CHUNK).end()  # pyright: ignore[reportOptionalMemberAccess]
+        char = body[pos]
+        if char == _QUOTE:
+            pos = _skip_string(body, pos)
+        elif char == _OPEN_OBJECT or char == _OPEN_ARRAY:
+            depth += 1
+            pos += 1
+        elif char == _CLOSE_OBJECT or char == _CLOSE_ARRAY:
+            depth -= 1
+            pos += 1
+            if depth == 0:
+                return pos
+
+
+def _skip_string(body: bytes | bytearray, pos: int) -> int:
+    """Return the position after the string whose opening quote is at `pos`."""
+    end = body.find(b'"', pos + 1)
+    if end > 0 and body[end - 1] != _BACKSLASH:
+        return end + 1
+
+    start = pos + 1
+    match = _UNESCAPED_QUOTE.search(body, start)
+    end = len(body) if match is None else match.start()
+    # a quote after an even number of backslashes, e.g. `\\"`, also ends the string, these are rare
+    while (escaped := body.find(b'\\\\"', start, end)) >= 0:
+        quote = escaped + 2
+        backslash = escaped
+        while body[backslash - 1] == _BACKSLASH:
+            backslash -= 1
+        if (quote - backslash) % 2 == 0:
+            return quote + 1
+        start = quote + 1
+    if match is None:
+        raise _invalid_json('unterminated string', pos)
+    return end + 1
+
+
+def _skip_whitespace(body: bytes | bytearray, pos: int) -> int:
+    return _WHITESPACE.match(body, pos).end()  # pyright: ignore[reportOptionalMemberAccess]
+
+
+def _invalid_json(message: str, pos: int) -> ValueError:
+    return ValueError(f'Invalid JSON: {message} at byte {pos}')
@@ -0,0 +1,719 @@
+from __future__ import annotations
+
+import importlib
+import re
+import sys
+import warnings
+from collections import deque
+from collections.abc import Callable, Sequence
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from genai_prices.types import MatchLogic, ModelInfo, Provider
+
+__all__ = (
+    'MatchPredicate',
+    'CompiledMatch',
+    'compile_match_logic',
+    'check_linear_time_regex',
+    'check_linear_time_match_logic',
+    'ClauseIndex',
+    'ModelMatchIndex',
+    'FallbackModelIndex',
+)
+
+MatchPredicate = Callable[[str], bool]
+"""Predicate over text which has already been lowercased."""
+
+_NO_MATCH = sys.maxsize
+
+
+class CompiledMatch:
+    """A `MatchLogic` clause together with its compiled predicate, see `compile_match_logic` for `lowercase`."""
+
+    __slots__ = 'clause', 'lowercase', 'is_match'
+
+    def __init__(self, clause: MatchLogic, lowercase: bool = True) -> None:
+        self.clause = clause
+        self.lowercase = lowercase
+        self.is_match: MatchPredicate = compile_match_logic(clause, lowercase=lowercase)
+
+    def __reduce__(self) -> tuple[type[CompiledMatch], tuple[MatchLogic, bool]]:
+        return type(self), (self.clause, self.lowercase)
+
+    @classmethod
+    def for_clause(cls, compiled: CompiledMatch | None, clause: MatchLogic, lowercase: bool = True) -> CompiledMatch:
+        """Reuse `compiled` if it was compiled from `clause`, otherwise compile `clause`."""
+        if compiled is not None and compiled.clause is clause and compiled.lowercase == lowercase:
+            return compiled
+        return cls(clause, lowercase)
+
+
+def compile_match_logic(clause: MatchLogic, *, lowercase: bool = True) -> MatchPredicate:
+    """Compile a `MatchLogic` tree into one predicate equivalent to `clause.is_match` for lowercase text.
+
+    Patterns are lowercased once here rather than on every call, nested `or` clauses are flattened, `equals`
+    clauses become a set membership test, `starts_with` and `ends_with` clauses a single `str.startswith` or
+    `str.endswith` call, and `contains` and `regex` clauses are combined into a single compiled regex where possible.
+
+    With `lowercase=False` the predicate is equivalent to `clause.is_match` for any text: literal clauses lowercase
+    the text themselves, while `regex` clauses see it as given, so case-sensitive regexes keep their meaning.
+    """
+    from genai_prices.types import ClauseAnd
+
+    if isinstance(clause, ClauseAnd):
+        return _all_of([compile_match_logic(sub_clause, lowercase=lowercase) for sub_clause in clause.and_])
+    return _any_of(_flatten_or(clause), lowercase)
+
+
+def _flatten_or(clause: MatchLogic) -> list[MatchLogic]:
+    from genai_prices.types import ClauseOr
+
+    if isinstance(clause, ClauseOr):
+        return [leaf for sub_clause in clause.or_ for leaf in _flatten_or(sub_clause)]
+    return [clause]
+
+
+def _any_of(clauses: list[MatchLogic], lowercase: bool) -> MatchPredicate:
+    from genai_prices.types import ClauseContains, ClauseEndsWith, ClauseEquals, ClauseRegex, ClauseStartsWith
+
+    equals: set[str] = set()
+    prefixes: list[str] = []
+    suffixes: list[str] = []
+    substrings: list[str] = []
+    regexes: list[str] = []
+    predicates: list[MatchPredicate] = []
+    for clause in clauses:
+        if isinstance(clause, ClauseEquals):
+            equals.add(clause.equals.lower())
+        elif isinstance(clause, ClauseStartsWith):
+            prefixes.append(clause.starts_with.lower())
+        elif isinstance(clause, ClauseEndsWith):
+            suffixes.append(clause.ends_with.lower())
+        elif isinstance(clause, ClauseContains):
+            substrings.append(clause.contains.lower())
+        elif isinstance(clause, ClauseRegex):
+            regexes.append(clause.regex)
+        else:
+            predicates.append(compile_match_logic(clause, lowercase=lowercase))
+
+    literals: list[MatchPredicate] = []
+    if equals:
+        literals.append(frozenset(equals).__contains__)
+    if prefixes:
+        literals.append(_starts_with(tuple(prefixes)))
+    if suffixes:
+        literals.append(_ends_with(tuple(suffixes)))
+    if substrings and not lowercase:
+        escaped = [re.escape(substring) for substring in substrings]
+        literals.extend(_search(pattern) for pattern in _combine_regexes(escaped))
+    elif len(substrings) == 1 and not regexes:
+        literals.append(_contains(substrings[0]))
+    else:
+        # lowercase text is searched for substrings and regexes at once
+        regexes[:0] = [re.escape(substring) for substring in substrings]
+
+    if literals and not lowercase:
+        literals = [_lowercased(_first_of(literals))]
+    return _first_of([*literals, *predicates, *map(_search, _combine_regexes(regexes))])
+
+
+def _lowercased(predicate: MatchPredicate) -> MatchPredicate:
+    return lambda text: predicate(text.lower())
+
+
+def _starts_with(prefixes: tuple[str, ...]) -> MatchPredicate:
+    return lambda text: text.startswith(prefixes)
+
+
+def _ends_with(suffixes: tuple[str, ...]) -> MatchPredicate:
+    return lambda text: text.endswith(suffixes)
+
+
+def _contains(substring: str) -> MatchPredicate:
+    return lambda text: substring in text
+
+
+def _search(pattern: re.Pattern[str]) -> MatchPredicate:
+    search = pattern.search
+    return lambda text: search(text) is not None
+
+
+def _combine_regexes(regexes: list[str]) -> list[re.Pattern[str]]:
+    """Compile regexes into a single alternation, or individually if they can't safely be combined.
+
+    Regexes starting with `^` are always compiled individually: searching with them stops after the first position
+    once the text can't match there, while an alternation is tried at every position of the text.
+    """
+    patterns = [re.compile(regex) for regex in regexes if _starts_anchored(regex)]
+    regexes = [regex for regex in regexes if not _starts_anchored(regex)]
+    if len(regexes) > 1 and not any(_BACKREFERENCE_RE.search(regex) for regex in regexes):
+        try:
+            with warnings.catch_warnings():
+                # e.g. inline flags which are no longer at the start of the pattern
+                warnings.simplefilter('error')
+                return [*patterns, re.compile('|'.join(f'(?:{regex})' for regex in regexes))]
+        except (re.error, DeprecationWarning):
+            pass
+    return [*patterns, *(re.compile(regex) for regex in regexes)]
+
+
+def _starts_anchored(regex: str) -> bool:
+    try:
+        parsed = _sre_parse.parse(regex)
+    except re.error:
+        return False
+    return _is_start_anchored(parsed)
+
+
+_BACKREFERENCE_RE = re.compile(r'\\[1-9]|\(\?P=')
+
+
+def _first_of(predicates: list[MatchPredicate]) -> MatchPredicate:
+    if len(predicates) == 1:
+        return predicates[0]
+    elif len(predicates) == 2:
+        first, second = predicates
+        return lambda text: first(text) or second(text)
+
+    def any_predicate(text: str) -> bool:
+        for predicate in predicates:
+            if predicate(text):
+                return True
+        return False
+
+    return any_predicate
+
+
+def _all_of(predicates: list[MatchPredicate]) -> MatchPredicate:
+    if len(predicates) == 1:
+        return predicates[0]
+    elif len(predicates) == 2:
+        first, second = predicates
+        return lambda text: first(text) and second(text)
+
+    def all_predicates(text: str) -> bool:
+        for predicate in predicates:
+            if not predicate(text):
+                return False
+        return True
+
+    return all_predicates
+
+
+def check_linear_time_match_logic(clause: MatchLogic) -> None:
+    """Check every `regex` clause in `clause` with `check_linear_time_regex`."""
+    from genai_prices.types import ClauseAnd, ClauseOr, ClauseRegex
+
+    if isinstance(clause, ClauseOr):
+        for sub_clause in clause.or_:
+            check_linear_time_match_logic(sub_clause)
+    elif isinstance(clause, ClauseAnd):
+        for sub_clause in clause.and_:
+            check_linear_time_match_logic(sub_clause)
+    elif isinstance(clause, ClauseRegex):
+        check_linear_time_regex(clause.regex)
+
+
+def check_linear_time_regex(pattern: str) -> None:
+    """Raise `ValueError` unless searching text with `pattern` (`re.search`) takes time linear in the text's length.
+
+    Backreferences and conditional groups are rejected, as is unbounded repetition (`*`, `+`, `{n,}`) of anything
+    other than a single character, character class or `.`, and bounded repetition of a group containing any
+    repetition or alternatives which could start with the same character, since nested or ambiguous repetition like
+    `(a+)+` or `(a|aa){1,40}` can backtrack exponentially. Unbounded repetitions which could share characters of the
+    text, like `a*a*` or `\\w+.*\\d+`, are also rejected, since backtracking tries every way of splitting the text
+    between them, which takes polynomial time.
+
+    Passing patterns match at a given position in linear time, but `re.search` tries each position in turn, so
+    unless the pattern starts with `^`, unbounded repetition is only allowed at its end, where it can't fail.
+    """
+    try:
+        parsed = _sre_parse.parse(pattern)
+    except re.error as e:
+        raise ValueError(f'Invalid regex {pattern!r}: {e}') from e
+    overlap = _RepeatOverlap(parsed)
+    reason = (
+        _nonlinear_reason(parsed, overlap)
+        or overlap.reason()
+        or (None if _is_start_anchored(parsed) else _search_reason(parsed, True))
+    )
+    if reason:
+        raise ValueError(f'Regex {pattern!r} may not match in linear time: {reason}')
+
+
+# the regex parser used by `re`, the `sre_parse` module it replaced is deprecated
+_sre_parse: Any = importlib.import_module('re._parser' if sys.version_info >= (3, 11) else 'sre_parse')
+
+_SINGLE_CHARACTER_OPS = frozenset({'LITERAL', 'NOT_LITERAL', 'ANY', 'IN', 'CATEGORY'})
+_REPEAT_OPS = frozenset({'MAX_REPEAT', 'MIN_REPEAT', 'POSSESSIVE_REPEAT'})
+
+
+def _nonlinear_reason(items: Any, overlap: _RepeatOverlap) -> str | None:
+    for op, av in items:
+        name = op.name
+        if name in {'GROUPREF', 'GROUPREF_EXISTS'}:
+            return 'backreferences and conditional groups are not supported'
+        elif name in _REPEAT_OPS:
+            _, max_repeat, sub_pattern = av
+            if len(sub_pattern) == 1 and sub_pattern[0][0].name in _SINGLE_CHARACTER_OPS:
+                continue
+            elif max_repeat == _sre_parse.MAXREPEAT:
+                return 'unbounded repetition of a group'
+            elif max_repeat > 1 and (_has_repeat(sub_pattern) or overlap.has_ambiguous_branch(sub_pattern)):
+                return 'repetition of a group containing repetition or alternatives starting with the same character'
+            reason = _nonlinear_reason(sub_pattern, overlap)
+        elif name == 'SUBPATTERN':
+            reason = _nonlinear_reason(av[-1], overlap)
+        elif name == 'BRANCH':
+            reason = next((reason for branch in av[1] if (reason := _nonlinear_reason(branch, overlap))), None)
+        elif name in {'ASSERT', 'ASSERT_NOT'}:
+            reason = _nonlinear_reason(av[1], overlap)
+        elif name == 'ATOMIC_GROUP':
+            reason = _nonlinear_reason(av, overlap)
+        else:
+            reason = None
+        if reason:
+            return reason
+    return None
+
+
+def _search_reason(items: Any, at_end: bool) -> str | None:
+    """Find unbounded repetition which could fail after matching, `at_end` is whether `items` end the pattern."""
+    for index, (op, av) in enumerate(items):
+        name = op.name
+        last = at_end and index == len(items) - 1
+        if name in _REPEAT_OPS:
+            if av[1] == _sre_parse.MAXREPEAT and not last:
+                return "unbounded repetition before the end of a pattern which doesn't start with `^`"
+            reason = _search_reason(av[2], last)
+        elif name == 'SUBPATTERN':
+            reason = _search_reason(av[-1], last)
+        elif name == 'ATOMIC_GROUP':
+            reason = _search_reason(av, last)
+        elif name == 'BRANCH':
+            reason = next((reason for branch in av[1] if (reason := _search_reason(branch, last))), None)
+        elif name in {'ASSERT', 'ASSERT_NOT'}:
+            # a lookahead doesn't end the match, the search continues at the next position if what follows fails
+            reason = _search_reason(av[1], False)
+        else:
+            reason = None
+        if reason:
+            return reason
+    return None
+
+
+def _is_start_anchored(parsed: Any) -> bool:
+    """Whether a parsed pattern starts with `^` or `\\A`, so `re.search` only tries matching at the start."""
+    if not parsed.data:
+        return False
+    op, av = parsed.data[0]
+    if op.name != 'AT':
+        return False
+    return av.name == 'AT_BEGINNING_STRING' or (av.name == 'AT_BEGINNING' and not parsed.state.flags & re.MULTILINE)
+
+
+def _has_repeat(items: Any) -> bool:
+    for op, av in items:
+        name = op.name
+        if name in _REPEAT_OPS:
+            return True
+        elif name == 'SUBPATTERN':
+            found = _has_repeat(av[-1])
+        elif name == 'ATOMIC_GROUP':
+            found = _has_repeat(av)
+        elif name == 'BRANCH':
+            found = any(_has_repeat(branch) for branch in av[1])
+        elif name in {'ASSERT', 'ASSERT_NOT'}:
+            found = _has_repeat(av[1])
+        else:
+            found = False
+        if found:
+            return True
+    return False
+
+
+class _RepeatOverlap:
+    """Finds unbounded repetitions of single characters which could match the same characters of a text.
+
+    The pattern is followed in order, keeping the characters of each unbounded repetition which could still be
+    extended by what follows it, a repetition stops being extended once something must match a character it can't.
+    Character sets are compared on a sample of characters: Latin characters and every character in the pattern.
+    """
+
+    def __init__(self, parsed: Any) -> None:
+        codes = set(range(0x250))
+        _pattern_codes(parsed, codes)
+        self.sample = [chr(code) for code in sorted(codes)]
+        self.ignore_case = bool(parsed.state.flags & re.IGNORECASE)
+        self.parsed = parsed
+
+    def reason(self) -> str | None:
+        try:
+            self._sequence(self.parsed, [], self.ignore_case)
+        except _OverlappingRepeats:
+            return 'unbounded repetitions which could match the same characters'
+        return None
+
+    def _sequence(self, items: Any, open_repeats: list[frozenset[str]], ignore_case: bool) -> list[frozenset[str]]:
+        """Follow `items`, returning the characters of the repetitions which can still be extended after them."""
+        for op, av in items:
+            name = op.name
+            if name in _SINGLE_CHARACTER_OPS:
+                chars = self._chars(op, av, ignore_case)
+                open_repeats = [repeat for repeat in open_repeats if repeat & chars]
+            elif name in _REPEAT_OPS:
+                min_repeat, max_repeat, sub_pattern = av
+                if len(sub_pattern) == 1 and sub_pattern[0][0].name in _SINGLE_CHARACTER_OPS:
+                    (sub_op, sub_av), *_ = sub_pattern
+                    chars = self._chars(sub_op, sub_av, ignore_case)
+                    if max_repeat == _sre_parse.MAXREPEAT and name != 'POSSESSIVE_REPEAT':
+                        if any(repeat & chars for repeat in open_repeats):
+                            raise _OverlappingRepeats
+                        open_repeats = [*open_repeats, chars] if min_repeat == 0 else [chars]
+                    elif min_repeat > 0:
+                        open_repeats = [repeat for repeat in open_repeats if repeat & chars]
+                else:
+                    # unbounded repetition of groups is rejected by `_nonlinear_reason`, a second iteration finds
+                    # repetitions overlapping those of the previous iteration
+                    after = open_repeats
+                    for _ in range(min(max_repeat, 2)):
+                        after = self._sequence(sub_pattern, after, ignore_case)
+                    open_repeats = after if min_repeat > 0 else _union(open_repeats, after)
+            elif name == 'SUBPATTERN':
+                _, add_flags, del_flags, sub_pattern = av
+                sub_ignore_case = (ignore_case or bool(add_flags & re.IGNORECASE)) and not del_flags & re.IGNORECASE
+                open_repeats = self._sequence(sub_pattern, open_repeats, sub_ignore_case)
+            elif name == 'ATOMIC_GROUP':
+                open_repeats = self._sequence(av, open_repeats, ignore_case)
+            elif name == 'BRANCH':
+                branches = [self._sequence(branch, open_repeats, ignore_case) for branch in av[1]]
+                open_repeats = _union(*branches)
+            elif name in {'ASSERT', 'ASSERT_NOT'}:
+                self._sequence(av[1], [], ignore_case)
+        return open_repeats
+
+    def has_ambiguous_branch(self, items: Any) -> bool:
+        """Whether `items` contain alternatives which could match the same first character, or match nothing."""
+        for op, av in items:
+            name = op.name
+            if name == 'BRANCH':
+                seen: frozenset[str] = frozenset()
+                for branch in av[1]:
+                    chars, can_be_empty = self._first_chars(branch, self.ignore_case)
+                    if can_be_empty or seen & chars:
+                        return True
+                    seen |= chars
+                found = any(self.has_ambiguous_branch(branch) for branch in av[1])
+            elif name == 'SUBPATTERN':
+                found = self.has_ambiguous_branch(av[-1])
+            elif name == 'ATOMIC_GROUP':
+                found = self.has_ambiguous_branch(av)
+            elif name in _REPEAT_OPS:
+                found = self.has_ambiguous_branch(av[2])
+            else:
+                found = False
+            if found:
+                return True
+        return False
+
+    def _first_chars(self, items: Any, ignore_case: bool) -> tuple[frozenset[str], bool]:
+        """Return the characters text matching `items` could start with, and whether it could be empty."""
+        first: frozenset[str] = frozenset()
+        for op, av in items:
+            name = op.name
+            if name in _SINGLE_CHARACTER_OPS:
+                return first | self._chars(op, av, ignore_case), False
+            elif name in _REPEAT_OPS:
+                chars, can_be_empty = self._first_chars(av[2], ignore_case)
+                first |= chars
+                if av[0] > 0 and not can_be_empty:
+                    return first, False
+            elif name in {'SUBPATTERN', 'ATOMIC_GROUP', 'BRANCH'}:
+                if name == 'SUBPATTERN':
+                    _, add_flags, del_flags, sub_pattern = av
+                    sub_ignore_case = (ignore_case or bool(add_flags & re.IGNORECASE)) and not del_flags & re.IGNORECASE
+                    alternatives = [self._first_chars(sub_pattern, sub_ignore_case)]
+                elif name == 'ATOMIC_GROUP':
+                    alternatives = [self._first_chars(av, ignore_case)]
+                else:
+                    alternatives = [self._first_chars(branch, ignore_case) for branch in av[1]]
+                first = first.union(*(chars for chars, _ in alternatives))
+                if not any(can_be_empty for _, can_be_empty in alternatives):
+                    return first, False
+        # anything else, e.g. `^` or a lookahead, doesn't consume a character
+        return first, True
+
+    def _chars(self, op: Any, av: Any, ignore_case: bool) -> frozenset[str]:
+        if ignore_case:
+            return frozenset(
+                char
+                for char in self.sample
+                if any(_char_matches(op, av, case) for case in (char, char.lower(), char.upper()) if len(case) == 1)
+            )
+        return frozenset(char for char in self.sample if _char_matches(op, av, char))
+
+
+class _OverlappingRepeats(Exception):
+    pass
+
+
+_CATEGORIES = {
+    'CATEGORY_DIGIT': re.compile(r'\d'),
+    'CATEGORY_NOT_DIGIT': re.compile(r'\D'),
+    'CATEGORY_SPACE': re.compile(r'\s'),
+    'CATEGORY_NOT_SPACE': re.compile(r'\S'),
+    'CATEGORY_WORD': re.compile(r'\w'),
+    'CATEGORY_NOT_WORD': re.compile(r'\W'),
+}
+
+
+def _char_matches(op: Any, av: Any, char: str) -> bool:
+    name = op.name
+    if name == 'LITERAL':
+        return ord(char) == av
+    elif name == 'NOT_LITERAL':
+        return ord(char) != av
+    elif name == 'ANY':
+        return char != '\n'
+    elif name == 'RANGE':
+        return av[0] <= ord(char) <= av[1]
+    elif name == 'CATEGORY':
+        # unknown categories are assumed to match anything
+        category = _CATEGORIES.get(av.name)
+        return category is None or category.match(char) is not None
+    elif name == 'IN':
+        if av and av[0][0].name == 'NEGATE':
+            return not any(_char_matches(item_op, item_av, char) for item_op, item_av in av[1:])
+        return any(_char_matches(item_op, item_av, char) for item_op, item_av in av)
+    return True
+
+
+def _pattern_codes(items: Any, codes: set[int]) -> None:
+    """Add the code point of every character in a parsed pattern, including the ends of ranges, to `codes`."""
+    for op, av in items:
+        name = op.name
+        if name in {'LITERAL', 'NOT_LITERAL'}:
+            codes.add(av)
+        elif name == 'RANGE':
+            codes.update(av)
+        elif name == 'IN':
+            _pattern_codes(av, codes)
+        elif name in _REPEAT_OPS:
+            _pattern_codes(av[2], codes)
+        elif name == 'SUBPATTERN':
+            _pattern_codes(av[-1], codes)
+        elif name == 'ATOMIC_GROUP':
+            _pattern_codes(av, codes)
+        elif name == 'BRANCH':
+            for branch in av[1]:
+                _pattern_codes(branch, codes)
+        elif name in {'ASSERT', 'ASSERT_NOT'}:
+            _pattern_codes(av[1], codes)
+
+
+def _union(*repeat_lists: list[frozenset[str]]) -> list[frozenset[str]]:
+    return list(dict.fromkeys(repeat for repeats in repeat_lists for repeat in repeats))
+
+
+class _Node:
+    __slots__ = 'children', 'position', 'fail'
+
+    def __init__(self) -> None:
+        self.children: dict[str, _Node] = {}
+        self.position = _NO_MATCH
+        self.fail: _Node | None = None
+
+
+class _Trie:
+    """Character trie recording, at each node, the lowest model position whose pattern ends there."""
+
+    def __init__(self) -> None:
+        self.root = _Node()
+
+    def add(self, pattern: str, position: int) -> None:
+        node = self.root
+        for char in pattern:
+            node = node.children.setdefault(char, _Node())
+        node.position = min(node.position, position)
+
+    def first_prefix_match(self, text: str) -> int:
+        """Return the lowest position of any pattern that is a prefix of `text`."""
+        node = self.root
+        best = node.position
+        for char in text:
+            next_node = node.children.get(char)
+            if next_node is None:
+                break
+            node = next_node
+            if node.position < best:
+                best = node.position
+        return best
+
+
+class _ContainsAutomaton(_Trie):
+    """Aho-Corasick automaton over `ClauseContains` patterns."""
+
+    def build(self) -> None:
+        root = self.root
+        queue: deque[_Node] = deque()
+        for child in root.children.values():
+            child.fail = root
+            child.position = min(child.position, root.position)
+            queue.append(child)
+
+        while queue:
+            node = queue.popleft()
+            for char, child in node.children.items():
+                fail = node.fail
+                while fail is not None and char not in fail.children:
+                    fail = fail.fail
+                child.fail = fail.children[char] if fail is not None else root
+                # fold the output of the fail chain into each node so a search only needs to look at visited nodes
+                child.position = min(child.position, child.fail.position)
+                queue.append(child)
+
+    def first_substring_match(self, text: str) -> int:
+        """Return the lowest position of any pattern that occurs anywhere in `text`."""
+        root = self.root
+        node = root
+        best = root.position
+        for char in text:
+            while char not in node.children and node.fail is not None:
+                node = node.fail
+            node = node.children.get(char, root)
+            if node.position < best:
+                best = node.position
+        return best
+
+
+class ClauseIndex:
+    """Index over a sequence of `MatchLogic` clauses which finds the first clause matching some text.
+
+    Literal `equals`, `starts_with`, `ends_with` and `contains` clauses (including those nested in `or` clauses)
+    are indexed by a dict, a prefix trie, a suffix trie and an Aho-Corasick automaton respectively. Any other
+    clauses are compiled and kept in order, and only evaluated when they could beat the best indexed match.
+    """
+
+    def __init__(self, clauses: Sequence[MatchLogic | None]) -> None:
+        self._equals: dict[str, int] = {}
+        self._prefixes = _Trie()
+        self._suffixes = _Trie()
+        self._contains = _ContainsAutomaton()
+        self._residual: list[tuple[int, MatchPredicate]] = []
+
+        for position, clause in enumerate(clauses):
+            if clause is not None:
+                self._add_clause(clause, position)
+        self._contains.build()
+
+    @property
+    def has_residual(self) -> bool:
+        """Whether any clauses couldn't be indexed and may need to be evaluated."""
+        return bool(self._residual)
+
+    def first_match(self, text: str) -> int | None:
+        """Return the position of the first clause matching `text`, which must already be lowercase."""
+        position = self._first_position(text)
+        return None if position == _NO_MATCH else position
+
+    def _first_position(self, text: str) -> int:
+        best = min(
+            self._equals.get(text, _NO_MATCH),
+            self._prefixes.first_prefix_match(text),
+            self._suffixes.first_prefix_match(text[::-1]),
+            self._contains.first_substring_match(text),
+        )
+        for position, is_match in self._residual:
+            if position >= best:
+                break
+            if is_match(text):
+                return position
+        return best
+
+    def _add_clause(self, clause: MatchLogic, position: int) -> None:
+        from genai_prices.types import ClauseContains, ClauseEndsWith, ClauseEquals, ClauseOr, ClauseStartsWith
+
+        if isinstance(clause, ClauseOr):
+            for sub_clause in clause.or_:
+                self._add_clause(sub_clause, position)
+        elif isinstance(clause, ClauseEquals):
+            pattern = clause.equals.lower()
+            self._equals.setdefault(pattern, position)
+        elif isinstance(clause, ClauseStartsWith):
+            self._prefixes.add(clause.starts_with.lower(), position)
+        elif isinstance(clause, ClauseEndsWith):
+            self._suffixes.add(clause.ends_with.lower()[::-1], position)
+        elif isinstance(clause, ClauseContains):
+            self._contains.add(clause.contains.lower(), position)
+        else:
+            self._residual.append((position, compile_match_logic(clause)))
+
+
+class ModelMatchIndex(ClauseIndex):
+    """Index over a provider's models which returns the same model as scanning `models` in order.
+
+    Any `fallback_models` are indexed after `models`, in order, so the index returns the same model as scanning
+    `models` and then each of `fallback_models` in turn.
+    """
+
+    def __init__(self, models: Sequence[ModelInfo], *fallback_models: Sequence[ModelInfo]) -> None:
+        self.sources = (models, *fallback_models)
+        self.source_lengths = tuple(len(source) for source in self.sources)
+        self._models = tuple(model for source in self.sources for model in source)
+        super().__init__([model.match for model in self._models])
+
+    def __reduce__(self) -> tuple[type[ModelMatchIndex], tuple[Sequence[ModelInfo], ...]]:
+        # rebuild from the models rather than copying or pickling the (deeply nested) tries node by node
+        return type(self), self.sources
+
+    def is_current(self, models: Sequence[ModelInfo], *fallback_models: Sequence[ModelInfo]) -> bool:
+        """Whether the index was built from these model lists and they haven't obviously changed since."""
+        sources = self.sources
+        if len(sources) != len(fallback_models) + 1:
+            return False
+        for source, length, other in zip(sources, self.source_lengths, (models, *fallback_models)):
+            if source is not other or length != len(source):
+                return False
+        return True
+
+    def find(self, model_ref: str) -> ModelInfo | None:
+        """Find the first model matching `model_ref`, which must already be lowercase."""
+        position = self._first_position(model_ref)
+        return None if position == _NO_MATCH else self._models[position]
+
+
+class FallbackModelIndex:
+    """A provider's fallback providers resolved from `all_providers`, with a `ModelMatchIndex` over the provider's
+    models followed by the models of each fallback provider, in the order they're listed.
+
+    Only the fallback providers' own models are included, so there's only ever one step of fallback.
+    """
+
+    __slots__ = 'all_providers', 'all_providers_length', 'provider_ids', 'providers', 'index'
+
+    def __init__(
+        self, models: Sequence[ModelInfo], provider_ids: Sequence[str], all_providers: Sequence[Provider]
+    ) -> None:
+        self.all_providers = all_providers
+        self.all_providers_length = len(all_providers)
+        self.provider_ids = tuple(provider_ids)
+        providers_by_id: dict[str, Provider] = {}
+        for provider in all_providers:
+            providers_by_id.setdefault(provider.id, provider)
+        self.providers = tuple(
+            providers_by_id[provider_id] for provider_id in self.provider_ids if provider_id in providers_by_id
+        )
+        self.index = ModelMatchIndex(models, *(provider.models for provider in self.providers))
+
+    def is_current(
+        self, models: Sequence[ModelInfo], provider_ids: Sequence[str], all_providers: Sequence[Provider]
+    ) -> bool:
+        """Whether the index was built from these arguments and they haven't obviously changed since."""
+        return (
+            self.all_providers is all_providers
+            and self.all_providers_length == len(all_providers)
+            and len(self.provider_ids) == len(provider_ids)
+            and all(a == b for a, b in zip(self.provider_ids, provider_ids))
+            and self.index.is_current(models, *(provider.models for provider in self.providers))
+        )
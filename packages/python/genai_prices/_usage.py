@@ -9,6 +9,11 @@ UsageValue = int | float | Decimal
 
 
 def validate_usage_value(usage_key: str, value: object) -> UsageValue:
+    if type(value) is int:
+        if value < 0:
+            raise _invalid_usage_value(usage_key)
+        return value
+
     if isinstance(value, bool):
         raise _invalid_usage_value(usage_key)
 
@@ -0,0 +1,200 @@
+from __future__ import annotations as _annotations
+
+import time
+from collections.abc import Collection, Sequence
+from dataclasses import dataclass
+
+try:
+    import numpy as np
+    import numpy.typing as npt
+except ModuleNotFoundError as exc:  # pragma: no cover
+    if exc.name == 'numpy':
+        raise ImportError(
+            'Pricing the catalog requires numpy, install it with: pip install "genai-prices[numpy]"'
+        ) from exc
+    raise
+
+from . import data_snapshot, types
+from .decompose import LeafDecompositionPlan
+from .units import UnitRegistry, _get_registry  # pyright: ignore[reportPrivateUsage]
+
+__all__ = 'CatalogPrice', 'PriceMatrix', 'price_catalog'
+
+
+@dataclass(frozen=True)
+class CatalogPrice:
+    """The price of usage with one model, see `price_catalog`."""
+
+    provider: types.Provider
+    model: types.ModelInfo
+    input_price: float
+    """Price of input usage in USD."""
+    output_price: float
+    """Price of output usage in USD."""
+    total_price: float
+    """Total price in USD."""
+
+
+def price_catalog(
+    usage: types.AbstractUsage,
+    *,
+    provider_ids: Collection[str] | None = None,
+    limit: int | None = None,
+    snapshot: data_snapshot.DataSnapshot | None = None,
+) -> list[CatalogPrice]:
+    """Calculate the price of usage with every model, e.g. to find the cheapest model to route a request to.
+
+    Requires the `numpy` extra: `pip install "genai-prices[numpy]"`.
+
+    Prices are calculated at once for all models from the snapshot's `PriceMatrix`, with the arithmetic and error
+    bounds of the `'float'` numeric backend.
+
+    Args:
+        usage: The usage to price.
+        provider_ids: If given, only price the models of the providers with these IDs.
+        limit: Maximum number of prices to return.
+        snapshot: The data snapshot to price models of, defaults to the current snapshot.
+
+    Returns:
+        Prices of every model the usage can be priced with, cheapest first.
+    """
+    if snapshot is None:
+        snapshot = data_snapshot.get_snapshot()
+    return snapshot.price_matrix().rank(usage, provider_ids=provider_ids, limit=limit)
+
+
+class PriceMatrix:
+    """The current prices of every model of a set of providers, as arrays of models × units.
+
+    Columns are the units of the unit registry in their registered order. Each price is stored per unit, tiered
+    prices are held as threshold and price columns alongside the base price. Models are grouped by how their priced
+    usage is decomposed into leaf values, so pricing usage only decomposes it once per group.
+    """
+
+    def __init__(self, providers: Sequence[types.Provider], registry: UnitRegistry | None = None) -> None:
+        self.providers = providers
+        self.registry = registry = registry or _get_registry()
+        self._sources = [(provider.models, len(provider.models)) for provider in providers]
+        # conditional prices are resolved now, they're valid until the first of them could change
+        self.valid_until = float('inf')
+
+        self.usage_keys = list(registry.units)
+        self._columns = column = {usage_key: index for index, usage_key in enumerate(self.usage_keys)}
+
+        self.models: list[tuple[types.Provider, types.ModelInfo]] = []
+        plans: list[types.PricePlan] = []
+        for provider in providers:
+            for model in provider.models:
+                if isinstance(model.prices, types.ModelPrice):
+                    model_price = model.prices
+                else:
+                    model_price, valid_until = model.price_timeline().current_until()
+                    self.valid_until = min(self.valid_until, valid_until)
+                plan = model_price.price_plan(registry)
+                if plan.error is None:
+                    self.models.append((provider, model))
+                    plans.append(plan)
+
+        shape = len(plans), len(self.usage_keys)
+        tier_count = max((len(tiers) for plan in plans for _, _, tiers, _, _ in plan.float_prices()), default=0)
+        self.prices = np.zeros(shape)
+        """Base price of each model per unit, in USD."""
+        self.tier_starts = np.full((*shape, tier_count), np.inf)
+        """Input token thresholds above which `tier_prices` apply, lowest first."""
+        self.tier_prices = np.zeros((*shape, tier_count))
+        self.input_columns = np.zeros(shape, dtype=bool)
+        self.output_columns = np.zeros(shape, dtype=bool)
+        self.provider_ids = np.array([provider.id for provider, _ in self.models], dtype=object)
+
+        self.leaf_plans: list[LeafDecompositionPlan | None] = []
+        leaf_plan_indexes: dict[int, int] = {}
+        self.leaf_plan_rows = np.zeros(len(plans), dtype=np.intp)
+        self.has_tiers = np.zeros(len(plans), dtype=bool)
+        for row, plan in enumerate(plans):
+            leaf_plan_index = leaf_plan_indexes.get(id(plan.leaf_plan))
+            if leaf_plan_index is None:
+                leaf_plan_index = leaf_plan_indexes[id(plan.leaf_plan)] = len(self.leaf_plans)
+                self.leaf_plans.append(plan.leaf_plan)
+            self.leaf_plan_rows[row] = leaf_plan_index
+            self.has_tiers[row] = plan.has_tiers
+
+            for usage_key, base, tiers, per, direction in plan.float_prices():
+                col = column[usage_key]
+                self.prices[row, col] = base / per
+                for tier_index, (start, tier_price) in enumerate(reversed(tiers)):
+                    self.tier_starts[row, col, tier_index] = start
+                    self.tier_prices[row, col, tier_index] = tier_price / per
+                self.input_columns[row, col] = direction == 'input'
+                self.output_columns[row, col] = direction == 'output'
+
+    def is_current(self, providers: Sequence[types.Provider]) -> bool:
+        """Whether the matrix was built from `providers`, they haven't obviously changed and its prices still apply."""
+        if self.providers is not providers or len(self._sources) != len(providers):
+            return False
+        if self.registry is not _get_registry() or time.time() >= self.valid_until:
+            return False
+        for (models, length), provider in zip(self._sources, providers):
+            if models is not provider.models or length != len(models):
+                return False
+        return True
+
+    def rank(
+        self,
+        usage: types.AbstractUsage,
+        *,
+        provider_ids: Collection[str] | None = None,
+        limit: int | None = None,
+    ) -> list[CatalogPrice]:
+        """Calculate the price of `usage` with every model, cheapest first, see `price_catalog`."""
+        usage = types.Usage.from_raw(usage)
+        counts, valid_leaf_plans = self._leaf_counts(usage)
+        valid = valid_leaf_plans[self.leaf_plan_rows]
+        if provider_ids is not None:
+            valid &= np.isin(self.provider_ids, list(provider_ids))
+
+        try:
+            input_tokens = float(usage.input_tokens)
+        except ValueError:
+            # tiers can't be selected when input tokens can't be inferred
+            valid &= ~self.has_tiers
+            input_tokens = 0.0
+
+        unit_prices = self.prices
+        for tier_index in range(self.tier_starts.shape[2]):
+            unit_prices = np.where(
+                input_tokens > self.tier_starts[:, :, tier_index], self.tier_prices[:, :, tier_index], unit_prices
+            )
+        costs = unit_prices * counts[self.leaf_plan_rows]
+        input_prices = (costs * self.input_columns).sum(axis=1)
+        output_prices = (costs * self.output_columns).sum(axis=1)
+        total_prices = costs.sum(axis=1)
+
+        rows = np.flatnonzero(valid)
+        ranked: list[int] = rows[np.argsort(total_prices[rows], kind='stable')][:limit].tolist()
+        return [
+            CatalogPrice(
+                *self.models[row],
+                input_price=float(input_prices[row]),
+                output_price=float(output_prices[row]),
+                total_price=float(total_prices[row]),
+            )
+            for row in ranked
+        ]
+
+    def _leaf_counts(self, usage: types.Usage) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.bool_]]:
+        counts = np.zeros((len(self.leaf_plans), len(self.usage_keys)))
+        valid = np.ones(len(self.leaf_plans), dtype=bool)
+        column = self._columns
+        for index, leaf_plan in enumerate(self.leaf_plans):
+            if leaf_plan is None:
+                continue
+            try:
+                leaf_values = leaf_plan.compute(usage)
+            except ValueError:
+                valid[index] = False
+                continue
+            for usage_key, value in leaf_values.items():
+                counts[index, column[usage_key]] = float(value)
+        if (requests_column := column.get('requests')) is not None:
+            counts[:, requests_column] = 1
+        return counts, valid
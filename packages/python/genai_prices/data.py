@@ -48,6 +48,7 @@ providers: list[Provider] = [
                 ],
                 api_flavor='default',
                 model_path='model',
+                streaming=UsageExtractorStreaming(merge='replace', response_paths=['message']),
             ),
             UsageExtractor(
                 root='usage',
@@ -1541,6 +1542,7 @@ providers: list[Provider] = [
                 ],
                 api_flavor='chat',
                 model_path='model',
+                streaming=UsageExtractorStreaming(merge='replace', response_paths=None),
             ),
             UsageExtractor(
                 root='usage',
@@ -1558,6 +1560,7 @@ providers: list[Provider] = [
                 ],
                 api_flavor='responses',
                 model_path='model',
+                streaming=UsageExtractorStreaming(merge='replace', response_paths=['response']),
             ),
             UsageExtractor(
                 root='usage',
@@ -1579,6 +1582,7 @@ providers: list[Provider] = [
                 ],
                 api_flavor='anthropic',
                 model_path='model',
+                streaming=UsageExtractorStreaming(merge='replace', response_paths=['message']),
             ),
         ],
         fallback_model_providers=['openai', 'anthropic'],
@@ -2788,6 +2792,7 @@ providers: list[Provider] = [
                 ],
                 api_flavor='default',
                 model_path='modelVersion',
+                streaming=UsageExtractorStreaming(merge='replace', response_paths=None),
             ),
             UsageExtractor(
                 root='usage',
@@ -2803,6 +2808,7 @@ providers: list[Provider] = [
                 ],
                 api_flavor='anthropic',
                 model_path='model',
+                streaming=UsageExtractorStreaming(merge='replace', response_paths=['message']),
             ),
             UsageExtractor(
                 root='usage',
@@ -2826,6 +2832,7 @@ providers: list[Provider] = [
                 ],
                 api_flavor='chat',
                 model_path='model',
+                streaming=UsageExtractorStreaming(merge='replace', response_paths=None),
             ),
         ],
         fallback_model_providers=['anthropic'],
@@ -6948,6 +6955,7 @@ providers: list[Provider] = [
                 ],
                 api_flavor='chat',
                 model_path='model',
+                streaming=UsageExtractorStreaming(merge='replace', response_paths=None),
             ),
             UsageExtractor(
                 root='usage',
@@ -6968,6 +6976,7 @@ providers: list[Provider] = [
                 ],
                 api_flavor='responses',
                 model_path='model',
+                streaming=UsageExtractorStreaming(merge='replace', response_paths=['response']),
             ),
             UsageExtractor(
                 root=['response', 'usage'],
@@ -7010,6 +7019,7 @@ providers: list[Provider] = [
                 ],
                 api_flavor='realtime',
                 model_path='model',
+                streaming=UsageExtractorStreaming(merge='sum', response_paths=None),
             ),
             UsageExtractor(
                 root='usage',
@@ -1,14 +1,35 @@
 from __future__ import annotations as _annotations
 
 import re
+import threading
+from array import array
+from collections import OrderedDict
+from collections.abc import Iterable
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timedelta
 from functools import cache
-from typing import Any
+from typing import TYPE_CHECKING, Any, Generic, TypeVar
+from urllib.parse import urlsplit
 
 from . import types
+from ._match import ClauseIndex, check_linear_time_match_logic
 
-__all__ = 'DataSnapshot', 'set_custom_snapshot'
+if TYPE_CHECKING:
+    from .catalog import PriceMatrix
+
+__all__ = (
+    'DataSnapshot',
+    'set_custom_snapshot',
+    'LookupCacheInfo',
+    'ResolvedModels',
+    'DEFAULT_LOOKUP_CACHE_SIZE',
+    'DEFAULT_NEGATIVE_LOOKUP_CACHE_SIZE',
+)
+
+DEFAULT_LOOKUP_CACHE_SIZE = 4096
+"""Default maximum number of provider/model resolutions cached per `DataSnapshot`."""
+DEFAULT_NEGATIVE_LOOKUP_CACHE_SIZE = 4096
+"""Default maximum number of failed provider/model resolutions cached per `DataSnapshot`."""
 
 # snapshot set by UpdatePrices, or manually by the user
 _custom_snapshot: DataSnapshot | None = None
@@ -32,17 +53,122 @@ def _bundled_snapshot() -> DataSnapshot:
 
 def set_custom_snapshot(snapshot: DataSnapshot | None):
     global _custom_snapshot
+    if snapshot is not None:
+        # entries, in particular cached misses, may be stale if the snapshot's providers were modified
+        snapshot.clear_lookup_caches()
     _custom_snapshot = snapshot
 
 
+LookupKey = tuple[str | None, str | None, str]
+
+
 @dataclass
 class DataSnapshot:
     providers: list[types.Provider]
     from_auto_update: bool
-    _lookup_cache: dict[tuple[str | None, str | None, str], tuple[types.Provider, types.ModelInfo]] = field(
-        default_factory=lambda: {}
-    )
     timestamp: datetime = field(default_factory=datetime.now)
+    lookup_cache_size: int | None = DEFAULT_LOOKUP_CACHE_SIZE
+    """Maximum number of provider/model resolutions to cache, `None` means the cache is unbounded."""
+    negative_lookup_cache_size: int | None = DEFAULT_NEGATIVE_LOOKUP_CACHE_SIZE
+    """Maximum number of failed resolutions to cache, `None` means the cache is unbounded."""
+    max_model_ref_length: int | None = None
+    """Maximum length of model references, for matching untrusted input with bounded cost.
+
+    When set, longer model references are rejected with a `LookupError` before any matching (or caching) is done,
+    and every `regex` clause in `providers` must pass `check_linear_time_regex`, which is checked when the snapshot
+    is created.
+    """
+    compile_prices: bool = False
+    """Whether `calc` uses pricing functions generated for the shape of each model price, see `ModelPrice.calc_price_with`."""
+    numeric_backend: types.NumericBackend = 'decimal'
+    """The arithmetic `calc` uses by default, see `NumericBackend` for the error bounds of each.
+
+    With `'fixed'` or `'float'`, every model price is converted for it when the snapshot is created.
+    """
+    _lookup_cache: LookupCache[LookupKey, tuple[types.Provider, types.ModelInfo]] = field(
+        init=False, repr=False, compare=False
+    )
+    _negative_lookup_cache: LookupCache[LookupKey, str] = field(init=False, repr=False, compare=False)
+    _api_url_index: ApiUrlIndex = field(init=False, repr=False, compare=False)
+    _provider_id_index: ProviderIdIndex = field(init=False, repr=False, compare=False)
+    _price_matrix: PriceMatrix | None = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self._build_indexes()
+        self._lookup_cache = LookupCache(self.lookup_cache_size)
+        self._negative_lookup_cache = LookupCache(self.negative_lookup_cache_size)
+
+    def _build_indexes(self) -> None:
+        if self.max_model_ref_length is not None:
+            self._check_linear_time_regexes()
+        for provider in self.providers:
+            provider.build_model_index()
+            if provider.fallback_model_providers:
+                provider.build_fallback_model_index(self.providers)
+        self._api_url_index = ApiUrlIndex(self.providers)
+        self._provider_id_index = ProviderIdIndex(self.providers, self.lookup_cache_size)
+        if self.numeric_backend != 'decimal':
+            self._convert_prices()
+
+    def _convert_prices(self) -> None:
+        """Convert every model price for `numeric_backend` now, rather than on first use."""
+        from .units import _get_registry  # pyright: ignore[reportPrivateUsage]
+
+        registry = _get_registry()
+        for provider in self.providers:
+            for model in provider.models:
+                if isinstance(model.prices, types.ModelPrice):
+                    model_prices = [model.prices]
+                else:
+                    model_prices = [conditional_price.prices for conditional_price in model.prices]
+                for model_price in model_prices:
+                    plan = model_price.price_plan(registry)
+                    if self.numeric_backend == 'fixed':
+                        plan.fixed_prices()
+                    else:
+                        plan.float_prices()
+
+    def _check_linear_time_regexes(self) -> None:
+        for provider in self.providers:
+            clauses = [
+                ('model_match', provider.model_match),
+                ('provider_match', provider.provider_match),
+                *((f'model {model.id!r}', model.match) for model in provider.models),
+            ]
+            for name, clause in clauses:
+                if clause is not None:
+                    try:
+                        check_linear_time_match_logic(clause)
+                    except ValueError as e:
+                        raise ValueError(f'Provider {provider.id!r} {name}: {e}') from e
+
+    def lookup_cache_info(self) -> LookupCacheInfo:
+        """Return hit, miss and eviction counts, and the current size, of the provider/model lookup cache."""
+        return self._lookup_cache.info()
+
+    def negative_lookup_cache_info(self) -> LookupCacheInfo:
+        """Return hit, miss and eviction counts, and the current size, of the cache of failed lookups."""
+        return self._negative_lookup_cache.info()
+
+    def clear_lookup_caches(self) -> None:
+        """Clear cached lookups and rebuild the provider indexes, e.g. after modifying `providers`."""
+        self._build_indexes()
+        self._lookup_cache.clear()
+        self._negative_lookup_cache.clear()
+        self._price_matrix = None
+
+    def price_matrix(self) -> PriceMatrix:
+        """Return the `PriceMatrix` of the current prices of every model, see `genai_prices.catalog.price_catalog`.
+
+        The matrix is built on first use, and rebuilt once `providers` is replaced or modified, or a conditional price
+        it holds may have changed. Requires the `numpy` extra.
+        """
+        from .catalog import PriceMatrix
+
+        matrix = self._price_matrix
+        if matrix is None or not matrix.is_current(self.providers):
+            self._price_matrix = matrix = PriceMatrix(self.providers)
+        return matrix
 
     def active(self, ttl: timedelta) -> bool:
         """Check if the snapshot is "active" (e.g. hasn't expired) based on a time to live."""
@@ -55,17 +181,34 @@ class DataSnapshot:
         provider_id: str | None,
         provider_api_url: str | None,
         genai_request_timestamp: datetime | None,
+        numeric: types.NumericBackend | None = None,
     ) -> types.PriceCalculation:
-        """Calculate the price for the given usage."""
-        genai_request_timestamp = genai_request_timestamp or datetime.now(tz=timezone.utc)
-
+        """Calculate the price for the given usage, with `numeric_backend` unless `numeric` is given."""
         provider, model = self.find_provider_model(model_ref, None, provider_id, provider_api_url)
         return model.calc_price(
             usage,
             provider,
             genai_request_timestamp=genai_request_timestamp,
             auto_update_timestamp=self.timestamp if self.from_auto_update else None,
+            compiled=self.compile_prices,
+            numeric=numeric or self.numeric_backend,
+        )
+
+    def calc_total(
+        self,
+        usage: types.AbstractUsage,
+        model_ref: str,
+        provider_id: str | None,
+        provider_api_url: str | None,
+        genai_request_timestamp: datetime | None,
+        numeric: types.NumericBackend | None = None,
+    ) -> types.CalcPrice:
+        """Calculate the input, output and total price for the given usage, like `calc` without `PriceCalculation`."""
+        _, model = self.find_provider_model(model_ref, None, provider_id, provider_api_url)
+        _, price = model._calc_price(  # pyright: ignore[reportPrivateUsage]
+            usage, genai_request_timestamp, self.compile_prices, numeric or self.numeric_backend
         )
+        return price
 
     def extract_usage(
         self,
@@ -76,6 +219,31 @@ class DataSnapshot:
     ) -> types.ExtractedUsage:
         provider = self.find_provider(None, provider_id, provider_api_url)
         model_ref, usage = provider.extract_usage(response_data, api_flavor=api_flavor)
+        return self._extracted_usage(provider, model_ref, usage)
+
+    def extract_usage_from_bytes(
+        self,
+        body: bytes | bytearray,
+        provider_id: types.ProviderID | str | None = None,
+        provider_api_url: str | None = None,
+        api_flavor: str = 'default',
+    ) -> types.ExtractedUsage:
+        provider = self.find_provider(None, provider_id, provider_api_url)
+        model_ref, usage = provider.extract_usage_from_bytes(body, api_flavor=api_flavor)
+        return self._extracted_usage(provider, model_ref, usage)
+
+    def streaming_usage_extractor(
+        self,
+        provider_id: types.ProviderID | str | None = None,
+        provider_api_url: str | None = None,
+        api_flavor: str = 'default',
+    ) -> types.StreamingUsageExtractor:
+        provider = self.find_provider(None, provider_id, provider_api_url)
+        return types.StreamingUsageExtractor(provider, api_flavor, snapshot=self)
+
+    def _extracted_usage(
+        self, provider: types.Provider, model_ref: str | None, usage: types.Usage
+    ) -> types.ExtractedUsage:
         if model_ref is not None:
             _, model = self.find_provider_model(model_ref, provider, None, None)
         else:
@@ -90,30 +258,90 @@ class DataSnapshot:
         provider_api_url: str | None,
     ) -> tuple[types.Provider, types.ModelInfo]:
         """Find the provider and model for the given model reference and optional provider identifier."""
+        model_ref = model_ref.strip()
+        if self.max_model_ref_length is not None and len(model_ref) > self.max_model_ref_length:
+            raise LookupError(f'Model reference is longer than {self.max_model_ref_length} characters')
         model_ref = model_ref.lower()
 
         # Handle litellm provider_id by extracting actual provider from model name prefix
-        if provider_id and provider_id.lower() == 'litellm' and '/' in model_ref:
+        if provider_id and provider_id.strip().lower() == 'litellm' and '/' in model_ref:
             actual_provider_id, actual_model_ref = model_ref.split('/', 1)
             # Only use the extracted provider if it exists
-            if actual_provider_id and find_provider_by_id(self.providers, actual_provider_id):
+            if actual_provider_id and self._provider_id_index.find(actual_provider_id):
                 provider_id = actual_provider_id
                 model_ref = actual_model_ref
 
         if provider:
-            if provider_model := self._lookup_cache.get((provider.id, None, model_ref)):
-                return provider_model
+            cache_key = provider.id, None, model_ref
         else:
-            if provider_model := self._lookup_cache.get((provider_id, provider_api_url, model_ref)):
-                return provider_model
-
-            provider = self.find_provider(model_ref, provider_id, provider_api_url)
+            cache_key = (
+                None if provider_id is None else provider_id.strip().lower(),
+                None if provider_api_url is None else self._api_url_index.key(provider_api_url),
+                model_ref,
+            )
+        if provider_model := self._lookup_cache.get(cache_key):
+            return provider_model
+        if error := self._negative_lookup_cache.get(cache_key):
+            raise LookupError(error)
+
+        if provider is None:
+            try:
+                provider = self.find_provider(model_ref, provider_id, provider_api_url)
+            except LookupError as e:
+                self._negative_lookup_cache.set(cache_key, str(e))
+                raise
 
         if model := provider.find_model(model_ref, all_providers=self.providers):
-            self._lookup_cache[(provider_id, provider_api_url, model_ref)] = ret = provider, model
+            self._lookup_cache.set(cache_key, ret := (provider, model))
             return ret
         else:
-            raise LookupError(f'Unable to find model with {model_ref=!r} in {provider.id}')
+            error = f'Unable to find model with {model_ref=!r} in {provider.id}'
+            self._negative_lookup_cache.set(cache_key, error)
+            raise LookupError(error)
+
+    def resolve_many(self, pairs: Iterable[tuple[str | None, str]]) -> ResolvedModels:
+        """Resolve many `(provider_id, model_ref)` pairs, e.g. the rows of a usage log.
+
+        Each distinct pair is only resolved once, and pairs which resolve to the same provider and model share an
+        entry in `ResolvedModels.models`. Pairs which can't be resolved are reported in `ResolvedModels.errors`
+        rather than raising `LookupError`.
+
+        Args:
+            pairs: `(provider_id, model_ref)` pairs, `provider_id` may be `None` to find the provider from the
+                model reference.
+
+        Returns:
+            The resolved models, with one handle per pair.
+        """
+        handles = array('i')
+        models: list[tuple[types.Provider, types.ModelInfo]] = []
+        errors: list[str] = []
+        handle_by_pair: dict[tuple[str | None, str], int] = {}
+        handle_by_model: dict[tuple[int, int], int] = {}
+        handle_by_error: dict[str, int] = {}
+
+        for pair in pairs:
+            handle = handle_by_pair.get(pair)
+            if handle is None:
+                provider_id, model_ref = pair
+                try:
+                    provider, model = self.find_provider_model(model_ref, None, provider_id, None)
+                except LookupError as e:
+                    error = str(e)
+                    handle = handle_by_error.get(error)
+                    if handle is None:
+                        handle = handle_by_error[error] = -1 - len(errors)
+                        errors.append(error)
+                else:
+                    model_key = id(provider), id(model)
+                    handle = handle_by_model.get(model_key)
+                    if handle is None:
+                        handle = handle_by_model[model_key] = len(models)
+                        models.append((provider, model))
+                handle_by_pair[pair] = handle
+            handles.append(handle)
+
+        return ResolvedModels(handles, models, errors)
 
     def find_provider(
         self,
@@ -122,29 +350,55 @@ class DataSnapshot:
         provider_api_url: str | None,
     ) -> types.Provider:
         if provider_id is not None:
-            if provider := find_provider_by_id(self.providers, provider_id):
+            if provider := self._provider_id_index.find(provider_id):
                 return provider
             # Special case for litellm: fall back to model matching if provider not found
             if provider_id.lower() != 'litellm':
                 raise LookupError(f'Unable to find provider {provider_id=!r}')
 
         if provider_api_url is not None:
-            for provider in self.providers:
-                if re.match(provider.api_pattern, provider_api_url):
-                    return provider
+            if provider := self._api_url_index.find(provider_api_url):
+                return provider
             raise LookupError(f'Unable to find provider {provider_api_url=!r}')
 
         if model_ref:
             for provider in self.providers:
-                if provider.model_match is not None and provider.model_match.is_match(model_ref):
+                if provider.is_model_match(model_ref):
                     return provider
 
         raise LookupError(f'Unable to find provider with model matching {model_ref!r}')
 
 
+@dataclass
+class ResolvedModels:
+    """Result of `DataSnapshot.resolve_many`."""
+
+    handles: array[int]
+    """One handle per input pair: an index into `models`, or if negative, `-1 - handle` is an index into `errors`."""
+    models: list[tuple[types.Provider, types.ModelInfo]]
+    """Distinct providers and models found."""
+    errors: list[str]
+    """Distinct error messages for pairs which couldn't be resolved."""
+
+    def __len__(self) -> int:
+        return len(self.handles)
+
+    def __getitem__(self, row: int) -> tuple[types.Provider, types.ModelInfo] | None:
+        """Return the provider and model for input `row`, or `None` if it couldn't be resolved."""
+        handle = self.handles[row]
+        return self.models[handle] if handle >= 0 else None
+
+    def error(self, row: int) -> str | None:
+        """Return why input `row` couldn't be resolved, or `None` if it was resolved."""
+        handle = self.handles[row]
+        return self.errors[-1 - handle] if handle < 0 else None
+
+
 def find_provider_by_id(providers: list[types.Provider], provider_id: str) -> types.Provider | None:
     """Find a provider by matching against provider_match logic.
 
+    `DataSnapshot` resolves provider IDs through a `ProviderIdIndex` instead, which returns the same provider.
+
     Args:
         providers: List of available providers
         provider_id: The provider ID to match
@@ -159,7 +413,241 @@ def find_provider_by_id(providers: list[types.Provider], provider_id: str) -> ty
             return provider
 
     for provider in providers:
-        if provider.provider_match and provider.provider_match.is_match(normalized_provider_id):
+        if provider.is_provider_match(normalized_provider_id):
             return provider
 
     return None
+
+
+K = TypeVar('K')
+V = TypeVar('V')
+
+
+@dataclass(frozen=True)
+class LookupCacheInfo:
+    """Statistics for a `DataSnapshot`'s provider/model lookup cache."""
+
+    hits: int
+    """Number of lookups answered from the cache."""
+    misses: int
+    """Number of lookups not found in the cache."""
+    evictions: int
+    """Number of entries evicted to keep the cache within `max_size`."""
+    size: int
+    """Current number of entries in the cache."""
+    max_size: int | None
+    """Maximum number of entries, `None` if the cache is unbounded."""
+
+
+class LookupCache(Generic[K, V]):
+    """Thread-safe least-recently-used cache, bounded to `max_size` entries unless `max_size` is `None`."""
+
+    def __init__(self, max_size: int | None) -> None:
+        if max_size is not None and max_size < 0:
+            raise ValueError('max_size must be None or a non-negative integer')
+        self.max_size = max_size
+        self._data: OrderedDict[K, V] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: K) -> V | None:
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key: K, value: V) -> None:
+        if self.max_size == 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if self.max_size is not None:
+                while len(self._data) > self.max_size:
+                    self._data.popitem(last=False)
+                    self._evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def info(self) -> LookupCacheInfo:
+        with self._lock:
+            return LookupCacheInfo(self._hits, self._misses, self._evictions, len(self._data), self.max_size)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._data
+
+
+class ApiUrlIndex:
+    """Index for resolving a provider from an API URL using each provider's `api_pattern`.
+
+    URLs are normalized to `scheme://host[:port]` (lowercased, without credentials or a default port), followed by
+    the literal path prefix which routed the URL, if any. The full path is only kept when a regex pattern might
+    depend on it. Query strings and fragments are always dropped, so they don't multiply lookup cache entries.
+
+    Patterns which are a literal origin, optionally followed by a literal path prefix, are resolved through a dict
+    keyed by origin and only match that exact host. All other patterns are combined into a single alternation regex,
+    matched against the normalized URL. As before, the first provider whose pattern matches wins.
+    """
+
+    def __init__(self, providers: list[types.Provider]) -> None:
+        self._by_origin: dict[str, list[tuple[int, str, types.Provider]]] = {}
+        self._route_all_paths = False
+        self._regex_providers: dict[str, tuple[int, types.Provider]] = {}
+
+        alternatives: list[str] = []
+        for position, provider in enumerate(providers):
+            if literal := _literal_api_url(provider.api_pattern):
+                origin, path = literal
+                self._by_origin.setdefault(origin, []).append((position, path, provider))
+            else:
+                group = f'_api_pattern_{position}'
+                self._regex_providers[group] = position, provider
+                alternatives.append(f'(?P<{group}>{provider.api_pattern})')
+                self._route_all_paths |= _is_path_sensitive(provider.api_pattern)
+
+        self._regex: re.Pattern[str] | None = None
+        self._fallback: list[tuple[int, re.Pattern[str], types.Provider]] | None = None
+        try:
+            if any(_BACKREFERENCE_RE.search(provider.api_pattern) for _, provider in self._regex_providers.values()):
+                raise re.error('numbered backreferences cannot be combined')
+            self._regex = re.compile('|'.join(alternatives)) if alternatives else None
+        except re.error:
+            self._fallback = [
+                (position, re.compile(provider.api_pattern), provider)
+                for position, provider in self._regex_providers.values()
+            ]
+
+    def key(self, api_url: str) -> str:
+        """Normalize an API URL so that URLs which must resolve to the same provider share a key."""
+        return self._match_literal(api_url)[0]
+
+    def find(self, api_url: str) -> types.Provider | None:
+        """Find the first provider whose `api_pattern` matches `api_url`."""
+        key, best = self._match_literal(api_url)
+
+        if self._regex is not None:
+            if (match := self._regex.match(key)) and match.lastgroup:
+                regex_best = self._regex_providers[match.lastgroup]
+                if best is None or regex_best[0] < best[0]:
+                    best = regex_best
+        elif self._fallback is not None:
+            for position, pattern, provider in self._fallback:
+                if best is not None and position > best[0]:
+                    break
+                if pattern.match(key):
+                    best = position, provider
+                    break
+
+        return best[1] if best else None
+
+    def _match_literal(self, api_url: str) -> tuple[str, tuple[int, types.Provider] | None]:
+        """Return the normalized key for `api_url` and the first literal pattern it matches, if any."""
+        origin, path = _split_api_url(api_url)
+        if origin is None:
+            return api_url, None
+
+        for position, path_prefix, provider in self._by_origin.get(origin, ()):
+            if path.startswith(path_prefix):
+                literal_match = position, provider
+                break
+        else:
+            path_prefix = ''
+            literal_match = None
+
+        if self._route_all_paths:
+            return origin + path, literal_match
+        # only the literal path prefix which matched affects which provider is found
+        return origin + path_prefix, literal_match
+
+
+class ProviderIdIndex:
+    """Index for resolving a provider from a provider ID, returning the same provider as `find_provider_by_id`.
+
+    Provider IDs are looked up in a dict, then literal `provider_match` clauses through a `ClauseIndex`. Other
+    `provider_match` clauses are only evaluated for IDs which aren't a provider's ID, and the provider found for each
+    such ID is cached.
+    """
+
+    def __init__(self, providers: list[types.Provider], cache_size: int | None = DEFAULT_LOOKUP_CACHE_SIZE) -> None:
+        self._providers = tuple(providers)
+        self._by_id: dict[str, types.Provider] = {}
+        for provider in self._providers:
+            self._by_id.setdefault(provider.id, provider)
+        self._aliases = ClauseIndex([provider.provider_match for provider in self._providers])
+        self._alias_cache: LookupCache[str, int] | None = None
+        if self._aliases.has_residual:
+            self._alias_cache = LookupCache(cache_size)
+
+    def find(self, provider_id: str) -> types.Provider | None:
+        """Find the provider with ID `provider_id`, or else the first provider whose `provider_match` matches it."""
+        normalized_provider_id = provider_id.lower().strip()
+        if provider := self._by_id.get(normalized_provider_id):
+            return provider
+
+        if self._alias_cache is None:
+            position = self._aliases.first_match(normalized_provider_id)
+        else:
+            position = self._alias_cache.get(normalized_provider_id)
+            if position is None:
+                position = self._aliases.first_match(normalized_provider_id)
+                self._alias_cache.set(normalized_provider_id, _NO_PROVIDER if position is None else position)
+            elif position == _NO_PROVIDER:
+                position = None
+        return None if position is None else self._providers[position]
+
+
+_NO_PROVIDER = -1
+_LITERAL_ESCAPE_RE = re.compile(r'\\([^\w\s])')
+_REGEX_META_RE = re.compile(r'[.^$*+?{}\[\]\\|()]')
+_HOSTNAME_RE = re.compile(r'[a-z0-9]([a-z0-9-]*[a-z0-9])?(\.[a-z0-9]([a-z0-9-]*[a-z0-9])?)+')
+_ORIGIN_ONLY_RE = re.compile(r'\(\?:/\|\$\)|\(/\|\$\)|\[[^\]]*\]')
+_BACKREFERENCE_RE = re.compile(r'\\[1-9]')
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def _split_api_url(api_url: str) -> tuple[str | None, str]:
+    """Split an API URL into its normalized origin and path, the origin is `None` if the URL can't be parsed."""
+    try:
+        split = urlsplit(api_url.strip())
+        port = split.port
+    except ValueError:
+        return None, ''
+    host = split.hostname
+    if not split.scheme or not host:
+        return None, ''
+
+    scheme = split.scheme.lower()
+    origin = f'{scheme}://{host}'
+    if port is not None and port != _DEFAULT_PORTS.get(scheme):
+        origin += f':{port}'
+    return origin, split.path
+
+
+def _literal_api_url(api_pattern: str) -> tuple[str, str] | None:
+    """If `api_pattern` is a literal origin plus an optional literal path prefix, return the two parts."""
+    literal = _LITERAL_ESCAPE_RE.sub('', api_pattern)
+    if _REGEX_META_RE.search(literal):
+        return None
+
+    literal = _LITERAL_ESCAPE_RE.sub(r'\1', api_pattern)
+    origin, path = _split_api_url(literal)
+    host = urlsplit(literal).hostname
+    if origin is None or host is None or not _HOSTNAME_RE.fullmatch(host) or origin + path != literal:
+        return None
+    return origin, path
+
+
+def _is_path_sensitive(api_pattern: str) -> bool:
+    """Whether a pattern might depend on the URL path, rather than just the origin."""
+    return '/' in _ORIGIN_ONLY_RE.sub('', api_pattern).replace('://', '', 1)
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from collections.abc import Mapping
+from collections.abc import Iterable, Mapping, Sequence
 from typing import cast
 
 from genai_prices._usage import UsageValue, subtract_usage_values
@@ -8,32 +8,56 @@ from genai_prices.units import UnitDef
 
 
 def is_descendant_or_self(ancestor: UnitDef, descendant: UnitDef) -> bool:
-    return ancestor.dimensions.items() <= descendant.dimensions.items()
+    return ancestor.is_ancestor_or_self_of(descendant)
 
 
 def compute_leaf_values(
     priced_usage_keys: set[str], usage: object, units_by_usage_key: Mapping[str, UnitDef]
 ) -> dict[str, UsageValue]:
-    priced_units = sorted(
-        (units_by_usage_key[usage_key] for usage_key in priced_usage_keys & units_by_usage_key.keys()),
-        key=lambda unit: (-len(unit.dimensions), unit.usage_key),
+    plan = LeafDecompositionPlan(
+        units_by_usage_key[usage_key] for usage_key in priced_usage_keys & units_by_usage_key.keys()
     )
-    leaf_values: dict[str, UsageValue] = {}
+    return plan.compute(usage)
 
-    for unit in priced_units:
-        descendant_values = (
-            leaf_values[descendant.usage_key]
-            for descendant in priced_units
-            if descendant is not unit and is_descendant_or_self(unit, descendant)
-        )
-        leaf_value = subtract_usage_values(_usage_value(usage, unit.usage_key), descendant_values)
 
-        if leaf_value < 0:
-            raise ValueError(_negative_leaf_error_message(unit, priced_units, usage, leaf_value))
+def leaf_order(priced_units: Iterable[UnitDef]) -> tuple[UnitDef, ...]:
+    """Order priced units so that every unit comes after all of its descendants."""
+    return tuple(sorted(priced_units, key=lambda unit: (-len(unit.dimensions), unit.usage_key)))
+
+
+class LeafDecompositionPlan:
+    """The order in which to decompose a set of priced units into leaf values, with the descendants of each unit.
+
+    `UnitRegistry.leaf_decomposition_plan` caches plans per set of priced usage keys, so computing leaf values is
+    just reading usage values and subtracting the leaf values already computed for each unit's descendants.
+    """
+
+    __slots__ = 'units', 'descendants'
+
+    def __init__(self, priced_units: Iterable[UnitDef]) -> None:
+        self.units = leaf_order(priced_units)
+        # descendants have more dimensions, so always come earlier in `units`
+        self.descendants = tuple(
+            tuple(
+                index
+                for index, descendant in enumerate(self.units)
+                if descendant is not unit and is_descendant_or_self(unit, descendant)
+            )
+            for unit in self.units
+        )
 
-        leaf_values[unit.usage_key] = leaf_value
+    def compute(self, usage: object) -> dict[str, UsageValue]:
+        """Return the leaf value of each priced unit, keyed by usage key."""
+        values: list[UsageValue] = []
+        for unit, descendants in zip(self.units, self.descendants):
+            leaf_value = subtract_usage_values(
+                _usage_value(usage, unit.usage_key), [values[index] for index in descendants]
+            )
+            if leaf_value < 0:
+                raise ValueError(_negative_leaf_error_message(unit, self.units, usage, leaf_value))
+            values.append(leaf_value)
 
-    return leaf_values
+        return {unit.usage_key: value for unit, value in zip(self.units, values)}
 
 
 def _usage_value(usage: object, usage_key: str) -> UsageValue:
@@ -42,7 +66,7 @@ def _usage_value(usage: object, usage_key: str) -> UsageValue:
 
 
 def _negative_leaf_error_message(
-    unit: UnitDef, priced_units: list[UnitDef], usage: object, leaf_value: UsageValue
+    unit: UnitDef, priced_units: Sequence[UnitDef], usage: object, leaf_value: UsageValue
 ) -> str:
     unit_value = _usage_value(usage, unit.usage_key)
     descendant_values = [
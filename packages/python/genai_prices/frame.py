@@ -0,0 +1,246 @@
+from __future__ import annotations as _annotations
+
+import sys
+import time
+from collections.abc import Mapping
+from datetime import datetime, time as dt_time, timedelta, timezone
+from typing import Any, Literal
+
+try:
+    import numpy as np
+    import numpy.typing as npt
+except ModuleNotFoundError as exc:  # pragma: no cover
+    if exc.name == 'numpy':
+        raise ImportError(
+            'Pricing data frames requires numpy, install it with: pip install "genai-prices[pandas]" or '
+            'pip install "genai-prices[polars]"'
+        ) from exc
+    raise
+
+from . import data_snapshot, types
+from ._batch import RowError
+
+__all__ = ('price_frame',)
+
+_MICROSECONDS_PER_DAY = 86_400_000_000
+_ONE_MICROSECOND = timedelta(microseconds=1)
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+# timestamps are microseconds since the epoch, this marks missing values like `NaT` does
+_MISSING_TIMESTAMP = np.iinfo(np.int64).min
+
+
+def price_frame(
+    df: Any,
+    *,
+    model_column: str = 'model',
+    provider_column: str | None = None,
+    timestamp_column: str | None = None,
+    usage_columns: Mapping[str, str] | None = None,
+    numeric: Literal['fixed', 'float'] = 'fixed',
+    snapshot: data_snapshot.DataSnapshot | None = None,
+) -> Any:
+    """Calculate the price of each row of a pandas or Polars data frame, e.g. a usage log covering many models.
+
+    Requires NumPy and pandas or Polars: `pip install "genai-prices[pandas]"` or `pip install "genai-prices[polars]"`.
+
+    Rows are grouped by the provider and model they resolve to, and by the `ModelPrice` which applies at their
+    timestamp, then each group is priced at once with `ModelPrice.calc_price_batch`. Each distinct provider and model
+    reference is only resolved once.
+
+    Args:
+        df: A `pandas.DataFrame` or `polars.DataFrame`.
+        model_column: Name of the column of model references.
+        provider_column: Name of the column of provider IDs, if any, a missing value means the provider is found
+            from the model reference.
+        timestamp_column: Name of the column of request timestamps, if any, used to select prices which depend on
+            time. Time zone naive timestamps are taken to be UTC, missing timestamps mean now.
+        usage_columns: Mapping of usage key to the name of the column with that usage, by default every column
+            named like a usage key, e.g. `input_tokens`. Missing values, e.g. `null` or `NaN`, mean no usage was
+            reported and are taken as 0.
+        numeric: With `'fixed'`, usage columns must be integers and prices are integer nano-dollars, exactly as
+            `calc_price_with(..., numeric='fixed')` multiplied by 1e9. With `'float'`, prices are floats in USD.
+        snapshot: The data snapshot to find models in, defaults to the current snapshot.
+
+    Returns:
+        A frame of the same type as `df`, with `input_price`, `output_price` and `total_price` columns added.
+
+    Raises:
+        LookupError: If the model of a row can't be found.
+        ValueError: If the usage of a row is invalid, the message starts with the position of the row.
+    """
+    frame = _frame_adapter(df)
+    if snapshot is None:
+        snapshot = data_snapshot.get_snapshot()
+    if usage_columns is None:
+        from .units import _get_registry  # pyright: ignore[reportPrivateUsage]
+
+        units = _get_registry().units
+        usage_columns = {name: name for name in frame.column_names(df) if name in units and name != 'requests'}
+
+    length = frame.length(df)
+    columns = {usage_key: frame.to_numpy(df, column) for usage_key, column in usage_columns.items()}
+    timestamps = None if timestamp_column is None else frame.timestamps(df, timestamp_column)
+
+    # rows which resolve to the same model are priced together, whatever their provider ID and model reference
+    rows_by_model: dict[tuple[int, int], tuple[types.ModelInfo, list[npt.NDArray[np.intp]]]] = {}
+    key_columns = [model_column] if provider_column is None else [model_column, provider_column]
+    for key, rows in frame.groups(df, key_columns):
+        model_ref, provider_id = (key[0], None) if provider_column is None else key
+        if not isinstance(model_ref, str):
+            raise ValueError(f'Row {rows[0]}: model reference must be a string, not {model_ref!r}')
+        try:
+            provider, model = snapshot.find_provider_model(model_ref, None, _optional_str(provider_id), None)
+        except LookupError as e:
+            raise LookupError(f'Row {rows[0]}: {e}') from e
+        rows_by_model.setdefault((id(provider), id(model)), (model, []))[1].append(rows)
+
+    dtype = np.int64 if numeric == 'fixed' else np.float64
+    prices = {name: np.zeros(length, dtype=dtype) for name in ('input_price', 'output_price', 'total_price')}
+    for model, row_groups in rows_by_model.values():
+        rows = np.sort(np.concatenate(row_groups))
+        for model_price, price_rows in _split_by_prices(model, rows, timestamps):
+            try:
+                batch = model_price.calc_price_batch(
+                    {usage_key: column[price_rows] for usage_key, column in columns.items()}, numeric=numeric
+                )
+            except RowError as e:
+                raise ValueError(f'Row {price_rows[e.row]}: {e.reason}') from e
+            for name, values in prices.items():
+                values[price_rows] = batch[name]
+    return frame.with_columns(df, prices)
+
+
+def _split_by_prices(
+    model: types.ModelInfo, rows: npt.NDArray[np.intp], timestamps: npt.NDArray[np.int64] | None
+) -> list[tuple[types.ModelPrice, npt.NDArray[np.intp]]]:
+    """Split `rows` by the prices which apply at their timestamp, microseconds since the epoch."""
+    if isinstance(model.prices, types.ModelPrice):
+        return [(model.prices, rows)]
+
+    if timestamps is None:
+        return [(model.get_current_prices(), rows)]
+    row_timestamps = timestamps[rows]
+    missing = row_timestamps == _MISSING_TIMESTAMP
+    if missing.any():
+        now = int(time.time() * 1_000_000)
+        row_timestamps = np.where(missing, now, row_timestamps)
+
+    # the same lookup as `PriceTimeline.find`, on the UTC date and time of day of each row
+    timeline = model.price_timeline()
+    days, time_of_day = np.divmod(row_timestamps, _MICROSECONDS_PER_DAY)
+    start_days = np.array([(start_date - _EPOCH.date()).days for start_date in timeline.start_dates], dtype=np.int64)
+    segment_indexes = np.searchsorted(start_days, days, side='right')
+
+    split: dict[int, tuple[types.ModelPrice, list[npt.NDArray[np.intp]]]] = {}
+    segment_index: int
+    for segment_index in np.unique(segment_indexes).tolist():
+        in_segment = segment_indexes == segment_index
+        boundaries, segment_prices = timeline.segments[segment_index]
+        boundary_times = np.array([_utc_microseconds(boundary) for boundary in boundaries], dtype=np.int64)
+        price_indexes = np.searchsorted(boundary_times, time_of_day[in_segment], side='right')
+        segment_rows = rows[in_segment]
+        price_index: int
+        for price_index in np.unique(price_indexes).tolist():
+            model_price = segment_prices[price_index]
+            split.setdefault(id(model_price), (model_price, []))[1].append(segment_rows[price_indexes == price_index])
+    return [(model_price, np.sort(np.concatenate(row_groups))) for model_price, row_groups in split.values()]
+
+
+def _utc_microseconds(boundary: dt_time) -> int:
+    # aware times are compared after subtracting their UTC offset, naive times are taken to be UTC
+    microseconds = ((boundary.hour * 60 + boundary.minute) * 60 + boundary.second) * 1_000_000 + boundary.microsecond
+    offset = boundary.utcoffset()
+    if offset is not None:
+        microseconds -= offset // _ONE_MICROSECOND
+    return microseconds
+
+
+def _optional_str(value: Any) -> str | None:
+    # missing values in frames may be `None` or NaN
+    return value if isinstance(value, str) else None
+
+
+class _PandasFrame:
+    @staticmethod
+    def column_names(df: Any) -> list[str]:
+        return [name for name in df.columns if isinstance(name, str)]
+
+    @staticmethod
+    def length(df: Any) -> int:
+        return len(df)
+
+    @staticmethod
+    def to_numpy(df: Any, column: str) -> npt.NDArray[Any]:
+        series = df[column]
+        if not series.hasnans:
+            return series.to_numpy()
+        array = series.fillna(0).to_numpy()
+        # integer columns with missing values are promoted to float, they're cast back so `'fixed'` can price them
+        if array.dtype.kind == 'f' and np.isfinite(array).all() and (array == np.trunc(array)).all():
+            array = array.astype(np.int64)
+        return array
+
+    @staticmethod
+    def timestamps(df: Any, column: str) -> npt.NDArray[np.int64]:
+        pd: Any = sys.modules['pandas']
+        series = pd.to_datetime(df[column])
+        if series.dt.tz is not None:
+            series = series.dt.tz_convert('UTC').dt.tz_localize(None)
+        return series.to_numpy(dtype='datetime64[us]').view(np.int64)
+
+    @staticmethod
+    def groups(df: Any, columns: list[str]) -> list[tuple[tuple[Any, ...], npt.NDArray[np.intp]]]:
+        indices = df.groupby(columns, sort=False, dropna=False).indices
+        return [(key if isinstance(key, tuple) else (key,), rows) for key, rows in indices.items()]
+
+    @staticmethod
+    def with_columns(df: Any, columns: dict[str, npt.NDArray[Any]]) -> Any:
+        return df.assign(**columns)
+
+
+class _PolarsFrame:
+    @staticmethod
+    def column_names(df: Any) -> list[str]:
+        return list(df.columns)
+
+    @staticmethod
+    def length(df: Any) -> int:
+        return df.height
+
+    @staticmethod
+    def to_numpy(df: Any, column: str) -> npt.NDArray[Any]:
+        return df.get_column(column).fill_null(0).to_numpy()
+
+    @staticmethod
+    def timestamps(df: Any, column: str) -> npt.NDArray[np.int64]:
+        series = df.get_column(column)
+        if getattr(series.dtype, 'time_zone', None) is not None:
+            series = series.dt.convert_time_zone('UTC').dt.replace_time_zone(None)
+        return series.dt.epoch('us').fill_null(_MISSING_TIMESTAMP).to_numpy()
+
+    @staticmethod
+    def groups(df: Any, columns: list[str]) -> list[tuple[tuple[Any, ...], npt.NDArray[np.intp]]]:
+        import polars as pl
+
+        grouped = (
+            df.select(columns)
+            .with_row_index('_genai_prices_row')
+            .group_by(columns, maintain_order=True)
+            .agg(pl.col('_genai_prices_row'))
+        )
+        return [(tuple(key), np.asarray(rows, dtype=np.intp)) for *key, rows in grouped.iter_rows()]
+
+    @staticmethod
+    def with_columns(df: Any, columns: dict[str, npt.NDArray[Any]]) -> Any:
+        import polars as pl
+
+        return df.with_columns(pl.Series(name, values) for name, values in columns.items())
+
+
+def _frame_adapter(df: Any) -> type[_PandasFrame] | type[_PolarsFrame]:
+    # only the library `df` comes from is used, it must already be imported
+    if (pd := sys.modules.get('pandas')) is not None and isinstance(df, pd.DataFrame):
+        return _PandasFrame
+    elif (pl := sys.modules.get('polars')) is not None and isinstance(df, pl.DataFrame):
+        return _PolarsFrame
+    raise TypeError(f'Expected a pandas or Polars DataFrame, not {type(df).__name__}')
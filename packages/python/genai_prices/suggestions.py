@@ -0,0 +1,149 @@
+from __future__ import annotations as _annotations
+
+import heapq
+from collections import Counter
+from collections.abc import Sequence
+from difflib import SequenceMatcher
+from itertools import chain
+
+from . import data_snapshot, types
+
+__all__ = 'ModelSuggestionIndex', 'suggest_models'
+
+_NGRAM_SIZE = 3
+_CANDIDATES_PER_SUGGESTION = 4
+
+# index over the providers suggestions were last requested for, rebuilt when they change
+_cached_index: ModelSuggestionIndex | None = None
+
+
+def suggest_models(
+    model_ref: str,
+    *,
+    provider_id: str | None = None,
+    providers: Sequence[types.Provider] | None = None,
+    limit: int = 5,
+    cutoff: float = 0.6,
+) -> list[str]:
+    """Suggest models similar to a model reference which couldn't be found, e.g. for a "did you mean" message.
+
+    The index used is built on first use and reused until `providers` is replaced or modified.
+
+    Args:
+        model_ref: The model reference which couldn't be found.
+        provider_id: If given, only suggest models of the provider with this ID.
+        providers: The providers to suggest models from, defaults to the providers of the current data snapshot.
+        limit: Maximum number of suggestions to return.
+        cutoff: Minimum similarity, between 0 and 1, as calculated by `difflib.SequenceMatcher.ratio`.
+
+    Returns:
+        Suggestions formatted as `'{provider_id}:{model_id}'`, most similar first.
+    """
+    global _cached_index
+
+    if providers is None:
+        providers = data_snapshot.get_snapshot().providers
+    index = _cached_index
+    if index is None or not index.is_current(providers):
+        _cached_index = index = ModelSuggestionIndex(providers)
+    return index.suggest(model_ref, provider_id=provider_id, limit=limit, cutoff=cutoff)
+
+
+class ModelSuggestionIndex:
+    """Trigram index over the IDs and names of providers' models, used to rank suggestions for a model reference.
+
+    Candidates are ranked by the proportion of trigrams they share with the reference, and only the best of them are
+    scored with `difflib.SequenceMatcher`, rather than comparing the reference with every model.
+    """
+
+    def __init__(self, providers: Sequence[types.Provider]) -> None:
+        self.providers = providers
+        self._sources = [(provider.models, len(provider.models)) for provider in providers]
+        self._all = _NgramTable()
+        self._by_provider: dict[str, _NgramTable] = {}
+        for provider in providers:
+            if provider.id in self._by_provider:
+                continue
+            table = self._by_provider[provider.id] = _NgramTable()
+            for model in provider.models:
+                suggestion = f'{provider.id}:{model.id}'
+                keys = {model.id.lower()}
+                if model.name:
+                    keys.add(model.name.lower())
+                for key in sorted(keys):
+                    ngrams = _ngrams(key)
+                    table.add(key, ngrams, suggestion)
+                    self._all.add(key, ngrams, suggestion)
+
+    def is_current(self, providers: Sequence[types.Provider]) -> bool:
+        """Whether the index was built from `providers` and they haven't obviously changed since."""
+        if self.providers is not providers or len(self._sources) != len(providers):
+            return False
+        for (models, length), provider in zip(self._sources, providers):
+            if models is not provider.models or length != len(models):
+                return False
+        return True
+
+    def suggest(
+        self, model_ref: str, *, provider_id: str | None = None, limit: int = 5, cutoff: float = 0.6
+    ) -> list[str]:
+        """Suggest models similar to `model_ref`, see `suggest_models`."""
+        text = model_ref.lower()
+        if provider_id is None:
+            # a reference like `provider:model` is only compared with that provider's models
+            prefix, sep, model_part = text.partition(':')
+            if sep and (table := self._by_provider.get(prefix)):
+                return table.suggest(model_part, limit, cutoff)
+            return self._all.suggest(text, limit, cutoff)
+        elif table := self._by_provider.get(provider_id):
+            return table.suggest(text, limit, cutoff)
+        else:
+            return []
+
+
+class _NgramTable:
+    def __init__(self) -> None:
+        self.keys: list[str] = []
+        self.suggestions: list[str] = []
+        self.ngram_counts: list[int] = []
+        self.postings: dict[str, list[int]] = {}
+
+    def add(self, key: str, ngrams: set[str], suggestion: str) -> None:
+        entry = len(self.keys)
+        self.keys.append(key)
+        self.suggestions.append(suggestion)
+        self.ngram_counts.append(len(ngrams))
+        for ngram in ngrams:
+            self.postings.setdefault(ngram, []).append(entry)
+
+    def suggest(self, text: str, limit: int, cutoff: float) -> list[str]:
+        query = _ngrams(text)
+        postings = self.postings
+        shared = Counter(chain.from_iterable(postings[ngram] for ngram in query if ngram in postings))
+
+        query_count = len(query)
+        ngram_counts = self.ngram_counts
+        candidates = heapq.nlargest(
+            limit * _CANDIDATES_PER_SUGGESTION,
+            shared,
+            key=lambda entry: shared[entry] / (query_count + ngram_counts[entry]),
+        )
+
+        scores: dict[str, float] = {}
+        matcher = SequenceMatcher()
+        matcher.set_seq2(text)
+        for entry in candidates:
+            matcher.set_seq1(self.keys[entry])
+            if matcher.real_quick_ratio() >= cutoff and matcher.quick_ratio() >= cutoff:
+                score = matcher.ratio()
+                suggestion = self.suggestions[entry]
+                if score >= cutoff and score > scores.get(suggestion, 0):
+                    scores[suggestion] = score
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [suggestion for suggestion, _ in ranked[:limit]]
+
+
+def _ngrams(text: str) -> set[str]:
+    padded = f'  {text} '
+    return {padded[i : i + _NGRAM_SIZE] for i in range(len(padded) - _NGRAM_SIZE + 1)}
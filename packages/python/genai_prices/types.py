@@ -2,21 +2,31 @@ from __future__ import annotations as _annotations
 
 import dataclasses
 import re
+import time as _time
 import warnings
-from collections.abc import Iterator, Mapping, Sequence
+import weakref
+from bisect import bisect_right
+from collections.abc import Callable, Iterator, Mapping, Sequence
 from dataclasses import InitVar, dataclass, field
 from datetime import date, datetime, time, timezone
-from decimal import Decimal
+from decimal import ROUND_HALF_UP, Decimal
 from numbers import Integral
-from typing import TYPE_CHECKING, Annotated, Any, Literal, TypeGuard, TypeVar, cast, overload
+from typing import TYPE_CHECKING, Annotated, Any, Literal, TypeGuard, TypeVar, cast, get_args
 
 import pydantic
 from typing_extensions import Self, TypedDict
 
+from genai_prices._extract import Missing, PathPlan, extraction_error, json_selection, select_json
+from genai_prices._match import CompiledMatch, FallbackModelIndex, ModelMatchIndex
 from genai_prices._usage import UsageValue, add_usage_values, usage_value_as_decimal, validate_usage_value
 from genai_prices.units import UnitRegistry
 
 if TYPE_CHECKING:
+    import numpy.typing as npt
+
+    from genai_prices._batch import BatchPrices
+    from genai_prices.data_snapshot import DataSnapshot
+    from genai_prices.decompose import LeafDecompositionPlan
     from genai_prices.units import UnitDef
 
 __all__ = (
@@ -27,8 +37,11 @@ __all__ = (
     'Provider',
     'UsageExtractorMapping',
     'UsageExtractor',
+    'UsageExtractorStreaming',
+    'StreamingUsageExtractor',
     'ModelInfo',
     'ModelPrice',
+    'PricePlan',
     'TieredPrices',
     'Tier',
     'ConditionalPrice',
@@ -197,11 +210,36 @@ AbstractUsage = object
 
 
 class Usage:
-    """Simple token usage container."""
+    """Simple token usage container.
+
+    Reported usage values are validated when they're set, and stored compactly: `_present` is a bitmask of the
+    reported usage keys with a value, by their position in the unit registry's order, and `_values` holds their
+    values in the same order. Any other attributes, e.g. unsupported usage keys, are kept in `_extras`, or as normal
+    attributes of subclasses, which have an instance `__dict__` unless they define `__slots__`.
+    """
+
+    __slots__ = '_layout', '_present', '_values', '_extras'
+
+    _layout: _UsageLayout
+    _present: int
+    _values: tuple[UsageValue, ...]
+    _extras: dict[str, Any] | None
 
     def __init__(self, **kwargs: UsageValue | None) -> None:
-        reported_usage_keys = _reported_usage_keys()
-        unknown_keys = kwargs.keys() - reported_usage_keys
+        layout = _current_usage_layout()
+        indexes = layout.indexes
+        reported: list[tuple[int, str, UsageValue]] = []
+        extras: dict[str, Any] = {}
+        unknown_keys: list[str] = []
+        for key, value in kwargs.items():
+            index = indexes.get(key)
+            if index is None:
+                unknown_keys.append(key)
+                if value is not None:
+                    extras[key] = value
+            elif value is not None:
+                reported.append((index, key, value))
+
         if unknown_keys:
             bad_keys = ', '.join(sorted(unknown_keys))
             warnings.warn(
@@ -210,65 +248,201 @@ class Usage:
                 stacklevel=2,
             )
 
-        self._store_values(kwargs)
+        self._store_reported(layout, reported)
+        for key, value in extras.items():
+            self._set_extra(key, value)
 
     @classmethod
     def from_raw(cls, obj: object) -> Usage:
+        """Build usage from the reported usage keys of `obj`, e.g. a mapping or the usage object of a provider SDK.
+
+        Other keys or attributes of `obj` are ignored, as are `None` values.
+        """
         if isinstance(obj, Usage):
-            obj._reported_values()
             return obj
 
-        values: dict[str, UsageValue] = {}
-        for key in _reported_usage_keys():
-            value = _raw_usage_value(obj, key)
-            if value is not None:
-                values[key] = value
-
-        return cls(**values)
+        layout = _current_usage_layout()
+        indexes = layout.indexes
+        if isinstance(obj, Mapping):
+            items = cast('Mapping[str, UsageValue | None]', obj).items()
+        else:
+            items = _raw_usage_plan(type(obj), layout).items(obj)
+        reported: list[tuple[int, str, UsageValue]] = []
+        for key, value in items:
+            if value is not None and (index := indexes.get(key)) is not None:
+                reported.append((index, key, value))
+
+        if cls is not Usage:
+            # subclasses may define `__init__`, so are constructed from the values
+            return cls(**{key: value for _, key, value in reported})
+        usage = object.__new__(cls)
+        usage._store_reported(layout, reported)
+        return usage
+
+    def _store_reported(self, layout: _UsageLayout, reported: list[tuple[int, str, UsageValue]]) -> None:
+        reported.sort(key=lambda item: item[0])
+        present = 0
+        for index, _, _ in reported:
+            present |= 1 << index
+        self._set_storage(layout, present, tuple(validate_usage_value(key, value) for _, key, value in reported), None)
+
+    def _set_storage(
+        self,
+        layout: _UsageLayout,
+        present: int,
+        values: tuple[UsageValue, ...],
+        extras: dict[str, Any] | None,
+    ) -> None:
+        object.__setattr__(self, '_layout', layout)
+        object.__setattr__(self, '_present', present)
+        object.__setattr__(self, '_values', values)
+        object.__setattr__(self, '_extras', extras)
+
+    def _current_layout(self) -> _UsageLayout:
+        """Return the layout of the current unit registry, first moving values to it if the registry has changed."""
+        layout = _current_usage_layout()
+        if self._layout is not layout:
+            values = dict(self._reported_items())
+            if self._extras:
+                values.update(self._extras)
+            instance_dict: dict[str, Any] | None = getattr(self, '__dict__', None)
+            if instance_dict:
+                # attributes of subclasses which are now usage keys
+                values.update((key, instance_dict.pop(key)) for key in list(instance_dict) if key in layout.indexes)
+            self._set_storage(layout, 0, (), None)
+            for key, value in values.items():
+                self.__setattr__(key, value)
+        return layout
 
     def __setattr__(self, name: str, value: UsageValue | None) -> None:
-        if name in _reported_usage_keys():
-            self._store_values({name: value})
-        else:
+        if name in Usage.__slots__ or name.startswith('__'):
+            # e.g. slots restored by `copy` and `pickle`
             object.__setattr__(self, name, value)
+            return
+
+        index = self._current_layout().indexes.get(name)
+        if index is None:
+            self._set_extra(name, value)
+            return
+
+        bit = 1 << index
+        present = self._present
+        values = self._values
+        position = (present & (bit - 1)).bit_count()
+        if value is None:
+            if present & bit:
+                object.__setattr__(self, '_present', present & ~bit)
+                object.__setattr__(self, '_values', values[:position] + values[position + 1 :])
+            return
+
+        value = validate_usage_value(name, value)
+        if present & bit:
+            object.__setattr__(self, '_values', (*values[:position], value, *values[position + 1 :]))
+        else:
+            object.__setattr__(self, '_present', present | bit)
+            object.__setattr__(self, '_values', (*values[:position], value, *values[position:]))
+
+    def _set_extra(self, name: str, value: Any) -> None:
+        if type(self) is not Usage:
+            try:
+                # the instance `__dict__` or slots of subclasses
+                object.__setattr__(self, name, value)
+            except AttributeError:
+                pass
+            else:
+                return
+        if self._extras is None:
+            object.__setattr__(self, '_extras', {})
+        self._extras[name] = value  # pyright: ignore[reportOptionalSubscript]
 
     def __getattr__(self, name: str) -> UsageValue:
-        if name in _reported_usage_keys():
+        # only called when normal lookup fails, e.g. for usage keys, but also for unset slots
+        if name in Usage.__slots__ or name.startswith('__'):
+            raise AttributeError(f'{type(self).__name__!r} object has no attribute {name!r}')
+
+        index = self._current_layout().indexes.get(name)
+        if index is not None:
+            bit = 1 << index
+            present = self._present
+            if present & bit:
+                return self._values[(present & (bit - 1)).bit_count()]
             return self._infer_missing_value(name)
 
+        extras = self._extras
+        if extras is not None and name in extras:
+            return extras[name]
         raise AttributeError(f'{type(self).__name__!r} object has no attribute {name!r}')
 
-    def _store_values(self, values: Mapping[str, UsageValue | None]) -> None:
-        reported_usage_keys = _reported_usage_keys()
-        for key, value in values.items():
-            if value is None:
-                self.__dict__.pop(key, None)
-            elif key in reported_usage_keys:
-                self.__dict__[key] = validate_usage_value(key, value)
-            else:
-                self.__dict__[key] = value
+    def __delattr__(self, name: str) -> None:
+        if name in self._current_layout().indexes:
+            self.__setattr__(name, None)
+        elif self._extras is not None and name in self._extras:
+            del self._extras[name]
+        else:
+            object.__delattr__(self, name)
+
+    def _reported_items(self) -> Iterator[tuple[str, UsageValue]]:
+        """Yield the reported usage keys with a value and their values, in registry order."""
+        keys = self._layout.keys
+        present = self._present
+        for value in self._values:
+            lowest = present & -present
+            present ^= lowest
+            yield keys[lowest.bit_length() - 1], value
 
     def _reported_values(self) -> dict[str, UsageValue]:
-        reported_usage_keys = _reported_usage_keys()
-        return {
-            key: validate_usage_value(key, value) for key, value in self.__dict__.items() if key in reported_usage_keys
-        }
+        self._current_layout()
+        return dict(self._reported_items())
 
     def reported_value(self, usage_key: str) -> UsageValue:
-        return self._reported_values().get(usage_key, 0)
+        index = self._current_layout().indexes.get(usage_key)
+        if index is None:
+            return 0
+        bit = 1 << index
+        present = self._present
+        return self._values[(present & (bit - 1)).bit_count()] if present & bit else 0
 
     def __add__(self, other: Usage | Any) -> Self:
         if not isinstance(other, Usage):
             return NotImplemented
 
-        self_values = self._reported_values()
-        other_values = other._reported_values()
-        return type(self)(
-            **{
-                key: add_usage_values(self_values.get(key, 0), other_values.get(key, 0))
-                for key in self_values.keys() | other_values.keys()
-            }
-        )
+        layout = self._current_layout()
+        other._current_layout()
+        self_present, self_values = self._present, self._values
+        other_present, other_values = other._present, other._values
+        values: list[UsageValue] = []
+        if self_present == other_present:
+            for left, right in zip(self_values, other_values):
+                values.append(
+                    left + right if type(left) is int and type(right) is int else add_usage_values(left, right)
+                )
+        else:
+            # merge the populated slots of both, in slot order
+            remaining = self_present | other_present
+            self_position = other_position = 0
+            while remaining:
+                lowest = remaining & -remaining
+                remaining ^= lowest
+                left: UsageValue = 0
+                right: UsageValue = 0
+                if self_present & lowest:
+                    left = self_values[self_position]
+                    self_position += 1
+                if other_present & lowest:
+                    right = other_values[other_position]
+                    other_position += 1
+                values.append(
+                    left + right if type(left) is int and type(right) is int else add_usage_values(left, right)
+                )
+
+        if type(self) is Usage:
+            result = object.__new__(type(self))
+            result._set_storage(layout, self_present | other_present, tuple(values), None)
+            return result
+        # subclasses may define `__init__`, so are constructed from the summed values
+        result = object.__new__(Usage)
+        result._set_storage(layout, self_present | other_present, tuple(values), None)
+        return type(self)(**dict(result._reported_items()))
 
     def __radd__(self, other: Usage | int) -> Usage:
         if other == 0:
@@ -282,15 +456,17 @@ class Usage:
         if not isinstance(other, Usage):
             return NotImplemented
 
-        return self._reported_values() == other._reported_values()
+        self._current_layout()
+        other._current_layout()
+        return self._present == other._present and self._values == other._values
 
     def __repr__(self) -> str:
         values = ', '.join(f'{key}={value!r}' for key, value in self._ordered_values())
         return f'{type(self).__name__}({values})'
 
     def _ordered_values(self) -> list[tuple[str, UsageValue]]:
-        values = self._reported_values()
-        return [(key, values[key]) for key in _reported_usage_key_order() if key in values]
+        self._current_layout()
+        return list(self._reported_items())
 
     def _infer_missing_value(self, usage_key: str) -> UsageValue:
         from genai_prices.decompose import is_descendant_or_self
@@ -298,24 +474,14 @@ class Usage:
 
         registry = _get_registry()
         requested_unit = registry.units[usage_key]
-        reported_values = self._reported_values()
+        reported_units = [registry.units[key] for key, value in self._reported_items() if value > 0]
         descendant_keys = [
             unit.usage_key
-            for reported_key, value in reported_values.items()
-            if value > 0
-            and (unit := registry.units.get(reported_key)) is not None
-            and unit is not requested_unit
-            and is_descendant_or_self(requested_unit, unit)
+            for unit in reported_units
+            if unit is not requested_unit and is_descendant_or_self(requested_unit, unit)
         ]
         if not descendant_keys:
-            overlapping_keys = _reported_overlap_keys_for_join(
-                requested_unit,
-                [
-                    unit
-                    for reported_key, value in reported_values.items()
-                    if value > 0 and (unit := registry.units.get(reported_key)) is not None
-                ],
-            )
+            overlapping_keys = _reported_overlap_keys_for_join(registry, requested_unit, reported_units)
             if not overlapping_keys:
                 return 0
 
@@ -333,18 +499,14 @@ class Usage:
 
 
 def _reported_overlap_keys_for_join(
-    requested_unit: UnitDef, reported_units: Sequence[UnitDef]
+    registry: UnitRegistry, requested_unit: UnitDef, reported_units: Sequence[UnitDef]
 ) -> tuple[str, str] | None:
-    from genai_prices.decompose import is_descendant_or_self
-
     sorted_units = sorted(reported_units, key=lambda unit: unit.usage_key)
     for index, left in enumerate(sorted_units):
         for right in sorted_units[index + 1 :]:
-            if not left.is_compatible_with(right):
+            if left.is_ancestor_or_self_of(right) or right.is_ancestor_or_self_of(left):
                 continue
-            if is_descendant_or_self(left, right) or is_descendant_or_self(right, left):
-                continue
-            if requested_unit.dimensions == {**left.dimensions, **right.dimensions}:
+            if registry.find_join(left, right) is requested_unit:
                 return left.usage_key, right.usage_key
 
     return None
@@ -380,20 +542,83 @@ class Provider:
     """
     models: list[ModelInfo] = dataclasses.field(default_factory=list)
     """List of models supported by this provider"""
+    _model_index: ModelMatchIndex | None = dataclasses.field(default=None, init=False, repr=False, compare=False)
+    _compiled_model_match: CompiledMatch | None = dataclasses.field(default=None, init=False, repr=False, compare=False)
+    _compiled_provider_match: CompiledMatch | None = dataclasses.field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    _fallback_model_index: FallbackModelIndex | None = dataclasses.field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def find_model(self, model_ref: str, *, all_providers: list[Provider] | None = None) -> ModelInfo | None:
         model_ref = model_ref.lower()
-        for model in self.models:
-            if model.is_match(model_ref):
-                return model
         if self.fallback_model_providers and all_providers:
-            for provider_id in self.fallback_model_providers:
-                provider = next((p for p in all_providers if p.id == provider_id), None)
-                if provider:
-                    # don't pass all_providers when falling back, so we can only have one step of fallback
-                    if model := provider.find_model(model_ref):
-                        return model
-        return None
+            return self.fallback_model_index(all_providers).find(model_ref)
+        return self.model_index().find(model_ref)
+
+    def is_model_match(self, model_ref: str) -> bool:
+        """Whether `model_match` matches `model_ref`, using the compiled form of `model_match`.
+
+        Like `model_match.is_match`, literal clauses ignore case while `regex` clauses are given `model_ref` unchanged.
+        """
+        if self.model_match is None:
+            return False
+        self._compiled_model_match = compiled = CompiledMatch.for_clause(
+            self._compiled_model_match, self.model_match, lowercase=False
+        )
+        return compiled.is_match(model_ref)
+
+    def is_provider_match(self, provider_id: str) -> bool:
+        """Whether `provider_match` matches `provider_id`, using the compiled form of `provider_match`.
+
+        Like `provider_match.is_match`, literal clauses ignore case while `regex` clauses are given `provider_id` unchanged.
+        """
+        if self.provider_match is None:
+            return False
+        self._compiled_provider_match = compiled = CompiledMatch.for_clause(
+            self._compiled_provider_match, self.provider_match, lowercase=False
+        )
+        return compiled.is_match(provider_id)
+
+    def model_index(self) -> ModelMatchIndex:
+        """Return the compiled index used to match model references against `models`.
+
+        The index is built when a `DataSnapshot` is created, or lazily on first use, and is rebuilt if `models` is
+        replaced or changes length. Call `build_model_index()` after modifying `models` in place.
+        """
+        index = self._model_index
+        if index is None or not index.is_current(self.models):
+            index = self.build_model_index()
+        return index
+
+    def build_model_index(self) -> ModelMatchIndex:
+        """(Re)build the compiled index used to match model references against `models`."""
+        self._model_index = index = ModelMatchIndex(self.models)
+        return index
+
+    def fallback_model_index(self, all_providers: list[Provider]) -> ModelMatchIndex:
+        """Return the compiled index used to match model references against `models`, then against the models of
+        each of `fallback_model_providers` found in `all_providers`.
+
+        Like `model_index()`, the index is built when a `DataSnapshot` is created, or lazily on first use, and is
+        rebuilt if any of the lists it was built from are replaced or change length.
+        """
+        fallback = self._fallback_model_index
+        provider_ids = self.fallback_model_providers or []
+        if fallback is None or not fallback.is_current(self.models, provider_ids, all_providers):
+            return self.build_fallback_model_index(all_providers)
+        return fallback.index
+
+    def build_fallback_model_index(self, all_providers: list[Provider]) -> ModelMatchIndex:
+        """(Re)build the compiled index over `models` and the models of the fallback providers in `all_providers`.
+
+        Fallback providers' own fallbacks are not followed, so there's only one step of fallback.
+        """
+        fallback = FallbackModelIndex(self.models, self.fallback_model_providers or [], all_providers)
+        self._fallback_model_index = fallback
+        return fallback.index
 
     def extract_usage(self, response_data: Any, *, api_flavor: str = 'default') -> tuple[str | None, Usage]:
         """Extract model name and usage information from a response.
@@ -408,17 +633,35 @@ class Provider:
         Returns:
             tuple[str, Usage]: The extracted model name and usage information.
         """
+        return self._find_extractor(api_flavor).extract(response_data)
+
+    def extract_usage_from_bytes(
+        self, body: bytes | bytearray, *, api_flavor: str = 'default'
+    ) -> tuple[str | None, Usage]:
+        """Extract model name and usage information from a raw JSON response body, see `UsageExtractor.extract_from_bytes`.
+
+        Args:
+            body: The JSON response body from the provider's API.
+            api_flavor: The flavor of API used for this request.
+
+        Raises:
+            ValueError: If the response body is invalid or the API flavor is not found.
+
+        Returns:
+            tuple[str, Usage]: The extracted model name and usage information.
+        """
+        return self._find_extractor(api_flavor).extract_from_bytes(body)
+
+    def _find_extractor(self, api_flavor: str) -> UsageExtractor:
         if self.extractors is None:
             raise ValueError('No extraction logic defined for this provider')
 
         try:
-            extractor = next(e for e in self.extractors if e.api_flavor == api_flavor)
+            return next(e for e in self.extractors if e.api_flavor == api_flavor)
         except StopIteration as e:
             fs = ', '.join(e.api_flavor for e in self.extractors)
             raise ValueError(f'Unknown api_flavor {api_flavor!r}, allowed values: {fs}') from e
 
-        return extractor.extract(response_data)
-
     def summary(self) -> str:
         return f'Provider(id={self.id!r}, name={self.name!r}, ...)'
 
@@ -450,14 +693,18 @@ class UsageExtractor:
     """Name of the API flavor, only needed when a provider has multiple flavors, e.g. OpenAI has `chat` and `responses`."""
     model_path: ExtractPath = 'model'
     """Path to the model name in the response."""
+    streaming: UsageExtractorStreaming | None = None
+    """How usage is reported when the response is streamed, `None` if usage can't be extracted from streams."""
     _registry: InitVar[UnitRegistry | None] = None
     _reported_usage_keys: frozenset[str] = field(init=False, repr=False, compare=False)
+    _plan: _ExtractorPlan = field(init=False, repr=False, compare=False)
 
     def __post_init__(self, _registry: UnitRegistry | None) -> None:
         reported_usage_keys = (
             _registry._reported_usage_keys if _registry is not None else _reported_usage_keys()  # pyright: ignore[reportPrivateUsage]
         )
         object.__setattr__(self, '_reported_usage_keys', reported_usage_keys)
+        object.__setattr__(self, '_plan', _ExtractorPlan(self, reported_usage_keys))
 
         invalid_destinations = {mapping.dest for mapping in self.mappings} - reported_usage_keys
         if invalid_destinations:
@@ -480,153 +727,225 @@ class UsageExtractor:
         Returns:
             tuple[str, Usage]: The extracted model name and usage information.
         """
-        model_name = _extract_path(self.model_path, response_data, str, False, [])
+        plan = self._plan
+        response_values = plan.response.resolve(response_data)
+        model_name = response_values[plan.response.path_nodes[0]]
+        if not isinstance(model_name, str):
+            model_name = None
 
-        root = self.root
-        if isinstance(root, str):
-            root = [root]
-
-        usage_obj = cast(dict[str, Any], _extract_path(root, response_data, Mapping, True, []))
+        usage_obj = response_values[plan.response.path_nodes[1]]
+        if not isinstance(usage_obj, Mapping):
+            raise extraction_error(plan.root, (), usage_obj, 'Mapping')
 
         values: dict[str, UsageValue] = {}
-        values_set = False
-        supported_mappings = 0
-        for mapping in self.mappings:
-            if mapping.dest not in self._reported_usage_keys:
+        usage_values = plan.usage.resolve(usage_obj)
+        for (dest, required), path, node in zip(plan.mappings, plan.usage.paths, plan.usage.path_nodes):
+            value = usage_values[node]
+            if type(value) not in _PLAIN_USAGE_TYPES and not isinstance(value, Integral | float | Decimal):
+                if required:
+                    raise extraction_error(path, plan.root, value, 'int or float or Decimal')
                 continue
-            supported_mappings += 1
-            value = _extract_path(mapping.path, usage_obj, (Integral, float, Decimal), mapping.required, root)
-            if value is not None:
-                value = validate_usage_value(mapping.dest, value)
-                if mapping.dest not in values:
-                    values[mapping.dest] = value
-                else:
-                    values[mapping.dest] = add_usage_values(values[mapping.dest], value)
-                values_set = True
-        if supported_mappings and not values_set:
+
+            value = validate_usage_value(dest, value)
+            if dest not in values:
+                values[dest] = value
+            else:
+                values[dest] = add_usage_values(values[dest], value)
+        if plan.mappings and not values:
             raise ValueError(f'No usage information found at {self.root}')
-        return model_name, Usage(**values)
-
-
-E = TypeVar('E')
-
-
-@overload
-def _extract_path(
-    path: ExtractPath,
-    data: Any,
-    extract_type: type[E] | tuple[type[E], ...],
-    required: Literal[True],
-    data_path: Sequence[str | ArrayMatch],
-) -> E: ...
-
-
-@overload
-def _extract_path(
-    path: ExtractPath,
-    data: Any,
-    extract_type: type[E] | tuple[type[E], ...],
-    required: Literal[False],
-    data_path: Sequence[str | ArrayMatch],
-) -> E | None: ...
-
-
-def _extract_path(
-    path: ExtractPath,
-    data: Any,
-    extract_type: type[E] | tuple[type[E], ...],
-    required: bool,
-    data_path: Sequence[str | ArrayMatch],
-) -> E | None:
-    if isinstance(path, str):
-        path = [path]
-
-    *steps, last = path
-    last = cast(str, last)
-
-    error_path: list[str | ArrayMatch] = []
-    for step in steps:
-        error_path.append(step)
-        if isinstance(step, ArrayMatch):
-            if not _is_sequence(data):
+        return model_name, _usage_from_values(values)
+
+    def extract_from_bytes(self, body: bytes | bytearray) -> tuple[str | None, Usage]:
+        """Extract model name and usage information from a raw JSON response body.
+
+        Only the values at `model_path` and `root` are decoded, the rest of the body is skipped over without being
+        decoded or fully validated, so large responses, e.g. with long completions or images, needn't be decoded.
+        The result is the same as `extract(json.loads(body))`.
+
+        Args:
+            body: The JSON response body, encoded as UTF-8.
+
+        Raises:
+            ValueError: If the body isn't valid JSON where it's read, or no usage information is found at the root.
+
+        Returns:
+            tuple[str, Usage]: The extracted model name and usage information.
+        """
+        return self.extract(select_json(body, self._plan.selection))
+
+
+@dataclass
+class UsageExtractorStreaming:
+    """How usage is reported in the chunks of a streamed response."""
+
+    merge: Literal['replace', 'sum'] = 'replace'
+    """How values of the same field from successive chunks are combined.
+
+    `replace` when each chunk reports the usage so far, so the latest value is used, `sum` when each chunk only
+    reports its own usage, e.g. one of several responses in a session.
+    """
+    response_paths: list[ExtractPath] | None = None
+    """Paths to objects in a chunk shaped like a whole response, e.g. Anthropic's `message_start` event has the message
+    under `message`.
+
+    `root` and `model_path` are followed from each of these objects and from the chunk itself.
+    """
+
+
+class StreamingUsageExtractor:
+    """Extract usage from a streamed response one chunk at a time, e.g. the events of a server-sent events stream.
+
+    Chunks are read with the provider's `UsageExtractor` for the API flavor, values from successive chunks are
+    combined as declared by its `streaming`. Only the combined value of each mapping is kept, so memory doesn't grow
+    with the length of the stream. Call `finish` once the stream has ended.
+    """
+
+    __slots__ = 'provider', 'extractor', 'model_ref', '_snapshot', '_plan', '_stream', '_values', '_found_usage'
+
+    def __init__(self, provider: Provider, api_flavor: str = 'default', *, snapshot: DataSnapshot | None = None):
+        """Create an extractor for one streamed response.
+
+        Args:
+            provider: The provider which streamed the response.
+            api_flavor: The flavor of API used for the request.
+            snapshot: The data snapshot used to find the model when the stream ends, the current snapshot if `None`.
+
+        Raises:
+            ValueError: If the API flavor is not found, or streamed usage isn't described for it.
+        """
+        extractor = provider._find_extractor(api_flavor)  # pyright: ignore[reportPrivateUsage]
+        stream = extractor._plan.stream  # pyright: ignore[reportPrivateUsage]
+        if stream is None:
+            raise ValueError(f'Usage extraction from streams is not supported for {provider.id} {api_flavor!r} API')
+        self.provider = provider
+        self.extractor = extractor
+        self.model_ref: str | None = None
+        """The latest model name found in the stream."""
+        self._snapshot = snapshot
+        self._plan = extractor._plan  # pyright: ignore[reportPrivateUsage]
+        self._stream = stream
+        self._values: list[UsageValue | None] = [None] * len(self._plan.mappings)
+        self._found_usage = False
+
+    def feed(self, chunk: Any) -> None:
+        """Add the model name and usage from a chunk of the stream, generally the decoded JSON data of an event.
+
+        Chunks without usage information, e.g. content deltas, are ignored.
+        """
+        self._feed_response(chunk)
+        responses = self._stream.responses
+        if responses.paths:
+            resolved = responses.resolve(chunk)
+            for node in responses.path_nodes:
+                if type(response := resolved[node]) is not Missing:
+                    self._feed_response(response)
+
+    def feed_bytes(self, data: bytes | bytearray) -> None:
+        """Add the model name and usage from a chunk of the stream given as raw JSON, e.g. the data of an event.
+
+        Like `UsageExtractor.extract_from_bytes`, only the model name and usage are decoded. OpenAI's `[DONE]` marker
+        at the end of a stream is ignored.
+        """
+        if not data.startswith(b'[DONE]'):
+            self.feed(select_json(data, self._stream.selection))
+
+    def finish(self) -> ExtractedUsage:
+        """Return the usage of the whole stream, with the model found from the last model name in the stream.
+
+        Raises:
+            ValueError: If no chunk had usage information, or a required value wasn't in any chunk.
+            LookupError: If the model can't be found.
+        """
+        plan = self._plan
+        if not self._found_usage:
+            raise ValueError(f'No usage information found at {self.extractor.root} in the stream')
+
+        values: dict[str, UsageValue] = {}
+        for (dest, required), path, value in zip(plan.mappings, plan.usage.paths, self._values):
+            if value is None:
                 if required:
-                    raise ValueError(
-                        f'Expected `{_dot_path(data_path, error_path)}` value to be a sequence, got {_type_name(data)}'
-                    )
-                else:
-                    return None
-            if extracted_data := step.extract(data):
-                data = extracted_data
-            elif required:
-                raise ValueError(f'Unable to find item at `{_dot_path(data_path, error_path)}`')
+                    raise extraction_error(path, plan.root, Missing(len(path), 'missing', None), 'int or float')
+            elif dest not in values:
+                values[dest] = value
             else:
-                return None
-        else:
-            if not _expect_mapping(data, required, data_path, error_path):
-                return None
-            try:
-                data = data[step]
-            except KeyError as e:
-                if required:
-                    raise ValueError(f'Missing value at `{_dot_path(data_path, error_path)}`') from e
-                else:
-                    return None
+                values[dest] = add_usage_values(values[dest], value)
+        if plan.mappings and not values:
+            raise ValueError(f'No usage information found at {self.extractor.root}')
+
+        from genai_prices.data_snapshot import get_snapshot
+
+        snapshot = self._snapshot or get_snapshot()
+        return snapshot._extracted_usage(self.provider, self.model_ref, _usage_from_values(values))  # pyright: ignore[reportPrivateUsage]
+
+    def _feed_response(self, response: Any) -> None:
+        plan = self._plan
+        response_values = plan.response.resolve(response)
+        model_name = response_values[plan.response.path_nodes[0]]
+        if isinstance(model_name, str):
+            self.model_ref = model_name
+
+        usage_obj = response_values[plan.response.path_nodes[1]]
+        if not isinstance(usage_obj, Mapping):
+            return
+        self._found_usage = True
+
+        values = self._values
+        merge_sum = self._stream.sum
+        usage_values = plan.usage.resolve(usage_obj)
+        for index, ((dest, _), node) in enumerate(zip(plan.mappings, plan.usage.path_nodes)):
+            value = usage_values[node]
+            # values missing from a chunk, or not yet known, e.g. `null`, leave the value from earlier chunks
+            if type(value) not in _PLAIN_USAGE_TYPES and not isinstance(value, Integral | float | Decimal):
+                continue
+            value = validate_usage_value(dest, value)
+            current = values[index]
+            values[index] = add_usage_values(current, value) if merge_sum and current is not None else value
 
-    if data is None and not required:
-        return None
 
-    if not _expect_mapping(data, required, data_path, error_path):
-        return None
+class _ExtractorPlan:
+    """A `UsageExtractor` compiled for extraction, the paths of its supported mappings are read once each."""
 
-    try:
-        value = data[last]
-    except KeyError as e:
-        if required:
-            error_path.append(last)
-            raise ValueError(f'Missing value at `{_dot_path(data_path, error_path)}`') from e
-        else:
-            return None
-    else:
-        if isinstance(value, extract_type):
-            return value
-        elif required:
-            error_path.append(last)
-            raise ValueError(
-                f'Expected `{_dot_path(data_path, error_path)}` value to be a {_extract_type_name(extract_type)}, '
-                f'got {_type_name(value)}'
-            )
+    __slots__ = 'root', 'response', 'selection', 'mappings', 'usage', 'stream'
 
+    def __init__(self, extractor: UsageExtractor, reported_usage_keys: frozenset[str]) -> None:
+        self.root = (extractor.root,) if isinstance(extractor.root, str) else tuple(extractor.root)
+        self.response = PathPlan([extractor.model_path, self.root])
+        self.selection = json_selection([extractor.model_path, self.root])
+        supported = [mapping for mapping in extractor.mappings if mapping.dest in reported_usage_keys]
+        self.mappings = [(mapping.dest, mapping.required) for mapping in supported]
+        self.usage = PathPlan([mapping.path for mapping in supported])
+        self.stream = None if extractor.streaming is None else _StreamPlan(extractor.streaming, self.response.paths)
 
-def _expect_mapping(
-    data: Any, required: bool, data_path: Sequence[str | ArrayMatch], error_path: Sequence[str | ArrayMatch]
-) -> TypeGuard[Mapping[str, Any]]:
-    if _is_mapping(data):
-        return True
-    if required:
-        raise ValueError(f'Expected `{_dot_path(data_path, error_path)}` value to be a dict, got {_type_name(data)}')
-    return False
 
+class _StreamPlan:
+    """The `streaming` of a `UsageExtractor` compiled for extraction."""
 
-def _is_mapping(item: Any) -> TypeGuard[Mapping[str, Any]]:
-    return isinstance(item, Mapping)
+    __slots__ = 'sum', 'responses', 'selection'
 
+    def __init__(self, streaming: UsageExtractorStreaming, response_paths: list[tuple[str | ArrayMatch, ...]]) -> None:
+        self.sum = streaming.merge == 'sum'
+        self.responses = PathPlan(streaming.response_paths or [])
+        nested_paths = [prefix + path for prefix in self.responses.paths for path in response_paths]
+        self.selection = json_selection([*response_paths, *nested_paths])
 
-def _is_sequence(item: Any) -> TypeGuard[Sequence[Any]]:
-    return isinstance(item, Sequence)
 
+_PLAIN_USAGE_TYPES = int, float
 
-def _dot_path(data_path: Sequence[str | ArrayMatch], error_path: Sequence[str | ArrayMatch]) -> str:
-    return '.'.join([str(p) for p in data_path] + [str(p) for p in error_path])
 
+def _usage_from_values(values: dict[str, UsageValue]) -> Usage:
+    layout = _current_usage_layout()
+    if not values.keys() <= layout.indexes.keys():
+        # extractors built with another unit registry may have destinations the current registry doesn't report
+        return Usage(**values)
 
-def _type_name(v: Any) -> str:
-    return 'None' if v is None else type(v).__name__
+    usage = object.__new__(Usage)
+    reported = [(layout.indexes[key], key, value) for key, value in values.items()]
+    usage._store_reported(layout, reported)  # pyright: ignore[reportPrivateUsage]
+    return usage
 
 
-def _extract_type_name(extract_type: type[object] | tuple[type[object], ...]) -> str:
-    if isinstance(extract_type, tuple):
-        return ' or '.join('int' if item is Integral else item.__name__ for item in extract_type)
-    return extract_type.__name__
+def _is_mapping(item: Any) -> TypeGuard[Mapping[str, Any]]:
+    return isinstance(item, Mapping)
 
 
 def _reported_usage_keys() -> frozenset[str]:
@@ -641,11 +960,71 @@ def _reported_usage_key_order() -> tuple[str, ...]:
     return _get_registry()._reported_usage_keys_in_order  # pyright: ignore[reportPrivateUsage]
 
 
-def _raw_usage_value(obj: object, key: str) -> UsageValue | None:
-    value = getattr(obj, key, None)
-    if value is None:
-        return None
-    return cast(UsageValue, value)
+class _UsageLayout:
+    """Positions of the reported usage keys of a unit registry in the storage of `Usage`."""
+
+    __slots__ = 'keys', 'indexes'
+
+    def __init__(self, keys: tuple[str, ...]) -> None:
+        self.keys = keys
+        self.indexes = {key: index for index, key in enumerate(keys)}
+
+
+_usage_layout: _UsageLayout | None = None
+
+
+def _current_usage_layout() -> _UsageLayout:
+    global _usage_layout
+
+    keys = _reported_usage_key_order()
+    layout = _usage_layout
+    if layout is None or layout.keys is not keys:
+        _usage_layout = layout = _UsageLayout(keys)
+    return layout
+
+
+class _RawUsagePlan:
+    """Which attributes to read reported usage values from, for objects of one type, see `Usage.from_raw`.
+
+    Usage keys defined on the type, e.g. properties, slots or dataclass defaults, are read with `getattr`, other
+    values are read from the instance `__dict__`, and the `__pydantic_extra__` of pydantic models. Types which
+    customise attribute access fall back to `getattr` for every reported usage key.
+    """
+
+    __slots__ = 'layout', 'type_keys', 'read_dict', 'read_pydantic_extra'
+
+    def __init__(self, cls: type, layout: _UsageLayout) -> None:
+        self.layout = layout
+        defined = set[str]().union(*(vars(base) for base in cls.__mro__))
+        self.type_keys = tuple(key for key in layout.keys if key in defined)
+        self.read_pydantic_extra = issubclass(cls, pydantic.BaseModel)
+        custom_access = cls.__getattribute__ is not object.__getattribute__ or hasattr(cls, '__getattr__')
+        self.read_dict = '__dict__' in defined and (self.read_pydantic_extra or not custom_access)
+        if custom_access and not self.read_pydantic_extra:
+            self.type_keys = layout.keys
+
+    def items(self, obj: object) -> Iterator[tuple[str, Any]]:
+        type_keys = self.type_keys
+        for key in type_keys:
+            yield key, getattr(obj, key, None)
+        if self.read_dict:
+            for key, value in vars(obj).items():
+                if key not in type_keys:
+                    yield key, value
+        if self.read_pydantic_extra and (extra := cast(pydantic.BaseModel, obj).__pydantic_extra__):
+            for key, value in extra.items():
+                if key not in type_keys:
+                    yield key, value
+
+
+_raw_usage_plans: weakref.WeakKeyDictionary[type, _RawUsagePlan] = weakref.WeakKeyDictionary()
+
+
+def _raw_usage_plan(cls: type, layout: _UsageLayout) -> _RawUsagePlan:
+    plan = _raw_usage_plans.get(cls)
+    if plan is None or plan.layout is not layout:
+        _raw_usage_plans[cls] = plan = _RawUsagePlan(cls, layout)
+    return plan
 
 
 @dataclass
@@ -675,19 +1054,38 @@ class ModelInfo:
 
     If no conditional models match the conditions, the first one is used.
     """
+    _compiled_match: CompiledMatch | None = dataclasses.field(default=None, init=False, repr=False, compare=False)
+    _price_timeline: PriceTimeline | None = dataclasses.field(default=None, init=False, repr=False, compare=False)
 
     def is_match(self, model_ref: str) -> bool:
-        return self.match.is_match(model_ref.lower())
+        self._compiled_match = compiled = CompiledMatch.for_clause(self._compiled_match, self.match)
+        return compiled.is_match(model_ref.lower())
 
     def get_prices(self, request_timestamp: datetime) -> ModelPrice:
         if isinstance(self.prices, ModelPrice):
             return self.prices
         else:
-            # reversed because the last price takes precedence
-            for conditional_price in reversed(self.prices):
-                if conditional_price.constraint is None or conditional_price.constraint.active(request_timestamp):
-                    return conditional_price.prices
-            return self.prices[0].prices
+            return self.price_timeline().find(request_timestamp)
+
+    def get_current_prices(self) -> ModelPrice:
+        """Return the prices active now, like `get_prices(datetime.now(tz=timezone.utc))`.
+
+        For conditional prices, the result is cached until the next boundary of the price timeline.
+        """
+        if isinstance(self.prices, ModelPrice):
+            return self.prices
+        elif type(self).get_prices is not ModelInfo.get_prices:
+            return self.get_prices(datetime.now(tz=timezone.utc))
+        else:
+            return self.price_timeline().current()
+
+    def price_timeline(self) -> PriceTimeline:
+        """Return the `PriceTimeline` of this model's conditional prices, rebuilding it if `prices` has changed."""
+        assert not isinstance(self.prices, ModelPrice), 'price_timeline requires conditional prices'
+        timeline = self._price_timeline
+        if timeline is None or not timeline.is_current(self.prices):
+            self._price_timeline = timeline = PriceTimeline(self.prices)
+        return timeline
 
     def calc_price(
         self,
@@ -696,12 +1094,15 @@ class ModelInfo:
         *,
         genai_request_timestamp: datetime | None = None,
         auto_update_timestamp: datetime | None = None,
+        compiled: bool = False,
+        numeric: NumericBackend = 'decimal',
     ) -> PriceCalculation:
-        """Calculate the price for the given usage."""
-        genai_request_timestamp = genai_request_timestamp or datetime.now(tz=timezone.utc)
+        """Calculate the price for the given usage, see `ModelPrice.calc_price_with` for `compiled` and `numeric`.
 
-        model_price = self.get_prices(genai_request_timestamp)
-        price = model_price.calc_price(usage)
+        If the model price is a subclass overriding `ModelPrice.calc_price`, that's used instead: `compiled` is ignored
+        and a `numeric` backend other than `'decimal'` raises a `ValueError`.
+        """
+        model_price, price = self._calc_price(usage, genai_request_timestamp, compiled, numeric)
         return PriceCalculation(
             input_price=price['input_price'],
             output_price=price['output_price'],
@@ -712,6 +1113,24 @@ class ModelInfo:
             auto_update_timestamp=auto_update_timestamp,
         )
 
+    def _calc_price(
+        self, usage: AbstractUsage, genai_request_timestamp: datetime | None, compiled: bool, numeric: NumericBackend
+    ) -> tuple[ModelPrice, CalcPrice]:
+        if genai_request_timestamp is None:
+            model_price = self.get_current_prices()
+        else:
+            model_price = self.get_prices(genai_request_timestamp)
+        if type(model_price).calc_price is ModelPrice.calc_price:
+            return model_price, model_price.calc_price_with(usage, compiled=compiled, numeric=numeric)
+        elif numeric != 'decimal':
+            raise ValueError(
+                f'The {numeric!r} numeric backend cannot be used with {type(model_price).__name__}, '
+                'which overrides `calc_price`'
+            )
+        else:
+            # subclasses overriding `calc_price` change how the price is calculated, so `compiled` is ignored
+            return model_price, model_price.calc_price(usage)
+
     def summary(self) -> str:
         return f'Model(id={self.id!r}, name={self.name!r}, ...)'
 
@@ -722,9 +1141,27 @@ class CalcPrice(TypedDict):
     total_price: Decimal
 
 
+NumericBackend = Literal['decimal', 'fixed', 'float']
+"""The arithmetic used to calculate prices, all return `Decimal` prices in USD.
+
+* `'decimal'`: `Decimal` arithmetic under the default context, the reference.
+* `'fixed'`: integer arithmetic in nano-dollars (1e-9 USD), with prices converted to nano-dollars per `per` units.
+  Each priced unit's price is rounded to the nearest nano-dollar, halves rounding up, whether usage is an integer or
+  not, as are prices converted to nano-dollars. If a price has more than 9 decimal places, each priced unit's price is
+  also off by up to 0.5 nano-dollars per `per` units of usage, so `total_price` is within `0.5e-9 * n` USD of the
+  reference for `n` priced units (or more for prices with more than 9 decimal places).
+* `'float'`: binary floating point. Each priced unit's price has a relative error of at most about 4 ulp (1e-15), so
+  `total_price` is within about 1e-15 of the reference relative to it, provided usage values are below 2**53.
+"""
+
+
 class ModelPrice:
     """Set of prices for using a model"""
 
+    # prices are stored in `__dict__`, the compiled plan is kept separately in a slot
+    __slots__ = '__dict__', '_price_plan'
+    _price_plan: PricePlan | None
+
     def __init__(
         self,
         **price_kwargs: Decimal | TieredPrices | None,
@@ -736,6 +1173,20 @@ class ModelPrice:
         parts = [f'{key}={value!r}' for key, value in self.__dict__.items() if value is not None]
         return f'{type(self).__name__}({", ".join(parts)})'
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        object.__setattr__(self, name, value)
+        if not name.startswith('_'):
+            object.__setattr__(self, '_price_plan', None)
+
+    def __getstate__(self) -> dict[str, Any]:
+        # the compiled plan refers to the unit registry, so it's recompiled rather than copied or pickled
+        return dict(self.__dict__)
+
+    def __delattr__(self, name: str) -> None:
+        object.__delattr__(self, name)
+        if not name.startswith('_'):
+            object.__setattr__(self, '_price_plan', None)
+
     def __eq__(self, other: object) -> Any:
         if type(other) is not type(self):
             return NotImplemented
@@ -747,42 +1198,83 @@ class ModelPrice:
         return {key: value for key, value in self.__dict__.items() if not key.startswith('_') and value is not None}
 
     def calc_price(self, usage: AbstractUsage) -> CalcPrice:
-        """Calculate the price of usage in USD with this model price."""
+        """Calculate the price of usage in USD with this model price.
+
+        Subclasses may override this to change how prices are calculated, e.g. to price custom usage.
+        """
+        return self._calc_price(usage, False, 'decimal')
+
+    def calc_price_with(
+        self, usage: AbstractUsage, *, compiled: bool = False, numeric: NumericBackend = 'decimal'
+    ) -> CalcPrice:
+        """Calculate the price of usage in USD with this model price, choosing how it's calculated.
+
+        This doesn't call `calc_price`, so ignores any override of it in a subclass.
+
+        Args:
+            usage: The usage to calculate the price for.
+            compiled: Whether to use a pricing function generated for the shape of this price, which is faster once
+                compiled but compiling it takes much longer than a single calculation. Results are identical. Only
+                used with the `'decimal'` numeric backend.
+            numeric: The arithmetic used, see `NumericBackend` for the error bounds of each.
+        """
+        return self._calc_price(usage, compiled, numeric)
+
+    def _calc_price(self, usage: AbstractUsage, compiled: bool, numeric: NumericBackend) -> CalcPrice:
         from genai_prices.units import _get_registry  # pyright: ignore[reportPrivateUsage]
-        from genai_prices.validation import validate_priced_units
 
-        registry = _get_registry()
-        resolved_prices = _collect_resolved_model_prices(self, registry)
-        validate_priced_units(tuple(unit for unit, _ in resolved_prices), registry)
+        plan = self.price_plan(_get_registry())
+        if plan.warning is not None:
+            warnings.warn(plan.warning, UserWarning, stacklevel=3)
+        if plan.error is not None:
+            raise ValueError(plan.error)
 
         usage_data = Usage.from_raw(usage)
-        priced_counts = _compute_registry_priced_counts(resolved_prices, usage_data)
+        if compiled and numeric == 'decimal':
+            return plan.compiled()(usage_data)
+        return plan.calc_price(usage_data, numeric)
 
-        input_price = Decimal(0)
-        output_price = Decimal(0)
-        total_price = Decimal(0)
-        # Reading input_tokens can trigger lazy inference errors; only do it when
-        # tiered pricing actually needs the threshold.
-        total_input_tokens = (
-            usage_data.input_tokens if any(isinstance(price, TieredPrices) for _, price in resolved_prices) else 0
-        )
+    def calc_price_batch(
+        self, columns: Mapping[str, npt.ArrayLike], *, numeric: Literal['fixed', 'float'] = 'fixed'
+    ) -> BatchPrices:
+        """Calculate the price of many rows of usage with this model price, using NumPy.
 
-        for unit, price in resolved_prices:
-            unit_price = calc_unit_price(
-                price,
-                priced_counts[unit.usage_key],
-                total_input_tokens,
-                unit.per,
-            )
-            total_price += unit_price
+        Requires the `numpy` extra: `pip install "genai-prices[numpy]"`.
 
-            direction = unit.dimensions.get('direction')
-            if direction == 'input':
-                input_price += unit_price
-            elif direction == 'output':
-                output_price += unit_price
+        Args:
+            columns: Mapping of usage key to a one-dimensional array (or anything `numpy.asarray` accepts) of that
+                usage for each row, all of the same length. Missing keys are inferred for each row like `Usage` does.
+            numeric: With `'fixed'`, columns must be integers and prices are `int64` arrays of nano-dollars, equal to
+                the results of `calc_price_with(usage, numeric='fixed')` multiplied by 1e9. With `'float'`, prices are
+                `float64` arrays in USD, with the error bounds of the `'float'` numeric backend.
 
-        return {'input_price': input_price, 'output_price': output_price, 'total_price': total_price}
+        Returns:
+            Input, output and total price arrays, with a value for each row.
+        """
+        from genai_prices._batch import calc_price_batch
+        from genai_prices.units import _get_registry  # pyright: ignore[reportPrivateUsage]
+
+        plan = self.price_plan(_get_registry())
+        if plan.warning is not None:
+            warnings.warn(plan.warning, UserWarning, stacklevel=2)
+        if plan.error is not None:
+            raise ValueError(plan.error)
+        return calc_price_batch(plan, columns, numeric)
+
+    def price_plan(self, registry: UnitRegistry) -> PricePlan:
+        """Return the `PricePlan` for this price and `registry`, compiling it on first use.
+
+        The plan is recompiled if a price attribute is set or deleted, or a different registry is used. Prices
+        modified in place (e.g. the tiers of a `TieredPrices`) aren't detected.
+        """
+        try:
+            plan = self._price_plan
+        except AttributeError:
+            plan = None
+        if plan is None or plan.registry is not registry:
+            plan = PricePlan(self, registry)
+            object.__setattr__(self, '_price_plan', plan)
+        return plan
 
     def __str__(self) -> str:
         from genai_prices.units import _get_registry  # pyright: ignore[reportPrivateUsage]
@@ -812,6 +1304,195 @@ class ModelPrice:
         raise AttributeError(f'{type(self).__name__!r} object has no attribute {name!r}')
 
 
+_NumberT = TypeVar('_NumberT', int, float)
+
+
+class PricePlan:
+    """Everything `ModelPrice.calc_price` needs which depends only on the price and the unit registry.
+
+    That is the resolved and validated prices, in calculation order, with their usage key, `per` and direction, any
+    warning or validation error, and the order in which priced usage is decomposed into leaf values.
+    """
+
+    __slots__ = (
+        'registry',
+        'warning',
+        'error',
+        'prices',
+        'has_tiers',
+        'has_requests',
+        'leaf_plan',
+        '_compiled',
+        '_fixed_prices',
+        '_float_prices',
+    )
+
+    def __init__(self, model_price: ModelPrice, registry: UnitRegistry) -> None:
+        from genai_prices.validation import validate_priced_units
+
+        self.registry = registry
+        self.warning: str | None = None
+        self.error: str | None = None
+        self.prices: tuple[tuple[str, Decimal | TieredPrices, int, str | None], ...] = ()
+        self.has_tiers = False
+        self.has_requests = False
+        self.leaf_plan: LeafDecompositionPlan | None = None
+        self._compiled: Callable[[Usage], CalcPrice] | None = None
+        # prices converted for the `'fixed'` and `'float'` numeric backends, when a `DataSnapshot` using that backend
+        # is created, or else on first use:
+        # `(usage_key, base price, (tier start, tier price) highest first, per, direction)`
+        self._fixed_prices: tuple[tuple[str, int, tuple[tuple[int, int], ...], int, str | None], ...] | None = None
+        self._float_prices: tuple[tuple[str, float, tuple[tuple[int, float], ...], int, str | None], ...] | None = None
+
+        resolved_prices, self.warning = _resolve_model_prices(model_price, registry)
+        try:
+            resolved = tuple(
+                (unit, _validate_model_price_value(price_key, value)) for price_key, unit, value in resolved_prices
+            )
+            validate_priced_units(tuple(unit for unit, _ in resolved), registry)
+        except ValueError as e:
+            self.error = str(e)
+            return
+
+        self.prices = tuple(
+            (unit.usage_key, price, unit.per, unit.dimensions.get('direction')) for unit, price in resolved
+        )
+        self.has_tiers = any(isinstance(price, TieredPrices) for _, price in resolved)
+        self.has_requests = any(unit.usage_key == 'requests' for unit, _ in resolved)
+        leaf_usage_keys = frozenset(unit.usage_key for unit, _ in resolved if unit.usage_key != 'requests')
+        if leaf_usage_keys:
+            self.leaf_plan = registry.leaf_decomposition_plan(leaf_usage_keys)
+
+    def priced_counts(self, usage: Usage) -> dict[str, UsageValue]:
+        """Return the count to price for each priced usage key."""
+        counts = {} if self.leaf_plan is None else self.leaf_plan.compute(usage)
+        if self.has_requests:
+            counts['requests'] = 1
+        return counts
+
+    def calc_price(self, usage: Usage, numeric: NumericBackend = 'decimal') -> CalcPrice:
+        """Calculate the price of usage with the plan's prices, using the arithmetic of `numeric`."""
+        if numeric == 'fixed':
+            return self._calc_fixed_price(usage)
+        elif numeric == 'float':
+            return self._calc_float_price(usage)
+        elif numeric != 'decimal':
+            raise ValueError(f'Unknown numeric backend {numeric!r}, expected one of {get_args(NumericBackend)}')
+
+        priced_counts = self.priced_counts(usage)
+
+        input_price = Decimal(0)
+        output_price = Decimal(0)
+        total_price = Decimal(0)
+        # Reading input_tokens can trigger lazy inference errors; only do it when
+        # tiered pricing actually needs the threshold.
+        total_input_tokens = usage.input_tokens if self.has_tiers else 0
+
+        for usage_key, price, per, direction in self.prices:
+            unit_price = calc_unit_price(price, priced_counts[usage_key], total_input_tokens, per)
+            total_price += unit_price
+
+            if direction == 'input':
+                input_price += unit_price
+            elif direction == 'output':
+                output_price += unit_price
+
+        return {'input_price': input_price, 'output_price': output_price, 'total_price': total_price}
+
+    def fixed_prices(self) -> tuple[tuple[str, int, tuple[tuple[int, int], ...], int, str | None], ...]:
+        """Return the prices in nano-dollars per `per` units, as used by the `'fixed'` numeric backend.
+
+        Each price is `(usage_key, base price, ((tier start, tier price), ...), per, direction)` with tiers highest
+        first.
+        """
+        prices = self._fixed_prices
+        if prices is None:
+            prices = self._fixed_prices = self._converted_prices(
+                lambda price: int(price.scaleb(9).to_integral_value(ROUND_HALF_UP))
+            )
+        return prices
+
+    def float_prices(self) -> tuple[tuple[str, float, tuple[tuple[int, float], ...], int, str | None], ...]:
+        """Return the prices as floats, as used by the `'float'` numeric backend, see `fixed_prices`."""
+        prices = self._float_prices
+        if prices is None:
+            prices = self._float_prices = self._converted_prices(float)
+        return prices
+
+    def _calc_fixed_price(self, usage: Usage) -> CalcPrice:
+        prices = self.fixed_prices()
+        priced_counts = self.priced_counts(usage)
+        total_input_tokens = usage.input_tokens if self.has_tiers else 0
+        input_nanos = output_nanos = total_nanos = 0
+        for usage_key, price, tiers, per, direction in prices:
+            for start, tier_price in tiers:
+                if total_input_tokens > start:
+                    price = tier_price
+                    break
+
+            count = priced_counts[usage_key]
+            # rounded to the nearest nano-dollar, halves up
+            if type(count) is int:
+                unit_nanos = (2 * price * count + per) // (2 * per)
+            else:
+                unit_nanos = int((price * usage_value_as_decimal(count) / per).to_integral_value(ROUND_HALF_UP))
+            total_nanos += unit_nanos
+            if direction == 'input':
+                input_nanos += unit_nanos
+            elif direction == 'output':
+                output_nanos += unit_nanos
+
+        return {
+            'input_price': Decimal(input_nanos).scaleb(-9),
+            'output_price': Decimal(output_nanos).scaleb(-9),
+            'total_price': Decimal(total_nanos).scaleb(-9),
+        }
+
+    def _calc_float_price(self, usage: Usage) -> CalcPrice:
+        prices = self.float_prices()
+        priced_counts = self.priced_counts(usage)
+        total_input_tokens = usage.input_tokens if self.has_tiers else 0
+        input_price = output_price = total_price = 0.0
+        for usage_key, price, tiers, per, direction in prices:
+            for start, tier_price in tiers:
+                if total_input_tokens > start:
+                    price = tier_price
+                    break
+
+            unit_price = price * float(priced_counts[usage_key]) / per
+            total_price += unit_price
+            if direction == 'input':
+                input_price += unit_price
+            elif direction == 'output':
+                output_price += unit_price
+
+        return {
+            'input_price': Decimal(repr(input_price)),
+            'output_price': Decimal(repr(output_price)),
+            'total_price': Decimal(repr(total_price)),
+        }
+
+    def _converted_prices(
+        self, convert: Callable[[Decimal], _NumberT]
+    ) -> tuple[tuple[str, _NumberT, tuple[tuple[int, _NumberT], ...], int, str | None], ...]:
+        converted: list[tuple[str, _NumberT, tuple[tuple[int, _NumberT], ...], int, str | None]] = []
+        for usage_key, price, per, direction in self.prices:
+            if isinstance(price, TieredPrices):
+                tiers = tuple((tier.start, convert(tier.price)) for tier in reversed(price.tiers))
+                converted.append((usage_key, convert(price.base), tiers, per, direction))
+            else:
+                converted.append((usage_key, convert(price), (), per, direction))
+        return tuple(converted)
+
+    def compiled(self) -> Callable[[Usage], CalcPrice]:
+        """Return a function equivalent to `calc_price` generated for the shape of the plan, compiling it on first use."""
+        if self._compiled is None:
+            from genai_prices._codegen import compile_price_plan
+
+            self._compiled = compile_price_plan(self)
+        return self._compiled
+
+
 def _is_registered_price_key(name: str) -> bool:
     from genai_prices.units import _get_registry  # pyright: ignore[reportPrivateUsage]
 
@@ -846,9 +1527,11 @@ def calc_unit_price(
     return unit_price / per
 
 
-def _collect_resolved_model_prices(
+def _resolve_model_prices(
     model_price: ModelPrice, registry: UnitRegistry
-) -> tuple[tuple[UnitDef, Decimal | TieredPrices], ...]:
+) -> tuple[list[tuple[str, UnitDef, object]], str | None]:
+    """Return the registered price keys set on `model_price` with their units and (unvalidated) values, and a
+    warning message for any unregistered price keys."""
     stored_prices = [
         (price_key, value)
         for price_key, value in _iter_model_price_attr_items(model_price, registry)
@@ -859,19 +1542,16 @@ def _collect_resolved_model_prices(
         for price_key, _ in stored_prices
         if price_key not in registry._all_price_keys  # pyright: ignore[reportPrivateUsage]
     }
+    warning = None
     if unknown_price_keys:
-        bad_keys = ', '.join(sorted(unknown_price_keys))
-        warnings.warn(
-            f'Unsupported price key for standard pricing: {bad_keys}',
-            UserWarning,
-            stacklevel=3,
-        )
+        warning = f'Unsupported price key for standard pricing: {", ".join(sorted(unknown_price_keys))}'
 
-    return tuple(
-        (registry.unit_for_price_key(price_key), _validate_model_price_value(price_key, value))
+    resolved_prices = [
+        (price_key, registry.unit_for_price_key(price_key), value)
         for price_key, value in stored_prices
         if price_key not in unknown_price_keys
-    )
+    ]
+    return resolved_prices, warning
 
 
 def _validate_model_price_value(price_key: str, value: object) -> Decimal | TieredPrices:
@@ -901,21 +1581,6 @@ def _is_valid_price_decimal(value: object) -> TypeGuard[Decimal]:
     return isinstance(value, Decimal) and value.is_finite() and value >= 0
 
 
-def _compute_registry_priced_counts(
-    resolved_prices: Sequence[tuple[UnitDef, Decimal | TieredPrices]], usage: Usage
-) -> dict[str, UsageValue]:
-    from genai_prices.decompose import compute_leaf_values
-
-    counts: dict[str, UsageValue] = {}
-    priced_units_by_usage_key = {unit.usage_key: unit for unit, _ in resolved_prices if unit.usage_key != 'requests'}
-    if priced_units_by_usage_key:
-        counts.update(compute_leaf_values(set(priced_units_by_usage_key), usage, priced_units_by_usage_key))
-    if any(unit.usage_key == 'requests' for unit, _ in resolved_prices):
-        counts['requests'] = 1
-
-    return counts
-
-
 def _iter_effective_model_price_keys(model_price: ModelPrice, registry: UnitRegistry) -> Iterator[str]:
     yielded_price_keys: set[str] = set()
     for unit in _iter_priced_registered_units(model_price, registry):
@@ -1027,6 +1692,121 @@ class TimeOfDateConstraint:
         return self.start_time <= request_timestamp.timetz() < self.end_time
 
 
+class PriceTimeline:
+    """A model's conditional prices indexed by start date and time of day, used by `ModelInfo.get_prices`.
+
+    The start dates of `StartDateConstraint`s split time into date segments, and within each segment the start and end
+    times of the `TimeOfDateConstraint`s which could apply split every day into windows. The price of each window is
+    resolved when the timeline is built, so finding the price for a timestamp is a bisect on its date and one on its
+    time of day.
+    """
+
+    __slots__ = 'source', 'source_length', 'start_dates', 'segments', '_current'
+
+    def __init__(self, conditional_prices: Sequence[ConditionalPrice]) -> None:
+        self.source = conditional_prices
+        self.source_length = len(conditional_prices)
+        self.start_dates = sorted(
+            {
+                conditional_price.constraint.start_date
+                for conditional_price in conditional_prices
+                if isinstance(conditional_price.constraint, StartDateConstraint)
+            }
+        )
+        # per date segment, the window boundaries and the price of each window: `prices[i]` applies from
+        # `boundaries[i - 1]` (or midnight) until `boundaries[i]` (or midnight)
+        self.segments: list[tuple[list[time], list[ModelPrice]]] = [
+            self._daily_windows(conditional_prices, segment_start) for segment_start in [None, *self.start_dates]
+        ]
+        # `(valid from, valid until, prices)` in seconds since the epoch, see `current`
+        self._current: tuple[float, float, ModelPrice] | None = None
+
+    def is_current(self, conditional_prices: Sequence[ConditionalPrice]) -> bool:
+        """Whether the timeline was built from `conditional_prices` and they haven't obviously changed since."""
+        return self.source is conditional_prices and self.source_length == len(conditional_prices)
+
+    def find(self, request_timestamp: datetime) -> ModelPrice:
+        """Return the prices which apply at `request_timestamp`."""
+        boundaries, prices = self.segments[bisect_right(self.start_dates, request_timestamp.date())]
+        if not boundaries:
+            return prices[0]
+        return prices[bisect_right(boundaries, request_timestamp.timetz())]
+
+    def current(self) -> ModelPrice:
+        """Return the prices which apply now, cached until the next date or time of day where they could change."""
+        return self.current_until()[0]
+
+    def current_until(self) -> tuple[ModelPrice, float]:
+        """Return the prices which apply now, and the time, in seconds since the epoch, until which they apply."""
+        now = _time.time()
+        current = self._current
+        if current is not None and current[0] <= now < current[1]:
+            return current[2], current[1]
+
+        timestamp = datetime.fromtimestamp(now, tz=timezone.utc)
+        prices = self.find(timestamp)
+        valid_until = self._next_boundary(timestamp)
+        self._current = now, valid_until, prices
+        return prices, valid_until
+
+    def _next_boundary(self, timestamp: datetime) -> float:
+        today = timestamp.date()
+        midnight = datetime.combine(today, time(), tzinfo=timezone.utc).timestamp()
+        segment = bisect_right(self.start_dates, today)
+        if segment < len(self.start_dates):
+            next_boundary = datetime.combine(self.start_dates[segment], time(), tzinfo=timezone.utc).timestamp()
+        else:
+            next_boundary = float('inf')
+
+        boundaries, _ = self.segments[segment]
+        if boundaries:
+            next_boundary = min(next_boundary, midnight + 86_400)
+            seconds = timestamp.timestamp() - midnight
+            for boundary in boundaries:
+                # aware times are compared after subtracting their UTC offset, which may take them out of the day
+                offset = boundary.utcoffset()
+                boundary_seconds = boundary.hour * 3_600 + boundary.minute * 60 + boundary.second
+                boundary_seconds += boundary.microsecond / 1_000_000
+                if offset is not None:
+                    boundary_seconds -= offset.total_seconds()
+                if seconds < boundary_seconds < 86_400:
+                    next_boundary = min(next_boundary, midnight + boundary_seconds)
+        return next_boundary
+
+    @staticmethod
+    def _daily_windows(
+        conditional_prices: Sequence[ConditionalPrice], segment_start: date | None
+    ) -> tuple[list[time], list[ModelPrice]]:
+        # the prices which could apply in the segment, last first, up to the first which applies all day
+        candidates: list[tuple[TimeOfDateConstraint, ModelPrice]] = []
+        default = conditional_prices[0].prices
+        for conditional_price in reversed(conditional_prices):
+            constraint = conditional_price.constraint
+            if isinstance(constraint, TimeOfDateConstraint):
+                candidates.append((constraint, conditional_price.prices))
+            elif constraint is None or (segment_start is not None and segment_start >= constraint.start_date):
+                default = conditional_price.prices
+                break
+
+        boundaries = sorted(
+            {constraint.start_time for constraint, _ in candidates}
+            | {constraint.end_time for constraint, _ in candidates}
+        )
+        prices: list[ModelPrice] = [default]
+        for window_start in boundaries:
+            prices.append(
+                next(
+                    (
+                        candidate_prices
+                        for constraint, candidate_prices in candidates
+                        if constraint.start_time <= window_start < constraint.end_time
+                    ),
+                    default,
+                )
+            )
+        return boundaries, prices
+
+
 @dataclass
 class ClauseStartsWith:
     starts_with: str
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
 from collections.abc import Mapping
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from types import MappingProxyType
-from typing import Any, cast
+from typing import TYPE_CHECKING, Any, cast
+
+if TYPE_CHECKING:
+    from genai_prices.decompose import LeafDecompositionPlan
 
 
 @dataclass(frozen=True)
@@ -12,14 +15,27 @@ class UnitDef:
     price_key: str
     per: int
     dimensions: Mapping[str, str]
+    # set by `UnitRegistry`, which assigns each `(dimension, value)` pair of its units a bit: `_mask` has the bits of
+    # this unit's dimensions and `_conflict_mask` the bits of other values of the same dimensions
+    _dimension_bits: Mapping[tuple[str, str], int] | None = field(default=None, init=False, repr=False, compare=False)
+    _mask: int = field(default=0, init=False, repr=False, compare=False)
+    _conflict_mask: int = field(default=0, init=False, repr=False, compare=False)
 
     def __post_init__(self) -> None:
         object.__setattr__(self, 'dimensions', MappingProxyType(dict(self.dimensions)))
 
     def is_compatible_with(self, other: UnitDef) -> bool:
         """Return whether two units can overlap without conflicting dimensions."""
+        if self._dimension_bits is not None and self._dimension_bits is other._dimension_bits:
+            return not self._mask & other._conflict_mask
         return all(other.dimensions.get(key, value) == value for key, value in self.dimensions.items())
 
+    def is_ancestor_or_self_of(self, other: UnitDef) -> bool:
+        """Return whether every dimension of this unit is also a dimension of `other`."""
+        if self._dimension_bits is not None and self._dimension_bits is other._dimension_bits:
+            return self._mask & other._mask == self._mask
+        return self.dimensions.items() <= other.dimensions.items()
+
 
 class UnitRegistry:
     units: Mapping[str, UnitDef]
@@ -29,14 +45,19 @@ class UnitRegistry:
     _reported_usage_keys_in_order: tuple[str, ...]
     _units_by_price_key: dict[str, UnitDef]
     _units_by_dimension: dict[frozenset[tuple[str, str]], UnitDef]
+    _dimension_bits: Mapping[tuple[str, str], int]
+    _units_by_mask: dict[int, UnitDef]
     _ancestor_usage_keys: dict[str, frozenset[str]]
+    _leaf_decomposition_plans: dict[frozenset[str], LeafDecompositionPlan]
 
     def __init__(self, raw_units: Mapping[str, Mapping[str, Any]] | None = None) -> None:
         """Parse raw unit dictionaries into indexed runtime objects."""
         units: dict[str, UnitDef] = {}
         self._units_by_price_key = {}
         self._units_by_dimension = {}
+        self._units_by_mask = {}
         self._ancestor_usage_keys = {}
+        self._leaf_decomposition_plans = {}
 
         for usage_key, raw_unit in (raw_units or {}).items():
             dimensions = dict(cast(Mapping[str, str], raw_unit.get('dimensions', {})))
@@ -53,6 +74,26 @@ class UnitRegistry:
             self._units_by_price_key[unit.price_key] = unit
             self._units_by_dimension[dimension_set] = unit
 
+        dimension_bits: dict[tuple[str, str], int] = {}
+        bits_by_dimension: dict[str, int] = {}
+        for unit in units.values():
+            for dimension in unit.dimensions.items():
+                if dimension not in dimension_bits:
+                    bit = dimension_bits[dimension] = 1 << len(dimension_bits)
+                    bits_by_dimension[dimension[0]] = bits_by_dimension.get(dimension[0], 0) | bit
+        self._dimension_bits = MappingProxyType(dimension_bits)
+
+        for unit in units.values():
+            mask = 0
+            all_values_mask = 0
+            for dimension in unit.dimensions.items():
+                mask |= dimension_bits[dimension]
+                all_values_mask |= bits_by_dimension[dimension[0]]
+            object.__setattr__(unit, '_dimension_bits', self._dimension_bits)
+            object.__setattr__(unit, '_mask', mask)
+            object.__setattr__(unit, '_conflict_mask', all_values_mask & ~mask)
+            self._units_by_mask[mask] = unit
+
         for usage_key, unit in units.items():
             self._ancestor_usage_keys[usage_key] = frozenset(
                 maybe_ancestor.usage_key
@@ -73,11 +114,24 @@ class UnitRegistry:
     def ancestor_usage_keys(self, usage_key: str) -> frozenset[str]:
         return self._ancestor_usage_keys[usage_key]
 
+    def leaf_decomposition_plan(self, priced_usage_keys: frozenset[str]) -> LeafDecompositionPlan:
+        """Return the cached plan for decomposing usage priced by `priced_usage_keys` into leaf values."""
+        plan = self._leaf_decomposition_plans.get(priced_usage_keys)
+        if plan is None:
+            from genai_prices.decompose import LeafDecompositionPlan
+
+            plan = LeafDecompositionPlan(self.units[usage_key] for usage_key in priced_usage_keys)
+            self._leaf_decomposition_plans[priced_usage_keys] = plan
+        return plan
+
     def find_join(self, a: UnitDef, b: UnitDef) -> UnitDef | None:
         """Return the most specific registered unit joining two compatible units, if present."""
         if not a.is_compatible_with(b):
             return None
 
+        dimension_bits = self._dimension_bits
+        if a._dimension_bits is dimension_bits and b._dimension_bits is dimension_bits:  # pyright: ignore[reportPrivateUsage]
+            return self._units_by_mask.get(a._mask | b._mask)  # pyright: ignore[reportPrivateUsage]
         return self._units_by_dimension.get(frozenset(a.dimensions.items() | b.dimensions.items()))
 
 
@@ -130,7 +184,7 @@ def _dimension_set(unit: UnitDef) -> frozenset[tuple[str, str]]:
 
 
 def _is_dimension_subset(maybe_ancestor: UnitDef, unit: UnitDef) -> bool:
-    return maybe_ancestor.dimensions.items() <= unit.dimensions.items()
+    return maybe_ancestor.is_ancestor_or_self_of(unit)
 
 
 _bundled_registry: UnitRegistry | None = None
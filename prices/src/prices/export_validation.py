@@ -6,7 +6,7 @@ from collections.abc import Mapping
 from itertools import combinations
 from typing import Any, cast
 
-from genai_prices.units import UnitDef, UnitRegistry
+from genai_prices.units import UnitRegistry
 
 from .prices_types import Provider
 
@@ -189,22 +189,26 @@ def _validate_interval_closure(
     registry: UnitRegistry,
     dimension_requirements_by_usage_key: Mapping[str, Mapping[str, Mapping[str, str]]],
 ) -> None:
-    units_by_dimension = registry._units_by_dimension  # pyright: ignore[reportPrivateUsage]
+    dimension_bits = registry._dimension_bits  # pyright: ignore[reportPrivateUsage]
+    units_by_mask = registry._units_by_mask  # pyright: ignore[reportPrivateUsage]
     for ancestor in registry.units.values():
         for descendant in registry.units.values():
-            if ancestor is descendant or not _is_dimension_subset(ancestor, descendant):
+            if ancestor is descendant or not ancestor.is_ancestor_or_self_of(descendant):
                 continue
 
             added_dimensions = descendant.dimensions.items() - ancestor.dimensions.items()
             for size in range(1, len(added_dimensions)):
                 for added_subset in combinations(added_dimensions, size):
+                    required_mask = ancestor._mask  # pyright: ignore[reportPrivateUsage]
+                    for dimension in added_subset:
+                        required_mask |= dimension_bits[dimension]
+                    if required_mask in units_by_mask:
+                        continue
                     required_dimensions = frozenset(ancestor.dimensions.items() | set(added_subset))
                     if not _requirements_are_satisfied_by(
                         dimension_requirements_by_usage_key[descendant.usage_key], dict(required_dimensions)
                     ):
                         continue
-                    if required_dimensions in units_by_dimension:
-                        continue
 
                     missing_dimensions = ', '.join(f'{key}={value}' for key, value in sorted(required_dimensions))
                     raise ValueError(
@@ -223,18 +227,10 @@ def _requirements_are_satisfied_by(
 
 
 def _validate_join_closedness(registry: UnitRegistry) -> None:
-    units_by_dimension = registry._units_by_dimension  # pyright: ignore[reportPrivateUsage]
     for a, b in combinations(registry.units.values(), 2):
-        if not a.is_compatible_with(b):
+        if not a.is_compatible_with(b) or registry.find_join(a, b) is not None:
             continue
 
         required_dimensions = frozenset(a.dimensions.items() | b.dimensions.items())
-        if required_dimensions in units_by_dimension:
-            continue
-
         missing_dimensions = ', '.join(f'{key}={value}' for key, value in sorted(required_dimensions))
         raise ValueError(f'Missing join unit dimensions between {a.usage_key} and {b.usage_key}: {missing_dimensions}')
-
-
-def _is_dimension_subset(maybe_ancestor: UnitDef, unit: UnitDef) -> bool:
-    return maybe_ancestor.dimensions.items() <= unit.dimensions.items()
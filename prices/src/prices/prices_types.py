@@ -152,6 +152,25 @@ class UsageExtractor(_Model):
     """
     mappings: list[UsageExtractorMapping]
     """Mappings from used to build usage."""
+    streaming: UsageExtractorStreaming | None = None
+    """How usage is reported when the response is streamed, `None` if usage can't be extracted from streams."""
+
+
+class UsageExtractorStreaming(_Model):
+    """How usage is reported in the chunks of a streamed response."""
+
+    merge: Literal['replace', 'sum'] = 'replace'
+    """How values of the same field from successive chunks are combined.
+
+    `replace` when each chunk reports the usage so far, so the latest value is used, `sum` when each chunk only
+    reports its own usage, e.g. one of several responses in a session.
+    """
+    response_paths: list[ExtractPath] | None = None
+    """Paths to objects in a chunk shaped like a whole response, e.g. Anthropic's `message_start` event has the message
+    under `message`.
+
+    `root` and `model_path` are followed from each of these objects and from the chunk itself.
+    """
 
 
 def serialize_prices(
@@ -34,6 +34,7 @@ from genai_prices._cli import (
 from genai_prices.data import providers
 from genai_prices.data_snapshot import DataSnapshot, set_custom_snapshot
 from genai_prices.data_units import unit_data
+from genai_prices.suggestions import suggest_models
 from genai_prices.types import ClauseEquals, ModelInfo, ModelPrice, PriceCalculation, Provider, TieredPrices
 from genai_prices.units import UnitDef, UnitRegistry
 
@@ -751,3 +752,21 @@ def test_calc_update_prices(monkeypatch: pytest.MonkeyPatch):
     monkeypatch.setattr(update_prices, 'UpdatePrices', DummyUpdatePrices)
     assert cli_logic(['--plain', 'calc', '--update-prices', '--input-tokens', '1000', 'gpt-4o', 'gpt-4o']) == 0
     assert calls == {'instances': 1, 'starts': 1, 'wait': True}
+
+
+def test_suggest_models_library():
+    assert suggest_models('gpt-4o0', provider_id='openai')[0] == 'openai:gpt-4o'
+    assert suggest_models('openai:gpt-4o0')[0] == 'openai:gpt-4o'
+    assert suggest_models('claude-sonet-4-5')[0].endswith(':claude-sonnet-4-5')
+    assert suggest_models('gpt-4o0', provider_id='missing') == []
+    assert suggest_models('zzzzzzzz') == []
+    assert len(suggest_models('gpt-4', limit=2)) == 2
+
+
+def test_suggest_models_index_rebuilt_when_models_change():
+    fake_providers = [Provider(id='provider', name='Provider', api_pattern='https://example.com')]
+    assert suggest_models('sausage-2', providers=fake_providers) == []
+
+    fake_providers[0].models.append(ModelInfo(id='sausage-1', name='Sausage One', match=ClauseEquals('sausage-1')))
+    assert suggest_models('sausage-2', providers=fake_providers) == ['provider:sausage-1']
+    assert suggest_models('sausage on', providers=fake_providers) == ['provider:sausage-1']
@@ -142,6 +142,24 @@ def test_alt_source_sausage():
         set_custom_snapshot(None)
 
 
+def test_alt_source_sausage_numeric_backend():
+    set_custom_snapshot(AltUpdatePrices().fetch())
+    try:
+        usage = CustomUsage(sausages=3, input_tokens=1_000_000, output_tokens=1_000_000)
+        price = calc_price(usage, model_ref='sausage', provider_id='testing', numeric='decimal')
+        assert price.total_price == snapshot(Decimal('12'))
+        with pytest.raises(
+            ValueError,
+            match=r"The 'fixed' numeric backend cannot be used with CustomModelPrice, which overrides `calc_price`",
+        ):
+            calc_price(usage, model_ref='sausage', provider_id='testing', numeric='fixed')
+        # the standard prices of the same snapshot can still use it
+        price = calc_price(usage, model_ref='foobar', provider_id='testing', numeric='fixed')
+        assert price.total_price == snapshot(Decimal('3'))
+    finally:
+        set_custom_snapshot(None)
+
+
 def test_extra_source_normal():
     with ExtraUpdatePrices() as update_prices:
         update_prices.wait()
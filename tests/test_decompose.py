@@ -266,3 +266,43 @@ def test_compute_leaf_values_reports_overlapping_contradictions_in_usage_terms()
             Usage(input_tokens=100, cache_read_tokens=80, input_audio_tokens=80, cache_audio_read_tokens=0),
             registry.units,
         )
+
+
+def test_leaf_decomposition_plan_cached_per_priced_usage_keys() -> None:
+    registry = UnitRegistry(load_units())
+    priced = frozenset(
+        {
+            'input_tokens',
+            'cache_read_tokens',
+            'input_audio_tokens',
+            'cache_audio_read_tokens',
+            'output_tokens',
+            'output_audio_tokens',
+        }
+    )
+
+    plan = registry.leaf_decomposition_plan(priced)
+    assert registry.leaf_decomposition_plan(frozenset(priced)) is plan
+    assert registry.leaf_decomposition_plan(priced - {'output_audio_tokens'}) is not plan
+
+    # descendants always come before the units they're subtracted from
+    for position, descendants in enumerate(plan.descendants):
+        assert all(index < position for index in descendants)
+
+    usage = Usage(
+        input_tokens=1000,
+        cache_read_tokens=300,
+        input_audio_tokens=200,
+        cache_audio_read_tokens=50,
+        output_tokens=500,
+        output_audio_tokens=100,
+    )
+    assert plan.compute(usage) == compute_leaf_values(set(priced), usage, registry.units)
+    assert plan.compute(usage) == {
+        'input_tokens': 550,
+        'cache_read_tokens': 250,
+        'input_audio_tokens': 150,
+        'cache_audio_read_tokens': 50,
+        'output_tokens': 400,
+        'output_audio_tokens': 100,
+    }
@@ -1,3 +1,4 @@
+import json
 import re
 from decimal import Decimal
 from typing import Any
@@ -5,7 +6,7 @@ from typing import Any
 import pytest
 from inline_snapshot import snapshot
 
-from genai_prices import Usage, calc_price, extract_usage
+from genai_prices import Usage, calc_price, extract_usage, extract_usage_from_bytes, streaming_usage_extractor
 from genai_prices.data import providers
 from genai_prices.types import (
     ArrayMatch,
@@ -13,8 +14,10 @@ from genai_prices.types import (
     ExtractedUsage,
     ModelPrice,
     Provider,
+    StreamingUsageExtractor,
     UsageExtractor,
     UsageExtractorMapping,
+    UsageExtractorStreaming,
 )
 from genai_prices.units import UnitRegistry
 
@@ -85,6 +88,7 @@ def test_extract_usage_ok(response_data: Any, expected_model: str, expected_usag
     model, usage = provider.extract_usage(response_data)
     assert model == expected_model
     assert usage == expected_usage
+    assert provider.extract_usage_from_bytes(json.dumps(response_data).encode()) == (model, usage)
 
     # also test the public simple API
     extracted_usage = extract_usage(response_data, provider_id='anthropic')
@@ -564,6 +568,66 @@ def test_extract_usage_error(response_data: Any, error: str):
 
     assert str(exc_info.value) == error
 
+    with pytest.raises(ValueError) as exc_info:
+        provider.extract_usage_from_bytes(json.dumps(response_data).encode())
+
+    assert str(exc_info.value) == error
+
+
+def test_extract_usage_from_bytes_skips_content():
+    content: list[dict[str, Any]] = [
+        {'type': 'text', 'text': 'a "quoted" {brace} [bracket] \\ ' * 1_000},
+        {'type': 'tool_use', 'input': {'usage': {'input_tokens': 1}, 'path': 'C:\\', 'nested': [[{}], []]}},
+        {'type': 'image', 'source': {'data': 'QUJD' * 10_000}},
+    ]
+    response_data = {
+        'content': content,
+        'model': 'claude-sonnet-4-20250514',
+        'usage': {'input_tokens': 504, 'output_tokens': 97},
+    }
+    for body in (json.dumps(response_data), json.dumps(response_data, indent=2, ensure_ascii=False)):
+        extracted = extract_usage_from_bytes(body.encode(), provider_id='anthropic')
+        assert extracted.usage == Usage(input_tokens=504, output_tokens=97)
+        assert extracted.model is not None and extracted.model.id == 'claude-sonnet-4-0'
+
+    # skipped values are only scanned for their end, so aren't validated
+    body = rb'{"id": 01, "content": [{"text": "\\"}], "model": "gpt-4o", "usage": {"prompt_tokens": 1, "completion_tokens": 2}}'
+    extracted = extract_usage_from_bytes(body, provider_id='openai', api_flavor='chat')
+    assert extracted.usage == Usage(input_tokens=1, output_tokens=2)
+
+
+def test_extract_usage_from_bytes_array_match():
+    response_data = {
+        'candidates': [{'content': {'parts': [{'text': 'hello ' * 1_000}]}}],
+        'modelVersion': 'gemini-2.5-flash',
+        'usageMetadata': {
+            'promptTokenCount': 100,
+            'candidatesTokenCount': 50,
+            'promptTokensDetails': [{'modality': 'AUDIO', 'tokenCount': 40}, {'modality': 'TEXT', 'tokenCount': 60}],
+        },
+    }
+    google = next(provider for provider in providers if provider.id == 'google')
+    assert google.extract_usage_from_bytes(json.dumps(response_data).encode()) == google.extract_usage(response_data)
+
+
+@pytest.mark.parametrize(
+    'body,error',
+    [
+        (b'{"model": "x", "usage": {"input_tokens": 1', 'Invalid JSON: unexpected end of document'),
+        (b'{"content": "abc', 'Invalid JSON: unterminated string at byte 12'),
+        (b'{"model" "x"}', "Invalid JSON: expected ':' at byte 9"),
+        (b'{"content": [1, 2', 'Invalid JSON: unexpected end of document'),
+        (b'{"usage": {"input_tokens": 1, "output_tokens": 1}} trailing', None),
+    ],
+)
+def test_extract_usage_from_bytes_invalid_json(body: bytes, error: str | None):
+    provider = next(provider for provider in providers if provider.id == 'anthropic')
+    if error is None:
+        assert provider.extract_usage_from_bytes(body) == (None, Usage(input_tokens=1, output_tokens=1))
+    else:
+        with pytest.raises(ValueError, match=f'^{re.escape(error)}$'):
+            provider.extract_usage_from_bytes(body)
+
 
 def test_usage_extractor_errors_when_optional_mappings_find_no_usage_values():
     extractor = UsageExtractor(
@@ -611,6 +675,39 @@ def test_usage_extractor_errors_when_required_array_match_finds_no_item():
         extractor.extract({'model': 'test-model', 'usage': [{'modality': 'TEXT', 'data': {'tokenCount': 1}}]})
 
 
+def test_usage_extractor_reads_each_field_once():
+    class CountingMapping(dict[str, Any]):
+        def __init__(self, *args: Any, **kwargs: Any) -> None:
+            super().__init__(*args, **kwargs)
+            self.reads: list[str] = []
+
+        def __getitem__(self, key: str) -> Any:
+            self.reads.append(key)
+            return super().__getitem__(key)
+
+    anthropic = next(provider for provider in providers if provider.id == 'anthropic')
+    cache_creation = CountingMapping(ephemeral_5m_input_tokens=100, ephemeral_1h_input_tokens=0)
+    usage = CountingMapping(
+        input_tokens=504,
+        cache_creation=cache_creation,
+        cache_creation_input_tokens=100,
+        cache_read_input_tokens=50,
+        output_tokens=97,
+    )
+    _, extracted = anthropic.extract_usage({'model': 'claude-sonnet-4-20250514', 'usage': usage})
+
+    assert extracted == Usage(
+        input_tokens=654,
+        cache_write_tokens=100,
+        cache_write_5m_tokens=100,
+        cache_write_1h_tokens=0,
+        cache_read_tokens=50,
+        output_tokens=97,
+    )
+    assert sorted(usage.reads) == sorted(set(usage.reads))
+    assert sorted(cache_creation.reads) == ['ephemeral_1h_input_tokens', 'ephemeral_5m_input_tokens']
+
+
 def test_usage_extractor_errors_when_required_nested_key_is_missing():
     extractor = UsageExtractor(
         root='usage',
@@ -1366,3 +1463,147 @@ def test_perplexity_reasoning_pro_reports_reasoning_in_completion_tokens():
     extracted = extract_usage(response_data, provider_id='perplexity')
 
     assert extracted.usage == Usage(input_tokens=17, output_tokens=1_152)
+
+
+def test_streaming_anthropic():
+    extractor = streaming_usage_extractor(provider_id='anthropic')
+    message: dict[str, Any] = {
+        'id': 'msg_123',
+        'model': 'claude-sonnet-4-20250514',
+        'content': [],
+        'usage': {'input_tokens': 472, 'cache_read_input_tokens': 100, 'output_tokens': 2},
+    }
+    events: list[dict[str, Any]] = [
+        {'type': 'message_start', 'message': message},
+        {'type': 'content_block_start', 'index': 0, 'content_block': {'type': 'text', 'text': ''}},
+        {'type': 'content_block_delta', 'index': 0, 'delta': {'type': 'text_delta', 'text': 'Hello'}},
+        {'type': 'content_block_stop', 'index': 0},
+        {'type': 'message_delta', 'delta': {'stop_reason': 'end_turn'}, 'usage': {'output_tokens': 15}},
+        {'type': 'message_delta', 'delta': {'stop_reason': 'end_turn'}, 'usage': {'output_tokens': 89}},
+        {'type': 'message_stop'},
+    ]
+    for event in events:
+        extractor.feed(event)
+
+    extracted = extractor.finish()
+    assert extracted.usage == Usage(input_tokens=572, cache_read_tokens=100, output_tokens=89)
+    assert extracted.model is not None
+    assert extracted.model.id == 'claude-sonnet-4-0'
+    assert extracted.provider.id == 'anthropic'
+
+    # the result matches extracting usage from the whole response
+    response_data = {**message, 'usage': {**message['usage'], 'output_tokens': 89}}
+    assert extract_usage(response_data, provider_id='anthropic').usage == extracted.usage
+
+
+def test_streaming_openai_chat_bytes():
+    extractor = streaming_usage_extractor(provider_id='openai', api_flavor='chat')
+    chunks = [
+        b'{"id":"chatcmpl-1","model":"gpt-4o-2024-08-06","choices":[{"index":0,"delta":{"content":"Hi"}}],"usage":null}',
+        b'{"id":"chatcmpl-1","model":"gpt-4o-2024-08-06","choices":[{"index":0,"delta":{}}],"usage":null}',
+        (
+            b'{"id":"chatcmpl-1","model":"gpt-4o-2024-08-06","choices":[],'
+            b'"usage":{"prompt_tokens":100,"completion_tokens":20,"prompt_tokens_details":{"cached_tokens":40}}}'
+        ),
+        b'[DONE]',
+    ]
+    for chunk in chunks:
+        extractor.feed_bytes(chunk)
+
+    extracted = extractor.finish()
+    assert extracted.usage == Usage(input_tokens=100, cache_read_tokens=40, output_tokens=20)
+    assert extracted.model is not None
+    assert extracted.model.id == 'gpt-4o'
+    assert extractor.model_ref == 'gpt-4o-2024-08-06'
+
+
+def test_streaming_openai_responses():
+    extractor = streaming_usage_extractor(provider_id='openai', api_flavor='responses')
+    response: dict[str, Any] = {'id': 'resp_1', 'model': 'gpt-5', 'output': [], 'usage': None}
+    extractor.feed({'type': 'response.created', 'response': response})
+    extractor.feed({'type': 'response.output_text.delta', 'delta': 'Hello'})
+    extractor.feed(
+        {
+            'type': 'response.completed',
+            'response': {**response, 'usage': {'input_tokens': 12, 'output_tokens': 34}},
+        }
+    )
+
+    extracted = extractor.finish()
+    assert extracted.usage == Usage(input_tokens=12, output_tokens=34)
+    assert extracted.model is not None
+    assert extracted.model.id == 'gpt-5'
+
+
+def test_streaming_google_replaces_cumulative_usage():
+    extractor = streaming_usage_extractor(provider_id='google')
+    for candidates_token_count in 5, 12, 20:
+        chunk = {
+            'candidates': [{'content': {'parts': [{'text': '...'}], 'role': 'model'}}],
+            'usageMetadata': {'promptTokenCount': 8, 'candidatesTokenCount': candidates_token_count},
+            'modelVersion': 'gemini-2.5-flash',
+        }
+        extractor.feed_bytes(json.dumps(chunk).encode())
+
+    assert extractor.finish().usage == Usage(input_tokens=8, output_tokens=20)
+
+
+def test_streaming_openai_realtime_sums_responses():
+    extractor = streaming_usage_extractor(provider_id='openai', api_flavor='realtime')
+    extractor.feed({'type': 'session.created', 'session': {'model': 'gpt-realtime'}})
+    for input_tokens, output_tokens in (100, 10), (150, 20):
+        extractor.feed({'type': 'response.created', 'response': {'usage': None}})
+        extractor.feed(
+            {
+                'type': 'response.done',
+                'response': {'usage': {'input_tokens': input_tokens, 'output_tokens': output_tokens}},
+            }
+        )
+
+    extracted = extractor.finish()
+    assert extracted.usage == Usage(input_tokens=250, output_tokens=30)
+    assert extracted.model is None
+
+
+def test_streaming_custom_extractor_sum():
+    provider = Provider(
+        id='custom',
+        name='Custom',
+        api_pattern='',
+        models=[],
+        extractors=[
+            UsageExtractor(
+                root='usage',
+                mappings=[
+                    UsageExtractorMapping(path='input', dest='input_tokens'),
+                    UsageExtractorMapping(path='output', dest='output_tokens', required=False),
+                ],
+                streaming=UsageExtractorStreaming(merge='sum'),
+            )
+        ],
+    )
+    extractor = StreamingUsageExtractor(provider)
+    extractor.feed({'usage': {'input': 10}})
+    extractor.feed({'usage': {'input': 0, 'output': 3}})
+    extractor.feed({'usage': {'input': 0, 'output': 4}})
+
+    assert extractor.finish() == ExtractedUsage(
+        usage=Usage(input_tokens=10, output_tokens=7), model=None, provider=provider, auto_update_timestamp=None
+    )
+
+
+def test_streaming_errors():
+    with pytest.raises(
+        ValueError, match=r"^Usage extraction from streams is not supported for openai 'embeddings' API$"
+    ):
+        streaming_usage_extractor(provider_id='openai', api_flavor='embeddings')
+
+    extractor = streaming_usage_extractor(provider_id='openai', api_flavor='chat')
+    extractor.feed({'model': 'gpt-4o', 'choices': [{'delta': {'content': 'Hi'}}]})
+    with pytest.raises(ValueError, match=r'^No usage information found at usage in the stream$'):
+        extractor.finish()
+
+    extractor = streaming_usage_extractor(provider_id='anthropic')
+    extractor.feed({'type': 'message_delta', 'usage': {'output_tokens': 15}})
+    with pytest.raises(ValueError, match=r'^Missing value at `usage.input_tokens`$'):
+        extractor.finish()
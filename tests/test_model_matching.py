@@ -1,11 +1,26 @@
+import re
+from copy import deepcopy
 from datetime import datetime, timedelta
 from decimal import Decimal
 
 import pytest
 from inline_snapshot import snapshot
 
+from genai_prices._match import check_linear_time_regex, compile_match_logic
 from genai_prices.data import providers
-from genai_prices.data_snapshot import DataSnapshot, find_provider_by_id
+from genai_prices.data_snapshot import DataSnapshot, LookupCacheInfo, find_provider_by_id, set_custom_snapshot
+from genai_prices.types import (
+    ClauseAnd,
+    ClauseContains,
+    ClauseEndsWith,
+    ClauseEquals,
+    ClauseOr,
+    ClauseRegex,
+    ClauseStartsWith,
+    MatchLogic,
+    ModelInfo,
+    Provider,
+)
 
 mark_xfail_todo = pytest.mark.xfail(reason='todo')
 
@@ -674,8 +689,375 @@ def test_snapshot_active_uses_ttl():
     assert snapshot.active(timedelta(seconds=1)) is False
 
 
+def test_lookup_cache_normalizes_keys():
+    snapshot = DataSnapshot(providers=providers, from_auto_update=False)
+
+    first = snapshot.find_provider_model('gpt-4o', None, 'openai', None)
+    assert snapshot.find_provider_model(' GPT-4o ', None, ' OpenAI', None) == first
+    assert snapshot.find_provider_model('gpt-4o', snapshot.find_provider(None, 'openai', None), None, None) == first
+
+    assert snapshot.lookup_cache_info() == LookupCacheInfo(hits=2, misses=1, evictions=0, size=1, max_size=4096)
+
+
+def test_lookup_cache_is_bounded_lru():
+    snapshot = DataSnapshot(providers=providers, from_auto_update=False, lookup_cache_size=2)
+
+    snapshot.find_provider_model('gpt-4o', None, 'openai', None)
+    snapshot.find_provider_model('gpt-4o-mini', None, 'openai', None)
+    snapshot.find_provider_model('gpt-4o', None, 'openai', None)
+    snapshot.find_provider_model('gpt-4.1', None, 'openai', None)
+
+    assert snapshot.lookup_cache_info() == LookupCacheInfo(hits=1, misses=3, evictions=1, size=2, max_size=2)
+    assert ('openai', None, 'gpt-4o') in snapshot._lookup_cache
+    assert ('openai', None, 'gpt-4o-mini') not in snapshot._lookup_cache
+
+
+def test_lookup_cache_disabled_or_unbounded():
+    disabled = DataSnapshot(providers=providers, from_auto_update=False, lookup_cache_size=0)
+    disabled.find_provider_model('gpt-4o', None, 'openai', None)
+    disabled.find_provider_model('gpt-4o', None, 'openai', None)
+    assert disabled.lookup_cache_info() == LookupCacheInfo(hits=0, misses=2, evictions=0, size=0, max_size=0)
+
+    unbounded = DataSnapshot(providers=providers, from_auto_update=False, lookup_cache_size=None)
+    for model_ref in ('gpt-4o', 'gpt-4o-mini', 'gpt-4.1'):
+        unbounded.find_provider_model(model_ref, None, 'openai', None)
+    assert unbounded.lookup_cache_info() == LookupCacheInfo(hits=0, misses=3, evictions=0, size=3, max_size=None)
+
+    with pytest.raises(ValueError, match='max_size must be None or a non-negative integer'):
+        DataSnapshot(providers=providers, from_auto_update=False, lookup_cache_size=-1)
+
+
+def test_negative_lookup_cache():
+    snapshot = DataSnapshot(providers=providers, from_auto_update=False, negative_lookup_cache_size=2)
+
+    for _ in range(3):
+        with pytest.raises(LookupError, match="Unable to find model with model_ref='gpt-unknown' in openai"):
+            snapshot.find_provider_model('gpt-unknown', None, 'openai', None)
+    for _ in range(2):
+        with pytest.raises(LookupError, match="Unable to find provider provider_id='unknown'"):
+            snapshot.find_provider_model('gpt-4o', None, 'unknown', None)
+    with pytest.raises(LookupError, match="Unable to find provider with model matching 'unknown'"):
+        snapshot.find_provider_model('unknown', None, None, None)
+
+    assert snapshot.negative_lookup_cache_info() == LookupCacheInfo(hits=3, misses=3, evictions=1, size=2, max_size=2)
+    assert snapshot.lookup_cache_info().size == 0
+
+
+def test_set_custom_snapshot_clears_negative_lookup_cache():
+    snapshot = DataSnapshot(providers=deepcopy(providers), from_auto_update=False)
+    with pytest.raises(LookupError):
+        snapshot.find_provider_model('gpt-custom', None, 'openai', None)
+
+    openai = snapshot.find_provider(None, 'openai', None)
+    openai.models.append(ModelInfo(id='gpt-custom', match=ClauseEquals(equals='gpt-custom')))
+    set_custom_snapshot(snapshot)
+    try:
+        _, model = snapshot.find_provider_model('gpt-custom', None, 'openai', None)
+    finally:
+        set_custom_snapshot(None)
+
+    assert model.id == 'gpt-custom'
+    assert snapshot.negative_lookup_cache_info().size == 0
+
+
 def test_find_provider_requires_some_lookup_input():
     snapshot = DataSnapshot(providers=providers, from_auto_update=False)
 
     with pytest.raises(LookupError, match='Unable to find provider with model matching None'):
         snapshot.find_provider(None, None, None)
+
+
+def test_model_index_matches_linear_scan():
+    """The compiled model index must return exactly what scanning `models` in order returns."""
+    for provider in providers:
+        model_refs = {variant for model in provider.models for variant in (model.id, f'us.{model.id}-v1', 'unknown')}
+        for model_ref in model_refs:
+            expected = next((model for model in provider.models if model.is_match(model_ref)), None)
+            assert provider.model_index().find(model_ref.lower()) is expected, (provider.id, model_ref)
+
+
+def test_model_index_first_model_wins():
+    provider = Provider(
+        id='ordered',
+        name='Ordered',
+        api_pattern='ordered.example.com',
+        models=[
+            ModelInfo(id='regex', match=ClauseRegex(regex=r'^model-\d+$')),
+            ModelInfo(id='ends', match=ClauseEndsWith(ends_with='-Preview')),
+            ModelInfo(
+                id='and', match=ClauseAnd(and_=[ClauseStartsWith(starts_with='model'), ClauseContains(contains='x')])
+            ),
+            ModelInfo(id='contains', match=ClauseOr(or_=[ClauseContains(contains='mode'), ClauseEquals(equals='m')])),
+            ModelInfo(id='starts', match=ClauseStartsWith(starts_with='model')),
+            ModelInfo(id='equals', match=ClauseEquals(equals='model-1')),
+        ],
+    )
+
+    assert provider.find_model('model-1') == provider.models[0]
+    assert provider.find_model('MODEL-1-preview') == provider.models[1]
+    assert provider.find_model('model-x') == provider.models[2]
+    assert provider.find_model('model-y') == provider.models[3]
+    assert provider.find_model('M') == provider.models[3]
+    assert provider.find_model('other') is None
+
+
+@pytest.mark.parametrize(
+    'clause',
+    [
+        ClauseEquals(equals='GPT-4o'),
+        ClauseOr(or_=[ClauseEquals(equals='a'), ClauseOr(or_=[ClauseEquals(equals='b'), ClauseStartsWith('gpt-')])]),
+        ClauseOr(or_=[ClauseEndsWith(ends_with='-Mini'), ClauseEndsWith(ends_with='-nano'), ClauseContains('4o')]),
+        ClauseOr(or_=[ClauseContains('4o'), ClauseContains('.'), ClauseRegex(regex=r'^o\d')]),
+        ClauseOr(or_=[ClauseRegex(regex=r'(?i)^GPT'), ClauseRegex(regex=r'(\w)\1')]),
+        ClauseOr(or_=[ClauseRegex(regex=r'^gpt-4'), ClauseRegex(regex=r'mini-\d'), ClauseRegex(regex=r'^o\d')]),
+        ClauseAnd(and_=[ClauseStartsWith('gpt'), ClauseContains('mini'), ClauseOr(or_=[ClauseRegex(regex=r'\d$')])]),
+        ClauseAnd(and_=[ClauseContains('gpt'), ClauseAnd(and_=[])]),
+        ClauseOr(or_=[]),
+    ],
+)
+def test_compile_match_logic(clause: MatchLogic):
+    predicate = compile_match_logic(clause)
+    for text in ('gpt-4o', 'gpt-4o-mini', 'gpt-4.1-nano', 'o3', 'a', 'b', 'aab', 'gpt-4o-mini-1', ''):
+        assert predicate(text) == clause.is_match(text), text
+
+    predicate = compile_match_logic(clause, lowercase=False)
+    for text in ('GPT-4o', 'gpt-4O-Mini', 'gpt-4.1-NANO', 'O3', 'A', 'aAb', 'gpt-4o-mini-1', 'gpt-4o'):
+        assert predicate(text) == clause.is_match(text), text
+
+
+def test_anchored_regexes_are_searched_individually():
+    from genai_prices._match import _combine_regexes
+
+    # an alternation would be tried at every position of the text, rather than stopping after the first
+    patterns = _combine_regexes(['^gpt-4', 'mini-\\d', '\\Ao\\d', 'nano$', 'x^o'])
+    assert [pattern.pattern for pattern in patterns] == ['^gpt-4', '\\Ao\\d', '(?:mini-\\d)|(?:nano$)|(?:x^o)']
+
+
+def test_provider_match_regex_sees_original_case():
+    provider = Provider(
+        id='cased',
+        name='Cased',
+        api_pattern='cased.example.com',
+        model_match=ClauseOr(or_=[ClauseRegex(regex=r'^[A-Z]+-\d$'), ClauseContains('Turbo')]),
+        provider_match=ClauseRegex(regex=r'^Cased'),
+        models=[],
+    )
+
+    assert provider.is_model_match('GPT-4')
+    assert not provider.is_model_match('gpt-4')
+    assert provider.is_model_match('some-TURBO')
+    assert provider.is_provider_match('Cased-AI')
+    assert not provider.is_provider_match('cased-ai')
+
+
+def test_compiled_match_follows_clause_changes():
+    provider = Provider(
+        id='compiled',
+        name='Compiled',
+        api_pattern='compiled.example.com',
+        model_match=ClauseStartsWith('first'),
+        models=[ModelInfo(id='model', match=ClauseEquals(equals='model'))],
+    )
+    assert provider.is_model_match('FIRST-model')
+    assert not provider.is_provider_match('compiled')
+    assert provider.models[0].is_match('Model')
+
+    provider.model_match = ClauseStartsWith('second')
+    provider.provider_match = ClauseEquals('compiled')
+    provider.models[0].match = ClauseEquals(equals='other')
+    assert not provider.is_model_match('first-model')
+    assert provider.is_model_match('second-model')
+    assert provider.is_provider_match('Compiled')
+    assert not provider.models[0].is_match('model')
+
+
+def test_model_index_rebuilt_when_models_change():
+    provider = Provider(
+        id='mutable',
+        name='Mutable',
+        api_pattern='mutable.example.com',
+        models=[ModelInfo(id='first', match=ClauseEquals(equals='first'))],
+    )
+    assert provider.find_model('second') is None
+
+    provider.models.append(ModelInfo(id='second', match=ClauseEquals(equals='second')))
+    assert provider.find_model('second') == provider.models[1]
+
+    provider.models[1] = ModelInfo(id='third', match=ClauseEquals(equals='third'))
+    assert provider.find_model('third') is None
+    provider.build_model_index()
+    assert provider.find_model('third') == provider.models[1]
+
+
+def _find_model_with_linear_fallback(provider: Provider, model_ref: str) -> ModelInfo | None:
+    model_ref = model_ref.lower()
+    if model := next((m for m in provider.models if m.is_match(model_ref)), None):
+        return model
+    for provider_id in provider.fallback_model_providers or []:
+        fallback = next((p for p in providers if p.id == provider_id), None)
+        if fallback and (model := next((m for m in fallback.models if m.is_match(model_ref)), None)):
+            return model
+    return None
+
+
+def test_fallback_model_index_matches_linear_fallback():
+    with_fallbacks = [provider for provider in providers if provider.fallback_model_providers]
+    assert with_fallbacks
+    model_refs = {
+        model_ref
+        for provider in providers
+        if provider.id in {p_id for p in with_fallbacks for p_id in p.fallback_model_providers or []}
+        or provider in with_fallbacks
+        for model in provider.models
+        for model_ref in (model.id, f'{model.id}-preview', f'prefix-{model.id}')
+    }
+    for provider in with_fallbacks:
+        for model_ref in model_refs:
+            expected = _find_model_with_linear_fallback(provider, model_ref)
+            assert provider.find_model(model_ref, all_providers=providers) is expected, (provider.id, model_ref)
+
+
+def test_fallback_model_index_rebuilt_when_providers_change():
+    main = Provider(
+        id='main',
+        name='Main',
+        api_pattern='main.example.com',
+        fallback_model_providers=['first', 'second'],
+        models=[ModelInfo(id='main-model', match=ClauseEquals(equals='main-model'))],
+    )
+    second = Provider(
+        id='second',
+        name='Second',
+        api_pattern='second.example.com',
+        models=[ModelInfo(id='shared', match=ClauseStartsWith(starts_with='shared'))],
+    )
+    all_providers = [main, second]
+    assert main.find_model('shared-model', all_providers=all_providers) == second.models[0]
+
+    # a provider added later takes precedence according to `fallback_model_providers`
+    first = Provider(
+        id='first',
+        name='First',
+        api_pattern='first.example.com',
+        fallback_model_providers=['main'],
+        models=[ModelInfo(id='shared-first', match=ClauseEquals(equals='shared-model'))],
+    )
+    all_providers.append(first)
+    assert main.find_model('shared-model', all_providers=all_providers) == first.models[0]
+
+    # fallback providers' own fallbacks are not followed
+    assert first.find_model('shared-model-x', all_providers=all_providers) is None
+
+    second.models.append(ModelInfo(id='other', match=ClauseEquals(equals='other')))
+    assert main.find_model('other', all_providers=all_providers) == second.models[1]
+
+    main.fallback_model_providers = ['second']
+    assert main.find_model('shared-model', all_providers=all_providers) == second.models[0]
+    assert main.find_model('shared-model', all_providers=None) is None
+
+
+def test_resolve_many():
+    snapshot = DataSnapshot(providers=providers, from_auto_update=False)
+    pairs = [
+        ('openai', 'gpt-4o'),
+        ('anthropic', 'claude-3-5-sonnet-latest'),
+        ('openai', 'gpt-4o'),
+        ('OpenAI', ' GPT-4o '),
+        ('openai', 'not-a-model'),
+        ('not-a-provider', 'gpt-4o'),
+        (None, 'gpt-4o'),
+        ('openai', 'not-a-model'),
+    ]
+    resolved = snapshot.resolve_many(iter(pairs))
+    assert list(resolved.handles) == [0, 1, 0, 0, -1, -2, 0, -1]
+    assert len(resolved) == len(pairs)
+    assert [(provider.id, model.id) for provider, model in resolved.models] == [
+        ('openai', 'gpt-4o'),
+        ('anthropic', 'claude-3-5-sonnet'),
+    ]
+    assert resolved.errors == [
+        "Unable to find model with model_ref='not-a-model' in openai",
+        "Unable to find provider provider_id='not-a-provider'",
+    ]
+
+    for row, (provider_id, model_ref) in enumerate(pairs):
+        try:
+            expected = snapshot.find_provider_model(model_ref, None, provider_id, None)
+        except LookupError as e:
+            assert resolved[row] is None
+            assert resolved.error(row) == str(e)
+        else:
+            assert resolved[row] == expected
+            assert resolved.error(row) is None
+
+
+def test_max_model_ref_length():
+    snapshot = DataSnapshot(providers=providers, from_auto_update=False, max_model_ref_length=64)
+    provider, model = snapshot.find_provider_model(f' {"gpt-4o":<64}', None, 'openai', None)
+    assert (provider.id, model.id) == ('openai', 'gpt-4o')
+
+    with pytest.raises(LookupError, match='^Model reference is longer than 64 characters$'):
+        snapshot.find_provider_model('gpt-4o' + 'x' * 59, None, 'openai', None)
+    with pytest.raises(LookupError, match='^Model reference is longer than 64 characters$'):
+        snapshot.find_provider_model('a' * 100_000, None, None, None)
+    assert snapshot.negative_lookup_cache_info().size == 0
+
+
+@pytest.mark.parametrize(
+    'pattern,error',
+    [
+        ('^gpt-5\\.6-luna-\\d{4}-\\d{2}-\\d{2}$', None),
+        ('(?:mi|code|dev)stral', None),
+        ('^[a-z]+-\\d+$', None),
+        ('(?:ab){2,5}', None),
+        ('(?:ab|cd){1,40}', None),
+        ('^(?=a+)b', None),
+        ('^gpt-4(?:-\\d+)?$', None),
+        ('claude-.*', None),
+        ('(a+)+$', 'unbounded repetition of a group'),
+        ('(?:a|aa)*b', 'unbounded repetition of a group'),
+        ('(\\w)\\1', 'backreferences and conditional groups are not supported'),
+        ('^\\d+-\\d+', None),
+        ('^a*a*a*a*a*b', 'unbounded repetitions which could match the same characters'),
+        ('.*\\w*', 'unbounded repetitions which could match the same characters'),
+        ('\\w+.*\\d+', 'unbounded repetitions which could match the same characters'),
+        ('[a-z]+-?[a-z]+', 'unbounded repetitions which could match the same characters'),
+        ('(?i)a*A*', 'unbounded repetitions which could match the same characters'),
+        (
+            '(?:a|aa){1,40}',
+            'repetition of a group containing repetition or alternatives starting with the same character',
+        ),
+        (
+            '(?:a{0,20}){0,20}b',
+            'repetition of a group containing repetition or alternatives starting with the same character',
+        ),
+        (
+            '(?:\\d+\\.){2}',
+            'repetition of a group containing repetition or alternatives starting with the same character',
+        ),
+        ('(?:a+b?){2}', 'repetition of a group containing repetition or alternatives starting with the same character'),
+        # searching tries every position, so unanchored patterns can't fail after unbounded repetition
+        ('[a-z]+-\\d+$', "unbounded repetition before the end of a pattern which doesn't start with `^`"),
+        ('\\d+-\\d+', "unbounded repetition before the end of a pattern which doesn't start with `^`"),
+        ('(?=a+)b', "unbounded repetition before the end of a pattern which doesn't start with `^`"),
+        ('(', 'Invalid regex'),
+    ],
+)
+def test_check_linear_time_regex(pattern: str, error: str | None):
+    if error is None:
+        check_linear_time_regex(pattern)
+    else:
+        with pytest.raises(ValueError, match=re.escape(error)):
+            check_linear_time_regex(pattern)
+
+
+def test_max_model_ref_length_rejects_nonlinear_regexes():
+    provider = Provider(
+        id='custom',
+        name='Custom',
+        api_pattern='custom.example.com',
+        models=[ModelInfo(id='bad', match=ClauseOr(or_=[ClauseEquals(equals='bad'), ClauseRegex(regex='^(a+)+$')]))],
+    )
+    DataSnapshot(providers=[provider], from_auto_update=False)
+    with pytest.raises(ValueError, match="^Provider 'custom' model 'bad': Regex .* may not match in linear time"):
+        DataSnapshot(providers=[provider], from_auto_update=False, max_model_ref_length=256)
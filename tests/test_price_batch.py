@@ -0,0 +1,107 @@
+from decimal import Decimal
+from typing import Any
+
+import pytest
+
+from genai_prices import Usage
+from genai_prices.data import providers
+from genai_prices.types import ModelPrice, Tier, TieredPrices
+
+np = pytest.importorskip('numpy')
+
+
+def _all_model_prices() -> list[ModelPrice]:
+    model_prices: list[ModelPrice] = []
+    for provider in providers:
+        for model in provider.models:
+            if isinstance(model.prices, ModelPrice):
+                model_prices.append(model.prices)
+            else:
+                model_prices.extend(conditional.prices for conditional in model.prices)
+    return model_prices
+
+
+def _usage_columns(rows: int) -> dict[str, Any]:
+    rng = np.random.default_rng(42)
+    cache_read = rng.integers(0, 100_000, rows)
+    cache_write = rng.integers(0, 50_000, rows)
+    input_audio = rng.integers(0, 5_000, rows)
+    cache_audio_read = rng.integers(0, 2, rows) * rng.integers(0, 1_000, rows)
+    output_audio = rng.integers(0, 1_000, rows)
+    return {
+        'input_tokens': cache_read + cache_write + input_audio + cache_audio_read + rng.integers(0, 400_000, rows),
+        'cache_read_tokens': cache_read + cache_audio_read,
+        'cache_write_tokens': cache_write,
+        'input_audio_tokens': input_audio + cache_audio_read,
+        'cache_audio_read_tokens': cache_audio_read,
+        'output_tokens': output_audio + rng.integers(0, 20_000, rows),
+        'output_audio_tokens': output_audio,
+    }
+
+
+@pytest.mark.filterwarnings('ignore::UserWarning')
+def test_batch_matches_fixed_scalar_prices() -> None:
+    columns = _usage_columns(50)
+    usages = [Usage(**{key: int(array[row]) for key, array in columns.items()}) for row in range(50)]
+
+    checked = 0
+    for model_price in _all_model_prices():
+        try:
+            expected = [model_price.calc_price_with(usage, numeric='fixed') for usage in usages]
+        except ValueError:
+            with pytest.raises(ValueError, match=r'^Row \d+: '):
+                model_price.calc_price_batch(columns)
+            continue
+
+        actual = model_price.calc_price_batch(columns)
+        for key in ('input_price', 'output_price', 'total_price'):
+            assert actual[key].dtype == np.int64
+            assert actual[key].tolist() == [int(prices[key].scaleb(9)) for prices in expected], (model_price, key)
+
+        floating = model_price.calc_price_batch(columns, numeric='float')
+        for key in ('input_price', 'output_price', 'total_price'):
+            decimal_prices = [float(model_price.calc_price(usage)[key]) for usage in usages[:5]]
+            assert floating[key][:5] == pytest.approx(decimal_prices, rel=1e-12, abs=1e-15)
+        checked += 1
+    assert checked > 100
+
+
+def test_batch_tiers_and_missing_keys() -> None:
+    price = ModelPrice(
+        input_mtok=TieredPrices(base=Decimal('1.25'), tiers=[Tier(start=200_000, price=Decimal('2.5'))]),
+        cache_read_mtok=Decimal('0.125'),
+        output_mtok=Decimal('10'),
+        requests_kcount=Decimal('1'),
+    )
+    result = price.calc_price_batch({'input_tokens': [1_000, 200_000, 200_001], 'output_tokens': np.array([3, 0, 1])})
+    assert result['input_price'].tolist() == [1_250_000, 250_000_000, 500_002_500]
+    assert result['output_price'].tolist() == [30_000, 0, 10_000]
+    assert result['total_price'].tolist() == [2_280_000, 251_000_000, 501_012_500]
+
+    result = price.calc_price_batch({'input_tokens': [1_000], 'cache_read_tokens': [400]}, numeric='float')
+    assert result['input_price'].tolist() == pytest.approx([0.00080])
+    assert result['total_price'].tolist() == pytest.approx([0.00180])
+
+    empty = price.calc_price_batch({'input_tokens': np.array([], dtype=np.int64)})
+    assert empty['total_price'].tolist() == []
+
+
+def test_batch_errors() -> None:
+    price = ModelPrice(input_mtok=Decimal('1'), cache_read_mtok=Decimal('0.1'), output_mtok=Decimal('2'))
+
+    with pytest.raises(ValueError, match=r'^Row 1: .*cache_read_tokens'):
+        price.calc_price_batch({'input_tokens': [10, 10], 'cache_read_tokens': [5, 20]})
+    with pytest.raises(ValueError, match=r'^Row 2: '):
+        price.calc_price_batch({'input_tokens': [10, 10, -1]})
+    with pytest.raises(ValueError, match="Unknown usage key 'tokens'"):
+        price.calc_price_batch({'tokens': [1]})
+    with pytest.raises(ValueError, match="Usage column 'output_tokens' has 1 rows, expected 2"):
+        price.calc_price_batch({'input_tokens': [1, 2], 'output_tokens': [1]})
+    with pytest.raises(ValueError, match="Usage column 'input_tokens' must be one-dimensional"):
+        price.calc_price_batch({'input_tokens': [[1, 2]]})
+    with pytest.raises(TypeError, match="'input_tokens' must have an integer dtype"):
+        price.calc_price_batch({'input_tokens': [1.5]})
+    with pytest.raises(ValueError, match="Unknown numeric backend 'decimal'"):
+        price.calc_price_batch({'input_tokens': [1]}, numeric='decimal')  # pyright: ignore[reportArgumentType]
+    with pytest.raises(ValueError, match=r'^Row 0: '):
+        price.calc_price_batch({'input_tokens': [float('nan')]}, numeric='float')
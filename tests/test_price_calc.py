@@ -1,10 +1,11 @@
+import re
 from datetime import datetime, timezone
-from decimal import Decimal
+from decimal import ROUND_HALF_EVEN, Decimal, localcontext
 
 import pytest
 from inline_snapshot import snapshot
 
-from genai_prices import Usage, calc_price
+from genai_prices import Usage, calc_price, calc_total
 from genai_prices.data import providers
 from genai_prices.data_snapshot import DataSnapshot, get_snapshot, set_custom_snapshot
 from genai_prices.types import (
@@ -1140,3 +1141,275 @@ def test_output_audio_usage():
         == snapshot(Decimal('80020.0'))
         == Decimal('20') * output_text_tokens / mil + Decimal('80') * output_audio_tokens / mil
     )
+
+
+def test_model_price_plan_is_cached_and_recompiled_on_change() -> None:
+    from genai_prices.units import _get_registry
+
+    registry = _get_registry()
+    price = ModelPrice(input_mtok=Decimal('1'), output_mtok=Decimal('2'))
+    plan = price.price_plan(registry)
+    assert price.price_plan(registry) is plan
+    assert plan.prices == (
+        ('input_tokens', Decimal('1'), 1_000_000, 'input'),
+        ('output_tokens', Decimal('2'), 1_000_000, 'output'),
+    )
+    assert price.calc_price(Usage(input_tokens=1_000_000, output_tokens=1_000_000))['total_price'] == Decimal('3')
+
+    price.output_mtok = Decimal('4')
+    assert price.price_plan(registry) is not plan
+    assert price.calc_price(Usage(input_tokens=1_000_000, output_tokens=1_000_000))['total_price'] == Decimal('5')
+
+    del price.output_mtok
+    assert price.calc_price(Usage(input_tokens=1_000_000, output_tokens=1_000_000))['total_price'] == Decimal('1')
+    assert '_price_plan' not in price.__dict__
+    assert repr(price) == "ModelPrice(input_mtok=Decimal('1'))"
+
+
+def test_model_price_plan_caches_validation_errors() -> None:
+    price = ModelPrice(cache_read_mtok=Decimal('1'))
+    for _ in range(2):
+        with pytest.raises(ValueError, match='Missing ancestor price for cache_read_tokens: input_tokens'):
+            price.calc_price(Usage(input_tokens=1))
+
+    price.input_mtok = Decimal('2')
+    assert price.calc_price(Usage(input_tokens=1_000_000))['total_price'] == Decimal('2')
+
+
+def test_model_price_plan_not_copied() -> None:
+    from copy import deepcopy
+
+    price = ModelPrice(input_mtok=Decimal('1'))
+    price.calc_price(Usage(input_tokens=1))
+    copied = deepcopy(price)
+    assert copied == price
+    assert copied.calc_price(Usage(input_tokens=1_000_000))['total_price'] == Decimal('1')
+
+
+def _all_model_prices() -> list[ModelPrice]:
+    model_prices: list[ModelPrice] = []
+    for provider in providers:
+        for model in provider.models:
+            if isinstance(model.prices, ModelPrice):
+                model_prices.append(model.prices)
+            else:
+                model_prices.extend(conditional.prices for conditional in model.prices)
+    return model_prices
+
+
+@pytest.mark.filterwarnings('ignore::UserWarning')
+@pytest.mark.parametrize(
+    'usage',
+    [
+        Usage(),
+        Usage(input_tokens=1_000, output_tokens=100),
+        Usage(input_tokens=300_000, cache_read_tokens=1_000, output_tokens=2_000),
+        Usage(
+            input_tokens=1_000,
+            cache_read_tokens=400,
+            input_audio_tokens=300,
+            cache_audio_read_tokens=100,
+            output_tokens=200,
+            output_audio_tokens=50,
+        ),
+        Usage(input_tokens=1_000.5, output_tokens=10),
+        Usage(input_tokens=Decimal('12.5'), cache_read_tokens=Decimal('2.5')),
+        Usage(input_tokens=100, cache_read_tokens=200),
+        # invalid in two ways, the compiled function must report the same error as the reference
+        Usage(input_tokens=10, cache_write_tokens=20, output_audio_tokens=5),
+    ],
+)
+def test_compiled_price_matches_calc_price(usage: Usage) -> None:
+    for model_price in _all_model_prices():
+        try:
+            expected = model_price.calc_price(usage)
+        except ValueError as e:
+            with pytest.raises(ValueError, match=re.escape(str(e))):
+                model_price.calc_price_with(usage, compiled=True)
+        else:
+            actual = model_price.calc_price_with(usage, compiled=True)
+            assert actual == expected
+            assert {key: str(value) for key, value in actual.items()} == {
+                key: str(value) for key, value in expected.items()
+            }
+
+
+def test_compiled_price_functions_shared_by_price_shape() -> None:
+    from genai_prices._codegen import _factories
+    from genai_prices.units import _get_registry
+
+    registry = _get_registry()
+    price = ModelPrice(
+        input_mtok=TieredPrices(base=Decimal('1'), tiers=[Tier(start=200_000, price=Decimal('2'))]),
+        output_mtok=Decimal('3'),
+        requests_kcount=Decimal('5'),
+    )
+    usage = Usage(input_tokens=300_000, output_tokens=1_000)
+    assert price.calc_price_with(usage, compiled=True) == price.calc_price(usage)
+    assert price.calc_price_with(usage, compiled=True)['total_price'] == Decimal('0.608')
+
+    compiled = price.price_plan(registry).compiled()
+    assert price.price_plan(registry).compiled() is compiled
+    factories = len(_factories)
+    other_price = ModelPrice(
+        input_mtok=TieredPrices(base=Decimal('10'), tiers=[Tier(start=200_000, price=Decimal('20'))]),
+        output_mtok=Decimal('30'),
+        requests_kcount=Decimal('50'),
+    )
+    assert other_price.calc_price_with(usage, compiled=True)['total_price'] == Decimal('6.08')
+    assert len(_factories) == factories
+
+    price.output_mtok = Decimal('4')
+    assert price.calc_price_with(usage, compiled=True)['total_price'] == Decimal('0.609')
+
+
+def test_snapshot_compile_prices() -> None:
+    snapshot_ = DataSnapshot(providers=providers, from_auto_update=False, compile_prices=True)
+    usage = Usage(input_tokens=1000, output_tokens=100)
+    price = snapshot_.calc(usage, 'gpt-4o', 'openai', None, None)
+    assert price.total_price == calc_price(usage, model_ref='gpt-4o', provider_id='openai').total_price
+
+
+@pytest.mark.filterwarnings('ignore::UserWarning')
+@pytest.mark.parametrize(
+    'usage',
+    [
+        Usage(input_tokens=1_000, output_tokens=100),
+        Usage(input_tokens=300_000, cache_read_tokens=1_000, output_tokens=2_000),
+        Usage(
+            input_tokens=1_234_567,
+            cache_read_tokens=400,
+            input_audio_tokens=300,
+            cache_audio_read_tokens=100,
+            output_tokens=7_777,
+            output_audio_tokens=50,
+        ),
+        Usage(input_tokens=1_000.5, output_tokens=10),
+        Usage(input_tokens=Decimal('12.5'), cache_read_tokens=Decimal('2.5')),
+    ],
+)
+def test_numeric_backends_agree_with_decimal(usage: Usage) -> None:
+    from genai_prices.units import _get_registry
+
+    registry = _get_registry()
+    for model_price in _all_model_prices():
+        try:
+            expected = model_price.calc_price(usage)
+        except ValueError:
+            continue
+
+        plan = model_price.price_plan(registry)
+        counts = plan.priced_counts(usage)
+        fixed_bound = Decimal(0)
+        for usage_key, price, per, _ in plan.prices:
+            fixed_bound += Decimal('0.5e-9')
+            prices = [price.base, *(tier.price for tier in price.tiers)] if isinstance(price, TieredPrices) else [price]
+            if any(p.scaleb(9) != p.scaleb(9).to_integral_value() for p in prices):
+                fixed_bound += Decimal('0.5e-9') * Decimal(str(counts[usage_key])) / per
+
+        fixed = model_price.calc_price_with(usage, numeric='fixed')
+        floating = model_price.calc_price_with(usage, numeric='float')
+        for key in ('input_price', 'output_price', 'total_price'):
+            value = expected[key]
+            assert abs(fixed[key] - value) <= fixed_bound, (model_price, key)
+            assert abs(floating[key] - value) <= value * Decimal('1e-15'), (model_price, key)
+
+
+def test_numeric_backend_results() -> None:
+    price = ModelPrice(
+        input_mtok=TieredPrices(base=Decimal('1.25'), tiers=[Tier(start=200_000, price=Decimal('2.5'))]),
+        output_mtok=Decimal('10'),
+    )
+    usage = Usage(input_tokens=1_000, output_tokens=3)
+    assert price.calc_price_with(usage, numeric='fixed') == {
+        'input_price': Decimal('0.00125'),
+        'output_price': Decimal('0.00003'),
+        'total_price': Decimal('0.00128'),
+    }
+    assert price.calc_price_with(usage, numeric='float') == price.calc_price(usage)
+
+    usage = Usage(input_tokens=300_000, output_tokens=1)
+    assert price.calc_price_with(usage, numeric='fixed')['total_price'] == Decimal('0.75001')
+    assert price.calc_price_with(usage, numeric='float')['total_price'] == Decimal('0.75001')
+
+    # 0.4 and 0.6 nano-dollars are rounded to the nearest nano-dollar
+    price_per_token = ModelPrice(input_mtok=Decimal('0.0004'), output_mtok=Decimal('0.0006'))
+    assert price_per_token.calc_price_with(Usage(input_tokens=1, output_tokens=1), numeric='fixed') == {
+        'input_price': Decimal(0),
+        'output_price': Decimal('1e-9'),
+        'total_price': Decimal('1e-9'),
+    }
+
+    # halves are rounded up, whether usage is an integer or not, including under another decimal context
+    price_per_token = ModelPrice(input_mtok=Decimal('0.0005'), output_mtok=Decimal('0.001'))
+    for usage in Usage(input_tokens=5, output_tokens=0), Usage(input_tokens=0, output_tokens=2.5):
+        with localcontext(rounding=ROUND_HALF_EVEN):
+            assert price_per_token.calc_price_with(usage, numeric='fixed')['total_price'] == Decimal('3e-9')
+
+    with pytest.raises(ValueError, match="Unknown numeric backend 'int'"):
+        price.calc_price_with(usage, numeric='int')  # pyright: ignore[reportArgumentType]
+
+
+def test_snapshot_numeric_backend() -> None:
+    from genai_prices.units import _get_registry
+
+    # prices are converted for the backend when the snapshot is created
+    for numeric in 'fixed', 'float':
+        model_price = ModelPrice(input_mtok=Decimal('1'))
+        model = ModelInfo(id='model', match=ClauseEquals(equals='model'), prices=model_price)
+        provider = Provider(id='custom', name='Custom', api_pattern='custom.example.com', models=[model])
+        DataSnapshot(providers=[provider], from_auto_update=False, numeric_backend=numeric)
+        plan = model_price.price_plan(_get_registry())
+        if numeric == 'fixed':
+            assert plan._fixed_prices == (('input_tokens', 1_000_000_000, (), 1_000_000, 'input'),)
+            assert plan._float_prices is None
+        else:
+            assert plan._fixed_prices is None
+            assert plan._float_prices == (('input_tokens', 1.0, (), 1_000_000, 'input'),)
+
+    snapshot_ = DataSnapshot(providers=providers, from_auto_update=False, numeric_backend='fixed')
+    usage = Usage(input_tokens=1, output_tokens=1)
+    set_custom_snapshot(snapshot_)
+    try:
+        # fixed-point results have nine decimal places
+        assert str(calc_price(usage, model_ref='gpt-4o', provider_id='openai').total_price) == '0.000012500'
+        assert str(calc_price(usage, model_ref='gpt-4o', provider_id='openai', numeric='decimal').total_price) == (
+            '0.0000125'
+        )
+    finally:
+        set_custom_snapshot(None)
+
+
+@pytest.mark.parametrize(
+    'model_ref,provider_id,timestamp',
+    [
+        ('gpt-4o', 'openai', None),
+        ('claude-sonnet-4-6', None, datetime(2025, 6, 1, tzinfo=timezone.utc)),
+        ('deepseek-chat', 'deepseek', datetime(2025, 6, 1, 1, tzinfo=timezone.utc)),
+        ('deepseek-chat', 'deepseek', datetime(2025, 6, 1, 20, tzinfo=timezone.utc)),
+    ],
+)
+def test_calc_total(model_ref: str, provider_id: str | None, timestamp: datetime | None) -> None:
+    usage = Usage(input_tokens=10_000, cache_read_tokens=2_000, output_tokens=500)
+    price = calc_price(usage, model_ref, provider_id=provider_id, genai_request_timestamp=timestamp)
+    assert calc_total(usage, model_ref, provider_id=provider_id, genai_request_timestamp=timestamp) == (
+        price.total_price
+    )
+    assert calc_total(usage, model_ref, provider_id=provider_id, genai_request_timestamp=timestamp, breakdown=True) == (
+        price.input_price,
+        price.output_price,
+        price.total_price,
+    )
+
+    fixed = calc_total(usage, model_ref, provider_id=provider_id, genai_request_timestamp=timestamp, numeric='fixed')
+    assert (
+        fixed
+        == calc_price(
+            usage, model_ref, provider_id=provider_id, genai_request_timestamp=timestamp, numeric='fixed'
+        ).total_price
+    )
+
+
+def test_calc_total_unknown_model() -> None:
+    with pytest.raises(LookupError, match="Unable to find model with model_ref='unknown-model' in openai"):
+        calc_total(Usage(input_tokens=1), 'unknown-model', provider_id='openai')
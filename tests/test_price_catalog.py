@@ -0,0 +1,86 @@
+import dataclasses
+from decimal import Decimal
+
+import pytest
+
+from genai_prices import Usage
+from genai_prices.data import providers
+from genai_prices.data_snapshot import DataSnapshot
+from genai_prices.types import ClauseEquals, ModelInfo, ModelPrice
+
+np = pytest.importorskip('numpy')
+
+from genai_prices.catalog import price_catalog  # noqa: E402
+
+
+@pytest.mark.filterwarnings('ignore::UserWarning')
+@pytest.mark.parametrize(
+    'usage',
+    [
+        Usage(input_tokens=1_000, output_tokens=100),
+        Usage(input_tokens=300_000, cache_read_tokens=100_000, cache_write_tokens=20_000, output_tokens=5_000),
+        Usage(input_tokens=5_000, input_audio_tokens=1_000, output_tokens=10, output_audio_tokens=5),
+        Usage(output_tokens=10),
+    ],
+)
+def test_catalog_matches_scalar_prices(usage: Usage) -> None:
+    snapshot = DataSnapshot(providers=providers, from_auto_update=False)
+    ranked = price_catalog(usage, snapshot=snapshot)
+
+    expected: dict[tuple[str, str], Decimal] = {}
+    for provider in providers:
+        for model in provider.models:
+            try:
+                expected[provider.id, model.id] = model.calc_price(usage, provider).total_price
+            except ValueError:
+                pass
+
+    assert {(price.provider.id, price.model.id) for price in ranked} == set(expected)
+    totals = [price.total_price for price in ranked]
+    assert totals == sorted(totals)
+    for price in ranked:
+        assert price.total_price == pytest.approx(float(expected[price.provider.id, price.model.id]), rel=1e-12)
+        assert price.input_price + price.output_price <= price.total_price * (1 + 1e-12)
+
+
+def test_catalog_provider_subset_and_limit() -> None:
+    snapshot = DataSnapshot(providers=providers, from_auto_update=False)
+    usage = Usage(input_tokens=1_000, output_tokens=100)
+
+    ranked = price_catalog(usage, provider_ids={'openai', 'anthropic'}, snapshot=snapshot)
+    assert {price.provider.id for price in ranked} == {'openai', 'anthropic'}
+
+    cheapest = price_catalog(usage, provider_ids=['openai'], limit=3, snapshot=snapshot)
+    assert cheapest == [price for price in ranked if price.provider.id == 'openai'][:3]
+
+
+def test_price_matrix_rebuilt_when_providers_change() -> None:
+    provider = dataclasses.replace(providers[0], models=list(providers[0].models))
+    snapshot = DataSnapshot(providers=[provider], from_auto_update=False)
+    matrix = snapshot.price_matrix()
+    assert snapshot.price_matrix() is matrix
+
+    provider.models.append(
+        ModelInfo(id='cheap', match=ClauseEquals(equals='cheap'), prices=ModelPrice(input_mtok=Decimal('0.001')))
+    )
+    rebuilt = snapshot.price_matrix()
+    assert rebuilt is not matrix
+    cheapest = price_catalog(Usage(input_tokens=1_000), limit=1, snapshot=snapshot)
+    assert [price.model.id for price in cheapest] == ['cheap']
+    assert cheapest[0].total_price == pytest.approx(1e-6)
+
+
+def test_price_matrix_rebuilt_when_conditional_prices_change(monkeypatch: pytest.MonkeyPatch) -> None:
+    deepseek = next(provider for provider in providers if provider.id == 'deepseek')
+    snapshot = DataSnapshot(providers=[deepseek], from_auto_update=False)
+
+    # 2025-01-01 12:00 UTC is off-peak for deepseek, peak prices apply from 16:30
+    monkeypatch.setattr('time.time', lambda: 1_735_732_800.0)
+    matrix = snapshot.price_matrix()
+    assert matrix.valid_until == 1_735_749_000.0
+    off_peak = price_catalog(Usage(input_tokens=1_000_000), snapshot=snapshot)
+
+    monkeypatch.setattr('time.time', lambda: 1_735_749_000.0)
+    assert snapshot.price_matrix() is not matrix
+    peak = price_catalog(Usage(input_tokens=1_000_000), snapshot=snapshot)
+    assert [price.total_price for price in peak] != [price.total_price for price in off_peak]
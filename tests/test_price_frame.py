@@ -0,0 +1,137 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+import pytest
+
+from genai_prices import Usage, calc_price
+
+np = pytest.importorskip('numpy')
+
+from genai_prices.frame import price_frame  # noqa: E402
+
+MODELS = [
+    ('openai', 'gpt-4o'),
+    ('openai', 'o3'),
+    (None, 'claude-sonnet-4-6'),
+    ('anthropic', 'claude-opus-4-6'),
+    ('deepseek', 'deepseek-chat'),
+    ('deepseek', 'deepseek-reasoner'),
+    ('google', 'gemini-3.6-flash'),
+]
+
+
+def _usage_log(rows: int) -> dict[str, list[Any]]:
+    rng = np.random.default_rng(7)
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    model_indexes = rng.integers(0, len(MODELS), rows).tolist()
+    cache_read = rng.integers(0, 10_000, rows)
+    return {
+        'provider': [MODELS[i][0] for i in model_indexes],
+        'model': [MODELS[i][1] for i in model_indexes],
+        'timestamp': [start + timedelta(minutes=int(m)) for m in rng.integers(0, 2 * 365 * 24 * 60, rows)],
+        'input_tokens': (cache_read + rng.integers(0, 300_000, rows)).tolist(),
+        'cache_read_tokens': cache_read.tolist(),
+        'output_tokens': rng.integers(0, 20_000, rows).tolist(),
+    }
+
+
+def _expected(log: dict[str, list[Any]], key: str) -> list[int]:
+    expected: list[int] = []
+    for provider_id, model_ref, timestamp, input_tokens, cache_read_tokens, output_tokens in zip(
+        log['provider'],
+        log['model'],
+        log['timestamp'],
+        log['input_tokens'],
+        log['cache_read_tokens'],
+        log['output_tokens'],
+    ):
+        usage = Usage(input_tokens=input_tokens, cache_read_tokens=cache_read_tokens, output_tokens=output_tokens)
+        price = calc_price(
+            usage, model_ref, provider_id=provider_id, genai_request_timestamp=timestamp, numeric='fixed'
+        )
+        expected.append(int(getattr(price, key).scaleb(9)))
+    return expected
+
+
+@pytest.mark.filterwarnings('ignore::UserWarning')
+def test_price_pandas_frame() -> None:
+    pd = pytest.importorskip('pandas')
+
+    log = _usage_log(500)
+    df = pd.DataFrame(log)
+    priced = price_frame(df, provider_column='provider', timestamp_column='timestamp')
+    assert list(priced.columns) == [*log, 'input_price', 'output_price', 'total_price']
+    assert 'total_price' not in df.columns
+    assert priced['input_price'].tolist() == _expected(log, 'input_price')
+    assert priced['total_price'].tolist() == _expected(log, 'total_price')
+
+    # naive timestamps are taken to be UTC, and prices can be floats in USD
+    df['timestamp'] = df['timestamp'].dt.tz_localize(None)
+    floating = price_frame(df, provider_column='provider', timestamp_column='timestamp', numeric='float')
+    assert floating['total_price'].to_numpy() * 1e9 == pytest.approx(_expected(log, 'total_price'), abs=1)
+
+
+@pytest.mark.filterwarnings('ignore::UserWarning')
+def test_price_polars_frame() -> None:
+    pl = pytest.importorskip('polars')
+
+    log = _usage_log(500)
+    df = pl.DataFrame(log)
+    priced = price_frame(
+        df,
+        provider_column='provider',
+        timestamp_column='timestamp',
+        usage_columns={'input_tokens': 'input_tokens', 'output_tokens': 'output_tokens'},
+    )
+    assert priced.columns == [*log, 'input_price', 'output_price', 'total_price']
+    log['cache_read_tokens'] = [0] * 500
+    assert priced.get_column('total_price').to_list() == _expected(log, 'total_price')
+
+
+def test_price_frame_missing_usage() -> None:
+    # missing usage is taken as 0, whether the column is promoted to float or has a nullable integer dtype
+    expected = [
+        int(calc_price(usage, 'gpt-4o', provider_id='openai', numeric='fixed').total_price.scaleb(9))
+        for usage in [Usage(input_tokens=1_000, output_tokens=100), Usage(input_tokens=1_000), Usage(output_tokens=100)]
+    ]
+    input_tokens = [1_000, 1_000, None]
+    output_tokens = [100, None, 100]
+
+    pd = pytest.importorskip('pandas')
+    frames = [
+        pd.DataFrame({'model': ['gpt-4o'] * 3, 'input_tokens': input_tokens, 'output_tokens': output_tokens}),
+        pd.DataFrame(
+            {
+                'model': ['gpt-4o'] * 3,
+                'input_tokens': pd.array(input_tokens, dtype='Int64'),
+                'output_tokens': pd.array(output_tokens, dtype='Int64'),
+            }
+        ),
+    ]
+    for df in frames:
+        assert price_frame(df)['total_price'].tolist() == expected
+        assert price_frame(df, numeric='float')['total_price'].tolist() == pytest.approx([p / 1e9 for p in expected])
+
+    pl = pytest.importorskip('polars')
+    df = pl.DataFrame({'model': ['gpt-4o'] * 3, 'input_tokens': input_tokens, 'output_tokens': output_tokens})
+    assert price_frame(df).get_column('total_price').to_list() == expected
+    assert price_frame(df, numeric='float').get_column('total_price').to_list() == pytest.approx(
+        [p / 1e9 for p in expected]
+    )
+
+
+def test_price_frame_errors() -> None:
+    pd = pytest.importorskip('pandas')
+
+    df = pd.DataFrame({'model': ['gpt-4o', 'gpt-4o', 'not-a-model'], 'input_tokens': [10, 10, 10]})
+    with pytest.raises(LookupError, match="^Row 2: Unable to find provider with model matching 'not-a-model'"):
+        price_frame(df)
+
+    df = pd.DataFrame(
+        {'model': ['gpt-4o', 'gpt-4o', 'o3'], 'input_tokens': [10, 10, 10], 'cache_read_tokens': [1, 20, 1]}
+    )
+    with pytest.raises(ValueError, match=r'^Row 1: .*cache_read_tokens'):
+        price_frame(df)
+
+    with pytest.raises(TypeError, match='Expected a pandas or Polars DataFrame, not dict'):
+        price_frame({'model': ['gpt-4o']})
@@ -1,4 +1,4 @@
-from datetime import date, datetime
+from datetime import date, datetime, time, timedelta, timezone
 from decimal import Decimal
 
 import pytest
@@ -12,6 +12,7 @@ from genai_prices.types import (
     StartDateConstraint,
     Tier,
     TieredPrices,
+    TimeOfDateConstraint,
 )
 
 MILLION = Decimal(1_000_000)
@@ -200,6 +201,93 @@ def test_model_info_uses_first_conditional_price_when_none_are_active() -> None:
     assert model.get_prices(datetime(2029, 1, 1)).input_mtok == Decimal('1')
 
 
+def _linear_get_prices(model: ModelInfo, request_timestamp: datetime) -> ModelPrice:
+    assert isinstance(model.prices, list)
+    for conditional_price in reversed(model.prices):
+        if conditional_price.constraint is None or conditional_price.constraint.active(request_timestamp):
+            return conditional_price.prices
+    return model.prices[0].prices
+
+
+def _timeline_model() -> ModelInfo:
+    utc_plus_2 = timezone(timedelta(hours=2))
+    return ModelInfo(
+        id='timeline-model',
+        match=ClauseEquals('timeline-model'),
+        prices=[
+            ConditionalPrice(prices=ModelPrice(input_mtok=Decimal('1'))),
+            ConditionalPrice(
+                constraint=TimeOfDateConstraint(
+                    start_time=time(0, 30, tzinfo=timezone.utc), end_time=time(16, 30, tzinfo=timezone.utc)
+                ),
+                prices=ModelPrice(input_mtok=Decimal('2')),
+            ),
+            ConditionalPrice(
+                constraint=StartDateConstraint(start_date=date(2030, 1, 1)),
+                prices=ModelPrice(input_mtok=Decimal('3')),
+            ),
+            ConditionalPrice(
+                constraint=TimeOfDateConstraint(
+                    start_time=time(1, 0, tzinfo=utc_plus_2), end_time=time(12, 0, tzinfo=utc_plus_2)
+                ),
+                prices=ModelPrice(input_mtok=Decimal('4')),
+            ),
+            ConditionalPrice(
+                constraint=StartDateConstraint(start_date=date(2031, 1, 1)),
+                prices=ModelPrice(input_mtok=Decimal('5')),
+            ),
+            ConditionalPrice(
+                constraint=TimeOfDateConstraint(
+                    start_time=time(22, 0, tzinfo=timezone.utc), end_time=time(2, 0, tzinfo=timezone.utc)
+                ),
+                prices=ModelPrice(input_mtok=Decimal('6')),
+            ),
+        ],
+    )
+
+
+def test_price_timeline_matches_linear_scan() -> None:
+    from genai_prices.data import providers
+
+    models = [_timeline_model()]
+    models.extend(model for provider in providers for model in provider.models if isinstance(model.prices, list))
+    timestamps = [
+        datetime(year, month, day, hour, minute, tzinfo=tz)
+        for year, month, day in [(2024, 1, 1), (2029, 12, 31), (2030, 1, 1), (2031, 1, 1), (2031, 6, 1)]
+        for hour in range(24)
+        for minute in (0, 29, 30, 59)
+        for tz in (timezone.utc, timezone(timedelta(hours=-5)))
+    ]
+    for model in models:
+        for timestamp in timestamps:
+            assert model.get_prices(timestamp) is _linear_get_prices(model, timestamp), (model.id, timestamp)
+
+
+def test_price_timeline_rebuilt_when_prices_change() -> None:
+    model = _timeline_model()
+    timestamp = datetime(2032, 1, 1, 12, tzinfo=timezone.utc)
+    assert model.get_prices(timestamp).input_mtok == Decimal('5')
+
+    assert isinstance(model.prices, list)
+    model.prices.append(ConditionalPrice(prices=ModelPrice(input_mtok=Decimal('7'))))
+    assert model.get_prices(timestamp).input_mtok == Decimal('7')
+
+
+def test_current_prices_cached_until_next_boundary(monkeypatch: pytest.MonkeyPatch) -> None:
+    model = _timeline_model()
+    timeline = model.price_timeline()
+    now = datetime(2030, 6, 1, 16, 29, tzinfo=timezone.utc).timestamp()
+    monkeypatch.setattr('time.time', lambda: now)
+    assert model.get_current_prices().input_mtok == Decimal('3')
+    assert timeline._current is not None
+    # the next boundary is 22:00, the start of the last time of day constraint
+    assert timeline._current[1] == now + 5 * 3_600 + 31 * 60
+
+    for now in range(int(now), int(now) + 2 * 86_400, 599):
+        timestamp = datetime.fromtimestamp(now, tz=timezone.utc)
+        assert model.get_current_prices() is _linear_get_prices(model, timestamp), timestamp
+
+
 @pytest.mark.parametrize(
     'model_price,usage,message',
     [
@@ -10,12 +10,7 @@ import pytest
 
 from genai_prices import data
 from genai_prices.data_units import unit_data
-from genai_prices.types import (
-    ModelPrice,
-    Usage,
-    _collect_resolved_model_prices,
-    _compute_registry_priced_counts,
-)
+from genai_prices.types import ModelPrice, PricePlan, Usage
 from genai_prices.units import UnitDef, UnitRegistry, _get_registry
 from prices import package_data, prices_types as build_types
 from prices.build import load_units
@@ -290,7 +285,9 @@ def test_repo_prices_omit_redundant_equal_rate_descendants() -> None:
                 [price.prices for price in model.prices] if isinstance(model.prices, list) else [model.prices]
             )
             for price_index, model_price in enumerate(model_prices):
-                resolved_prices = _collect_resolved_model_prices(model_price, registry)
+                plan = PricePlan(model_price, registry)
+                assert plan.error is None
+                resolved_prices = [(registry.units[usage_key], price) for usage_key, price, _, _ in plan.prices]
                 prices_by_usage_key = {unit.usage_key: (unit, price_value) for unit, price_value in resolved_prices}
 
                 for unit, price_value in resolved_prices:
@@ -395,6 +392,27 @@ def test_bundled_non_token_unit_relationships() -> None:
     assert not registry.units['storage_searches'].is_compatible_with(registry.units['code_executions'])
 
 
+def test_unit_dimension_masks_match_dimension_mappings() -> None:
+    registry = UnitRegistry(load_units())
+    other_registry = UnitRegistry(dict(reversed(list(load_units().items()))))
+
+    for a in registry.units.values():
+        standalone_a = UnitDef(a.usage_key, a.price_key, a.per, a.dimensions)
+        for b in registry.units.values():
+            compatible = all(b.dimensions.get(key, value) == value for key, value in a.dimensions.items())
+            ancestor = a.dimensions.items() <= b.dimensions.items()
+            join = registry._units_by_dimension.get(frozenset(a.dimensions.items() | b.dimensions.items()))
+
+            assert a.is_compatible_with(b) is compatible
+            assert a.is_ancestor_or_self_of(b) is ancestor
+            assert registry.find_join(a, b) is (join if compatible else None)
+            # units without masks, or with masks assigned by another registry, are compared by their dimensions
+            assert standalone_a.is_compatible_with(b) is compatible
+            assert standalone_a.is_ancestor_or_self_of(b) is ancestor
+            assert other_registry.units[a.usage_key].is_compatible_with(b) is compatible
+            assert other_registry.units[a.usage_key].is_ancestor_or_self_of(b) is ancestor
+
+
 def test_unit_registry_units_mapping_is_immutable() -> None:
     registry = UnitRegistry(unit_data)
 
@@ -632,9 +650,9 @@ def test_validate_units_accepts_bundled_units() -> None:
     assert not hasattr(registry.units['cache_audio_write_1h_tokens'], 'dimension_requirements')
 
 
-def test_compute_registry_priced_counts_handles_reasoning_modality_overlap() -> None:
+def test_price_plan_priced_counts_handles_reasoning_modality_overlap() -> None:
     registry = UnitRegistry(load_units())
-    resolved_prices = _collect_resolved_model_prices(
+    plan = PricePlan(
         ModelPrice(
             output_mtok=Decimal('1'),
             output_text_mtok=Decimal('2'),
@@ -644,8 +662,7 @@ def test_compute_registry_priced_counts_handles_reasoning_modality_overlap() ->
         registry,
     )
 
-    assert _compute_registry_priced_counts(
-        resolved_prices,
+    assert plan.priced_counts(
         Usage(
             output_tokens=100,
             output_text_tokens=60,
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import copy
 import json
+import pickle
 from collections.abc import Iterator
 from contextlib import contextmanager
 from dataclasses import dataclass
@@ -10,6 +12,7 @@ from types import SimpleNamespace
 from typing import Any, cast
 from unittest.mock import patch
 
+import pydantic
 import pytest
 
 from genai_prices.types import Usage
@@ -26,7 +29,8 @@ def _use_registry(raw_units: dict[str, Any]) -> Iterator[UnitRegistry]:
 def test_usage_direct_construction_is_strict_for_reported_usage_keys() -> None:
     usage = Usage(input_tokens=100, output_tokens=None)
 
-    assert usage.__dict__ == {'input_tokens': 100}
+    assert repr(usage) == 'Usage(input_tokens=100)'
+    assert usage == Usage(input_tokens=100)
     assert usage.input_tokens == 100
     assert usage.output_tokens == 0
 
@@ -55,10 +59,11 @@ def test_usage_direct_construction_rejects_invalid_reported_values(value: Any) -
 def test_usage_direct_construction_preserves_float_values() -> None:
     usage = Usage(audio_seconds=0.125, input_tokens=3.0)
 
-    assert usage.__dict__ == {'audio_seconds': 0.125, 'input_tokens': 3.0}
+    assert repr(usage) == 'Usage(input_tokens=3.0, audio_seconds=0.125)'
     assert type(usage.audio_seconds) is float
     assert type(usage.input_tokens) is float
-    assert json.loads(json.dumps(usage.__dict__)) == usage.__dict__
+    values = {'audio_seconds': usage.audio_seconds, 'input_tokens': usage.input_tokens}
+    assert json.loads(json.dumps(values)) == values
 
 
 def test_usage_direct_construction_preserves_decimal_values() -> None:
@@ -67,7 +72,7 @@ def test_usage_direct_construction_preserves_decimal_values() -> None:
     usage = Usage(audio_seconds=value)
 
     assert usage.audio_seconds is value
-    assert usage.__dict__ == {'audio_seconds': Decimal('3.00')}
+    assert repr(usage) == "Usage(audio_seconds=Decimal('3.00'))"
 
 
 def test_usage_direct_construction_normalizes_integer_subclasses() -> None:
@@ -123,21 +128,53 @@ def test_usage_assignment_preserves_regular_object_attributes() -> None:
     usage.imaginary_tokens = 1
 
     assert usage.imaginary_tokens == 1
-    assert usage.__dict__ == {'imaginary_tokens': 1}
     assert usage == Usage()
     assert repr(usage) == 'Usage()'
     assert usage + Usage(input_tokens=2) == Usage(input_tokens=2)
 
 
+def test_usage_subclass_attributes_are_in_instance_dict() -> None:
+    class LabelledUsage(Usage):
+        def __init__(self, *, label: str, **usage: Any) -> None:
+            super().__init__(**usage)
+            self.label = label
+
+    with pytest.warns(UserWarning, match='Unsupported usage key for standard pricing: sausage_tokens'):
+        usage = LabelledUsage(label='a', input_tokens=1, sausage_tokens=2)
+
+    # reported usage is stored like `Usage`'s, other attributes are normal ones
+    assert vars(usage) == {'sausage_tokens': 2, 'label': 'a'}
+    usage.output_tokens = 3
+    usage.retries = 1
+    assert vars(usage) == {'sausage_tokens': 2, 'label': 'a', 'retries': 1}
+    assert usage == Usage(input_tokens=1, output_tokens=3)
+    del usage.retries
+    with pytest.raises(AttributeError):
+        del usage.retries
+
+    with _use_registry(
+        {
+            'sausage_tokens': {
+                'per': 1_000_000,
+                'price_key': 'sausage_mtok',
+                'dimensions': {'family': 'tokens', 'direction': 'input'},
+            },
+        }
+    ):
+        assert repr(usage) == 'LabelledUsage(sausage_tokens=2)'
+        assert vars(usage) == {'label': 'a', 'input_tokens': 1, 'output_tokens': 3}
+
+
 def test_usage_assignment_updates_registered_reported_values() -> None:
     usage = Usage()
 
     usage.input_tokens = 100
     assert usage.input_tokens == 100
-    assert usage.__dict__['input_tokens'] == 100
+    assert repr(usage) == 'Usage(input_tokens=100)'
 
     usage.input_tokens = None
-    assert 'input_tokens' not in usage.__dict__
+    assert repr(usage) == 'Usage()'
+    assert usage == Usage()
     assert usage.input_tokens == 0
 
 
@@ -168,6 +205,19 @@ def test_usage_addition_operates_on_reported_values() -> None:
     assert type(usage.output_tokens) is int
 
 
+def test_usage_addition_constructs_subclasses() -> None:
+    class LabelledUsage(Usage):
+        def __init__(self, *, label: str = 'summed', **usage: Any) -> None:
+            super().__init__(**usage)
+            self.label = label
+
+    usage = LabelledUsage(input_tokens=10, label='a') + LabelledUsage(input_tokens=5, output_tokens=1, label='b')
+
+    assert type(usage) is LabelledUsage
+    assert usage.label == 'summed'
+    assert usage == Usage(input_tokens=15, output_tokens=1)
+
+
 def test_usage_addition_uses_shortest_decimal_float_values() -> None:
     usage = Usage(audio_seconds=0.1) + Usage(audio_seconds=0.2)
 
@@ -222,13 +272,49 @@ def test_usage_equality_operates_on_reported_values() -> None:
     assert Usage(input_tokens=0) == Usage(input_tokens=0)
 
 
-def test_usage_assigning_instance_dict_replaces_reported_storage() -> None:
-    usage = Usage(input_tokens=1)
+def test_usage_stores_values_in_slots() -> None:
+    usage = Usage(input_tokens=1, cache_read_tokens=0, output_tokens=5)
+
+    assert not hasattr(usage, '__dict__')
+    with pytest.raises(AttributeError):
+        usage.__dict__ = {'output_tokens': 5}
+
+    # values are kept in registry order, whatever order they're set in
+    assert repr(usage) == 'Usage(input_tokens=1, output_tokens=5, cache_read_tokens=0)'
+
+    usage.cache_write_tokens = 2
+    usage.output_tokens = None
+    assert repr(usage) == 'Usage(input_tokens=1, cache_read_tokens=0, cache_write_tokens=2)'
+    assert usage == Usage(cache_read_tokens=0, cache_write_tokens=2, input_tokens=1)
+
+    del usage.cache_read_tokens
+    assert usage == Usage(input_tokens=1, cache_write_tokens=2)
+
+
+def test_usage_values_move_when_registry_changes() -> None:
+    usage = Usage(input_tokens=3, output_tokens=2)
+
+    with _use_registry(
+        {
+            'output_tokens': {
+                'per': 1_000_000,
+                'price_key': 'output_mtok',
+                'dimensions': {'family': 'tokens', 'direction': 'output'},
+            },
+        }
+    ):
+        assert repr(usage) == 'Usage(output_tokens=2)'
+        assert usage.input_tokens == 3
+
+    assert usage == Usage(input_tokens=3, output_tokens=2)
+    assert repr(usage) == 'Usage(input_tokens=3, output_tokens=2)'
+
 
-    usage.__dict__ = {'output_tokens': 5}
+def test_usage_copy_and_pickle() -> None:
+    usage = Usage(input_tokens=3, audio_seconds=Decimal('1.5'))
 
-    assert usage.__dict__ == {'output_tokens': 5}
-    assert usage.output_tokens == 5
+    assert copy.deepcopy(usage) == usage
+    assert pickle.loads(pickle.dumps(usage)) == usage
 
 
 def test_usage_reported_value_returns_stored_or_zero() -> None:
@@ -279,10 +365,59 @@ def test_usage_repr_orders_extra_registered_keys_by_registry_order() -> None:
         assert repr(usage) == 'Usage(input_tokens=3, sausage_tokens=1, cheese_tokens=2)'
 
 
-def test_usage_from_raw_ignores_mapping_keys() -> None:
-    usage = Usage.from_raw({'input_tokens': 100, 'output_tokens': 50})
+def test_usage_from_raw_reads_mapping_keys() -> None:
+    usage = Usage.from_raw({'input_tokens': 100, 'output_tokens': None, 'sausage_tokens': 50, 1: 2})
+
+    assert usage == Usage(input_tokens=100)
+
+
+def test_usage_from_raw_reads_pydantic_models() -> None:
+    class SdkUsage(pydantic.BaseModel, extra='allow'):
+        input_tokens: int
+        output_tokens: int | None = None
+
+        @property
+        def cache_read_tokens(self) -> int:
+            return 10
+
+    usage = Usage.from_raw(SdkUsage(input_tokens=100, audio_seconds=0.5, sausage_tokens=1))  # pyright: ignore[reportCallIssue]
+
+    assert usage == Usage(input_tokens=100, cache_read_tokens=10, audio_seconds=0.5)
 
-    assert usage == Usage()
+
+def test_usage_from_raw_attribute_plan_follows_registry() -> None:
+    @dataclass
+    class RawUsage:
+        input_tokens: int
+        sausage_tokens: int = 0
+
+    assert Usage.from_raw(RawUsage(input_tokens=100, sausage_tokens=5)) == Usage(input_tokens=100)
+
+    with _use_registry(
+        {
+            'sausage_tokens': {
+                'per': 1_000_000,
+                'price_key': 'sausage_mtok',
+                'dimensions': {'family': 'tokens', 'direction': 'input'},
+            },
+        }
+    ):
+        assert repr(Usage.from_raw(RawUsage(input_tokens=100, sausage_tokens=5))) == 'Usage(sausage_tokens=5)'
+
+
+def test_usage_from_raw_reads_custom_attribute_access() -> None:
+    class LazyUsage:
+        __slots__ = ('output_tokens',)
+
+        def __init__(self) -> None:
+            self.output_tokens = 5
+
+        def __getattr__(self, name: str) -> int:
+            if name == 'input_tokens':
+                return 100
+            raise AttributeError(name)
+
+    assert Usage.from_raw(LazyUsage()) == Usage(input_tokens=100, output_tokens=5)
 
 
 def test_usage_from_raw_reads_known_object_attributes() -> None:
@@ -299,14 +434,29 @@ def test_usage_from_raw_preserves_decimal_known_object_attributes() -> None:
     assert usage.input_tokens is value
 
 
-def test_usage_from_raw_revalidates_existing_usage_storage() -> None:
-    usage = Usage()
-    usage.__dict__['input_tokens'] = Decimal('NaN')
+def test_usage_from_raw_constructs_subclasses() -> None:
+    class LabelledUsage(Usage):
+        def __init__(self, *, label: str = 'raw', **usage: Any) -> None:
+            super().__init__(**usage)
+            self.label = label
+
+    usage = LabelledUsage.from_raw({'input_tokens': 100, 'output_tokens': None, 'sausage_tokens': 1})
+
+    assert type(usage) is LabelledUsage
+    assert usage.label == 'raw'
+    assert usage == Usage(input_tokens=100)
+
+
+def test_usage_from_raw_returns_existing_usage() -> None:
+    usage = Usage(input_tokens=1)
 
+    # values are validated when they're set, so existing usage is used as is
+    assert Usage.from_raw(usage) is usage
     with pytest.raises(
         ValueError, match='Invalid usage value for input_tokens: expected a finite non-negative int, float, or Decimal'
     ):
-        Usage.from_raw(usage)
+        usage.input_tokens = Decimal('NaN')
+    assert Usage.from_raw(usage) == Usage(input_tokens=1)
 
 
 def test_usage_from_raw_reads_known_dataclass_attributes() -> None:
@@ -361,8 +511,7 @@ def test_usage_safe_missing_read_returns_zero_without_reporting() -> None:
 
     assert usage.input_tokens == 0
     assert usage.cache_read_tokens == 0
-    assert 'input_tokens' not in usage.__dict__
-    assert 'cache_read_tokens' not in usage.__dict__
+    assert repr(usage) == 'Usage(output_tokens=100)'
 
 
 def test_usage_missing_join_read_rejects_overlapping_ancestors() -> None: